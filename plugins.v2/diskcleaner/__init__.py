@@ -1,13 +1,21 @@
+import heapq
+import itertools
+import json
 import os
+import queue
+import random
 import re
 import shutil
+import sqlite3
 import threading
 import time
-from collections import deque
+from collections import namedtuple
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, wait
 from enum import Enum
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
 import pytz
 from apscheduler.schedulers.background import BackgroundScheduler
@@ -31,6 +39,385 @@ from app.utils.system import SystemUtils
 from fastapi.responses import PlainTextResponse
 
 
+# 索引/扫描得到的轻量 stat 结果，字段名与 os.stat_result 保持一致，便于两种来源混用。
+IndexedStat = namedtuple("IndexedStat", ["st_size", "st_atime", "st_mtime", "st_dev", "st_ino", "st_nlink"])
+
+
+class LibraryFileIndex:
+    # 媒体库文件索引（插件数据目录下的 SQLite 文件）。
+    # 目录 mtime 未变化时直接复用上次列表，仅重新列举发生变化的目录；
+    # 目录 mtime 不反映文件内容/atime 变化，使用方在关键决策前需自行复核单个文件。
+
+    def __init__(self, db_path: Path):
+        self._db_path = Path(db_path)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self._db_path.as_posix(), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS dirs (
+                    path TEXT PRIMARY KEY,
+                    parent TEXT,
+                    mtime_ns INTEGER NOT NULL DEFAULT -1,
+                    scanned_at INTEGER NOT NULL DEFAULT 0
+                );
+                CREATE INDEX IF NOT EXISTS idx_dirs_parent ON dirs(parent);
+                CREATE TABLE IF NOT EXISTS files (
+                    path TEXT PRIMARY KEY,
+                    dir TEXT NOT NULL,
+                    ext TEXT NOT NULL DEFAULT '',
+                    size INTEGER NOT NULL DEFAULT 0,
+                    mtime REAL NOT NULL DEFAULT 0,
+                    atime REAL NOT NULL DEFAULT 0,
+                    dev INTEGER NOT NULL DEFAULT 0,
+                    ino INTEGER NOT NULL DEFAULT 0,
+                    nlink INTEGER NOT NULL DEFAULT 1,
+                    is_link INTEGER NOT NULL DEFAULT 0
+                );
+                CREATE INDEX IF NOT EXISTS idx_files_dir ON files(dir);
+                CREATE INDEX IF NOT EXISTS idx_files_inode ON files(dev, ino);
+                """
+            )
+            self._conn = conn
+        return self._conn
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                try:
+                    self._conn.close()
+                except Exception:
+                    pass
+                self._conn = None
+
+    @staticmethod
+    def _prefix_range(path_text: str) -> Tuple[str, str]:
+        # "/a/b/" <= path < "/a/b0"：'0' 紧随 '/' 之后，可走主键索引做前缀查询。
+        base = path_text.rstrip("/")
+        return f"{base}/", f"{base}0"
+
+    def refresh(self, roots: List[Path], workers: int = 1, device_limit: int = 1) -> dict:
+        # 目录遍历（文件系统 IO）按根目录下的一级子目录放入线程池并发、按设备限流（单个大根目录也能并发）；
+        # 根目录本层在调用线程处理，SQLite 写入只在调用线程串行执行。
+        stats = {"dirs_total": 0, "dirs_rescanned": 0, "files_updated": 0, "dirs_removed": 0}
+        root_items: List[Tuple[str, Optional[int]]] = []
+        for root in roots or []:
+            root_text = Path(root).as_posix()
+            try:
+                device = int(os.stat(root_text).st_dev)
+            except OSError:
+                device = None
+            root_items.append((root_text, device))
+        with self._lock:
+            conn = self._connection()
+            known = {root_text: self._load_known_dirs(conn, root_text) for root_text, _ in root_items}
+            workers = max(1, int(workers or 1))
+            if workers <= 1:
+                for root_text, _ in root_items:
+                    with conn:
+                        for op in self._walk_root(root_text, *known[root_text]):
+                            self._apply_op(conn, op, stats)
+                return stats
+
+            ops: "queue.Queue" = queue.Queue(maxsize=256)
+            stop = threading.Event()
+            slots = {device: threading.BoundedSemaphore(max(1, int(device_limit or 1))) for _, device in root_items}
+
+            def _put(item: Any):
+                while not stop.is_set():
+                    try:
+                        ops.put(item, timeout=1)
+                        return
+                    except queue.Full:
+                        continue
+
+            def _produce(root_text: str, start_text: str, device: Optional[int]):
+                try:
+                    with slots[device]:
+                        for op in self._walk_root(start_text, *known[root_text], parent_text=root_text):
+                            if stop.is_set():
+                                return
+                            _put(op)
+                finally:
+                    _put(None)
+
+            tasks: List[Tuple[str, str, Optional[int]]] = []
+            pool: Optional[ThreadPoolExecutor] = None
+            futures: list = []
+            finished = 0
+            try:
+                with conn:
+                    for root_text, device in root_items:
+                        root_ops, subdirs, counted = self._scan_dir(root_text, None, *known[root_text])
+                        for op in root_ops:
+                            self._apply_op(conn, op, stats)
+                        stats["dirs_total"] += counted
+                        tasks.extend((root_text, subdir, device) for subdir in subdirs)
+                    if tasks:
+                        pool = ThreadPoolExecutor(max_workers=min(workers, len(tasks)), thread_name_prefix="diskcleaner-index")
+                        futures = [pool.submit(_produce, *task) for task in tasks]
+                    while finished < len(futures):
+                        op = ops.get()
+                        if op is None:
+                            finished += 1
+                            continue
+                        self._apply_op(conn, op, stats)
+            finally:
+                stop.set()
+                if pool is not None:
+                    pool.shutdown(wait=True)
+            for future in futures:
+                future.result()
+        return stats
+
+    def _load_known_dirs(self, conn: sqlite3.Connection, root_text: str) -> Tuple[Dict[str, int], Dict[str, List[str]]]:
+        low, high = self._prefix_range(root_text)
+        mtimes: Dict[str, int] = {}
+        children: Dict[str, List[str]] = {}
+        for path_text, parent_text, mtime_ns in conn.execute(
+            "SELECT path, parent, mtime_ns FROM dirs WHERE path = ? OR (path >= ? AND path < ?)",
+            (root_text, low, high),
+        ).fetchall():
+            mtimes[path_text] = int(mtime_ns)
+            if parent_text:
+                children.setdefault(parent_text, []).append(path_text)
+        return mtimes, children
+
+    @classmethod
+    def _walk_root(
+        cls,
+        root_text: str,
+        mtimes: Dict[str, int],
+        children: Dict[str, List[str]],
+        parent_text: Optional[str] = None,
+    ) -> Iterator[tuple]:
+        # 只访问文件系统与预读的目录快照，可在工作线程中执行；产出待串行写入的操作
+        dirs_total = 0
+        stack = [(root_text, parent_text)]
+        while stack:
+            dir_text, dir_parent = stack.pop()
+            ops, subdirs, counted = cls._scan_dir(dir_text, dir_parent, mtimes, children)
+            dirs_total += counted
+            yield from ops
+            for child in subdirs:
+                stack.append((child, dir_text))
+        yield "total", dirs_total
+
+    @staticmethod
+    def _scan_dir(
+        dir_text: str,
+        parent_text: Optional[str],
+        mtimes: Dict[str, int],
+        children: Dict[str, List[str]],
+    ) -> Tuple[List[tuple], List[str], int]:
+        # 处理单个目录：返回（待写入操作, 需继续遍历的子目录, 计入的目录数）；mtime 未变时沿用快照中的子目录
+        try:
+            dir_stat = os.stat(dir_text)
+        except OSError:
+            return [("remove", dir_text)], [], 0
+        if mtimes.get(dir_text) == int(dir_stat.st_mtime_ns):
+            return [], list(children.get(dir_text, [])), 1
+
+        file_rows = []
+        subdirs: List[str] = []
+        try:
+            with os.scandir(dir_text) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(Path(entry.path).as_posix())
+                            continue
+                        is_link = entry.is_symlink()
+                        if not is_link and not entry.is_file(follow_symlinks=False):
+                            continue
+                        entry_stat = entry.stat(follow_symlinks=True)
+                    except OSError:
+                        continue
+                    if is_link and not os.path.isfile(entry.path):
+                        continue
+                    entry_path = Path(entry.path).as_posix()
+                    file_rows.append((
+                        entry_path,
+                        dir_text,
+                        os.path.splitext(entry.name)[1].lower(),
+                        int(entry_stat.st_size),
+                        float(entry_stat.st_mtime),
+                        float(entry_stat.st_atime or entry_stat.st_mtime),
+                        int(entry_stat.st_dev),
+                        int(entry_stat.st_ino),
+                        int(getattr(entry_stat, "st_nlink", 1) or 1),
+                        1 if is_link else 0,
+                    ))
+        except OSError:
+            return [], [], 1
+
+        vanished = sorted(set(children.get(dir_text, [])) - set(subdirs))
+        return [("rescan", dir_text, parent_text, int(dir_stat.st_mtime_ns), file_rows, vanished)], subdirs, 1
+
+    def _apply_op(self, conn: sqlite3.Connection, op: tuple, stats: dict):
+        kind = op[0]
+        if kind == "total":
+            stats["dirs_total"] += op[1]
+            return
+        if kind == "remove":
+            stats["dirs_removed"] += self._remove_tree(conn, op[1])
+            return
+        _, dir_text, parent_text, mtime_ns, file_rows, vanished = op
+        stats["dirs_rescanned"] += 1
+        for path_text in vanished:
+            stats["dirs_removed"] += self._remove_tree(conn, path_text)
+        conn.execute("DELETE FROM files WHERE dir = ?", (dir_text,))
+        conn.executemany(
+            "INSERT OR REPLACE INTO files (path, dir, ext, size, mtime, atime, dev, ino, nlink, is_link) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            file_rows,
+        )
+        stats["files_updated"] += len(file_rows)
+        conn.execute(
+            "INSERT OR REPLACE INTO dirs (path, parent, mtime_ns, scanned_at) VALUES (?, ?, ?, ?)",
+            (dir_text, parent_text, mtime_ns, int(time.time())),
+        )
+
+    def _remove_tree(self, conn: sqlite3.Connection, path_text: str) -> int:
+        low, high = self._prefix_range(path_text)
+        removed = conn.execute(
+            "DELETE FROM dirs WHERE path = ? OR (path >= ? AND path < ?)",
+            (path_text, low, high),
+        ).rowcount
+        conn.execute("DELETE FROM files WHERE path = ? OR (path >= ? AND path < ?)", (path_text, low, high))
+        return int(removed or 0)
+
+    def forget(self, path: Path):
+        # 插件自身删除后同步索引，并让父目录在下一次刷新时重新列举。
+        path_text = Path(path).as_posix()
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                self._remove_tree(conn, path_text)
+                conn.execute("UPDATE dirs SET mtime_ns = -1 WHERE path = ?", (Path(path_text).parent.as_posix(),))
+
+    def count_files(self, root: Path) -> int:
+        low, high = self._prefix_range(Path(root).as_posix())
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT COUNT(1) FROM files WHERE path >= ? AND path < ?", (low, high)
+            ).fetchone()
+        return int(row[0] if row else 0)
+
+    def iter_files(self, root: Path, exts: Optional[set] = None) -> Iterator[Tuple[str, IndexedStat]]:
+        low, high = self._prefix_range(Path(root).as_posix())
+        sql = "SELECT path, size, atime, mtime, dev, ino, nlink FROM files WHERE path >= ? AND path < ?"
+        params: List[Any] = [low, high]
+        if exts:
+            sql += f" AND ext IN ({','.join('?' for _ in exts)})"
+            params.extend(sorted(exts))
+        with self._lock:
+            rows = self._connection().execute(sql, params).fetchall()
+        for path_text, size, atime, mtime, dev, ino, nlink in rows:
+            yield path_text, IndexedStat(int(size), float(atime), float(mtime), int(dev), int(ino), int(nlink))
+
+    def paths_by_inode(self, dev: int, ino: int) -> List[str]:
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT path FROM files WHERE dev = ? AND ino = ? AND is_link = 0", (int(dev), int(ino))
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def subtree_inodes(self, path: Path) -> Optional[List[Tuple[str, int, int, int, int]]]:
+        path_text = Path(path).as_posix()
+        low, high = self._prefix_range(path_text)
+        with self._lock:
+            conn = self._connection()
+            known = conn.execute("SELECT 1 FROM dirs WHERE path = ?", (path_text,)).fetchone()
+            if not known:
+                return None
+            rows = conn.execute(
+                "SELECT path, size, dev, ino, nlink FROM files WHERE path >= ? AND path < ? AND is_link = 0",
+                (low, high),
+            ).fetchall()
+        return [(row[0], int(row[1]), int(row[2]), int(row[3]), int(row[4])) for row in rows]
+
+
+class PathPolicy:
+    # 路径策略：配置在 init_plugin 中编译一次，扫描/删除热路径只做匹配。
+    # 关键词合并为单个正则，根目录按路径分段构建前缀树，扩展名为冻结集合。
+    _ROOT_TRIE_CACHE_LIMIT = 64
+
+    def __init__(self, block_keywords: List[str], block_paths: List[Path], media_exts: set, scrape_exts: set):
+        self._keyword_lookup: Dict[str, str] = {}
+        for keyword in block_keywords or []:
+            key = str(keyword or "").strip().lower()
+            if key:
+                self._keyword_lookup.setdefault(key, keyword)
+        self._keyword_pattern = re.compile(
+            "|".join(re.escape(key) for key in sorted(self._keyword_lookup, key=len, reverse=True))
+        ) if self._keyword_lookup else None
+        self._block_trie = self._build_trie(block_paths)
+        self.media_exts = frozenset(media_exts or ())
+        self.scrape_exts = frozenset(scrape_exts or ())
+        self._root_tries: Dict[Tuple[str, ...], dict] = {}
+
+    @staticmethod
+    def _build_trie(roots: List[Path]) -> dict:
+        trie: dict = {}
+        for root in roots or []:
+            parts = Path(root).parts
+            if not parts:
+                continue
+            node = trie
+            for part in parts:
+                node = node.setdefault(part, {})
+            node[None] = True
+        return trie
+
+    @staticmethod
+    def _trie_contains(trie: dict, path: Path) -> bool:
+        if not trie:
+            return False
+        node = trie
+        for part in Path(path).parts:
+            if None in node:
+                return True
+            node = node.get(part)
+            if node is None:
+                return False
+        return None in node
+
+    def keyword_hit(self, path: Any) -> Optional[str]:
+        if not path or self._keyword_pattern is None:
+            return None
+        if isinstance(path, Path):
+            path_text = path.as_posix()
+        else:
+            try:
+                path_text = Path(str(path)).as_posix()
+            except Exception:
+                path_text = str(path)
+        match = self._keyword_pattern.search(path_text.lower())
+        return self._keyword_lookup.get(match.group(0)) if match else None
+
+    def in_block_paths(self, path: Path) -> bool:
+        return self._trie_contains(self._block_trie, path)
+
+    def in_roots(self, path: Path, roots: List[Path]) -> bool:
+        if not path or not roots:
+            return False
+        key = tuple(Path(root).as_posix() for root in roots)
+        trie = self._root_tries.get(key)
+        if trie is None:
+            if len(self._root_tries) >= self._ROOT_TRIE_CACHE_LIMIT:
+                self._root_tries.clear()
+            trie = self._build_trie(roots)
+            self._root_tries[key] = trie
+        return self._trie_contains(trie, path)
+
+
 class DiskCleaner(_PluginBase):
     # 插件信息
     plugin_name = "磁盘清理"
@@ -67,6 +454,9 @@ class DiskCleaner(_PluginBase):
     _download_threshold_value = 100.0
     _library_threshold_mode = "size"
     _library_threshold_value = 100.0
+    # 清理目标（与阈值同单位，0 表示清理到刚好脱离阈值）
+    _download_target_value = 0.0
+    _library_target_value = 0.0
 
     # 下载器策略
     _downloaders: List[str] = []
@@ -92,16 +482,45 @@ class DiskCleaner(_PluginBase):
     _path_allowlist: List[str] = []
     _path_blocklist: List[str] = []
     _path_block_keywords: List[str] = []
+    _path_policy: Optional[PathPolicy] = None
+    _SCRAPE_EXTS = frozenset({".nfo", ".jpg", ".jpeg", ".png", ".webp", ".bmp", ".tbn", ".txt"})
     _media_path_mapping: List[str] = []
     _media_path_rules: List[Tuple[str, str]] = []
     _current_run_freed_bytes = 0
     _current_run_empty_dirs_deleted: Dict[str, bool] = {}
     _current_run_no_media_dirs_deleted: Dict[str, bool] = {}
     _current_run_no_media_checks = 0
+    _dir_media_counts: Optional[Dict[str, int]] = None
+    _dir_media_scanned: Dict[str, bool] = {}
+    _no_media_sweep_queue: Optional[Dict[str, Tuple[Path, List[Path]]]] = None
+    _dir_listing_cache: Optional[Dict[str, Optional[List[Tuple[str, bool, bool, bool]]]]] = None
     _current_run_dir_cleanup_dryrun_skips = 0
     _library_scope_filter_notice_logged = False
     _last_library_scan_summary = ""
     _last_library_scan_stats: Dict[str, int] = {}
+    # 空间统计：按设备(st_dev)缓存测量结果，测量之间按已删除字节数预测剩余空间
+    _usage_cache_ttl = 30
+    _device_usage_cache: Optional[Dict[int, dict]] = None
+    _path_device_cache: Optional[Dict[str, int]] = None
+    _usage_projected_freed: Optional[Dict[int, int]] = None
+    # 下载器任务快照：每轮每个下载器只拉取一次，删除成功后就地剔除
+    _torrent_snapshots: Optional[Dict[str, dict]] = None
+    # 下载器任务副本：qB 按 sync/maindata rid 增量同步，TR 仅请求所需字段；持久化在插件数据中
+    _downloader_incremental_sync = True
+    _downloader_timeout = 30
+    _torrent_replicas: Optional[Dict[str, dict]] = None
+    _torrent_replicas_dirty = False
+    _QB_REPLICA_FIELDS = ("name", "state", "progress", "completion_on")
+    _TR_REPLICA_FIELDS = ["id", "hashString", "name", "status", "percentDone", "doneDate"]
+    _TR_STATUS_NAMES = (
+        "stopped", "check_pending", "checking", "download_pending", "downloading", "seed_pending", "seeding",
+    )
+    _TR_RECENTLY_ACTIVE_SECONDS = 60
+    # 删种队列：任务周期内先排队，按(下载器, 是否删文件)批量提交；None 表示立即删除
+    _torrent_delete_queue: Optional[List[dict]] = None
+    _torrent_delete_batch_size = 50
+    # 整理/下载记录删除队列：本轮结束时在一个事务内批量删除
+    _history_delete_queue: Optional[dict] = None
 
     # 媒体库范围与刷新
     _refresh_mediaserver = False
@@ -111,10 +530,35 @@ class DiskCleaner(_PluginBase):
     _media_libraries: List[str] = []
     _library_scope_cache: Optional[List[Path]] = None
     _prefer_playback_history = True
+    _library_index_enabled = True
+    _library_scan_workers = 1
+    _library_scan_device_limit = 1
+    _library_index: Optional[LibraryFileIndex] = None
+    _library_index_roots: Optional[set] = None
+    _hardlink_inode_map: Optional[Dict[Tuple[int, int], List[str]]] = None
+    _hardlink_inode_roots: Optional[Dict[str, set]] = None
     _enable_retry_queue = True
     _retry_max_attempts = 3
     _retry_interval_minutes = 30
     _retry_batch_size = 5
+    # 失败补偿存储：按 retry_key 建索引，到期时间用小顶堆维护；本轮结束统一落盘
+    _retry_store: Optional[Dict[str, dict]] = None
+    _retry_due_heap: Optional[List[Tuple[float, str]]] = None
+    _retry_store_dirty = False
+    _retry_store_limit = 500
+    _retry_backoff_cap_minutes = 1440
+    # 运行记录：追加写 JSONL，汇总指标（最近 _run_history_keep 轮）增量维护在 run_rollups 中
+    _run_history_keep = 200
+    # 看板快照：任务结束与后台定时刷新时生成，打开页面只渲染快照，不触碰磁盘与下载器
+    _dashboard_snapshot: Optional[dict] = None
+    _dashboard_refresh_minutes = 30
+    # 日志尾部读取：按块倒读 + (inode, offset) 索引，重复轮询只扫描新追加的字节
+    _log_tail_index: Optional[dict] = None
+    _log_tail_lock = threading.Lock()
+    _log_tail_keep = 500
+    _log_tail_since_limit = 5000  # 指定 since 时允许超出缓存行数，早于缓存的部分回读日志文件
+    _log_tail_forward_limit = 64 * 1024 * 1024
+    _LOG_TS_PATTERN = re.compile(r"(\d{4}-\d{2}-\d{2})[ T](\d{2}:\d{2}:\d{2})")
 
     # 数据操作
     _transfer_oper: Optional[TransferHistoryOper] = None
@@ -122,7 +566,26 @@ class DiskCleaner(_PluginBase):
     _mediaserver_oper: Optional[MediaServerOper] = None
     _mediaserver_chain: Optional[MediaServerChain] = None
     _playback_ts_cache: Dict[str, int] = {}
-    _tv_end_state_cache: Dict[str, bool] = {}
+    _playback_index: Optional[dict] = None
+    _playback_index_dirty = False
+    _playback_index_refresh_hours = 1
+    # 增量刷新：按最近播放时间倒序分页，读到水位线（减去重叠窗口）之前即停止
+    _playback_incremental_page = 200
+    _playback_incremental_max_pages = 50
+    _playback_watermark_overlap = 3600
+    _tv_end_state_cache: Optional[Dict[str, dict]] = None
+    _tv_end_state_dirty = False
+    # TMDB 完结状态缓存有效期（秒）：已完结 / 连载中 / 查询失败
+    _tv_end_state_ttl = {"ended": 30 * 86400, "returning": 86400, "error": 3600}
+    _tv_end_state_lock = threading.Lock()
+    _tmdb_prefetch_workers = 4
+    _tmdb_prefetch_rate = 10.0  # 每秒最多发起的 TMDB 查询数
+    _transfer_dest_map: Optional[Dict[str, Any]] = None
+    _transfer_dest_map_keys: Optional[Dict[Any, List[str]]] = None  # 记录 id -> 指向它的路径键
+    _transfer_dest_map_failed = False
+    _transfer_history_stream: Optional[Iterator[Any]] = None
+    _db_fallback_logged = False
+    _transfer_history_stream_stats: Dict[str, int] = {}
 
     def init_plugin(self, config: dict = None):
         self.stop_service()
@@ -132,9 +595,14 @@ class DiskCleaner(_PluginBase):
         self._mediaserver_oper = MediaServerOper()
         self._mediaserver_chain = None
         self._playback_ts_cache = {}
-        self._tv_end_state_cache = {}
         self._library_scope_cache = None
         self._last_library_scan_stats = {}
+        self._library_index_roots = None
+        self._hardlink_inode_map = None
+        self._hardlink_inode_roots = None
+        self._transfer_dest_map = None
+        self._transfer_dest_map_keys = None
+        self._transfer_dest_map_failed = False
 
         if config:
             self._enabled = bool(config.get("enabled", False))
@@ -160,6 +628,14 @@ class DiskCleaner(_PluginBase):
                 config.get("library_threshold_value"),
                 self._library_threshold_mode,
             )
+            self._download_target_value = self._parse_target_value(
+                config.get("download_target_value"),
+                self._download_threshold_mode,
+            )
+            self._library_target_value = self._parse_target_value(
+                config.get("library_target_value"),
+                self._library_threshold_mode,
+            )
 
             self._downloaders = config.get("downloaders") or []
             self._seeding_days = int(self._safe_float(config.get("seeding_days"), 15))
@@ -194,12 +670,19 @@ class DiskCleaner(_PluginBase):
             self._media_servers = config.get("media_servers") or config.get("refresh_servers") or []
             self._media_libraries = config.get("media_libraries") or []
             self._prefer_playback_history = bool(config.get("prefer_playback_history", True))
+            self._library_index_enabled = bool(config.get("library_index_enabled", True))
+            self._downloader_incremental_sync = bool(config.get("downloader_incremental_sync", True))
+            self._downloader_timeout = int(self._safe_float(config.get("downloader_timeout"), 30))
+            self._library_scan_workers = int(self._safe_float(config.get("library_scan_workers"), 1))
+            self._library_scan_device_limit = int(self._safe_float(config.get("library_scan_device_limit"), 1))
             self._enable_retry_queue = bool(config.get("enable_retry_queue", True))
             self._retry_max_attempts = int(self._safe_float(config.get("retry_max_attempts"), 3))
             self._retry_interval_minutes = int(self._safe_float(config.get("retry_interval_minutes"), 30))
             self._retry_batch_size = int(self._safe_float(config.get("retry_batch_size"), 5))
+            self._dashboard_refresh_minutes = int(self._safe_float(config.get("dashboard_refresh_minutes"), 30))
 
         self._normalize_config()
+        self._path_policy = self._compile_path_policy()
         if config:
             normalized_download_text = self._format_threshold_value(
                 self._download_threshold_value,
@@ -221,8 +704,18 @@ class DiskCleaner(_PluginBase):
                 self.__update_config()
 
         if self._clear_history:
-            for key in ["history", "run_history", "last_run_at", "daily_freed", "latest_usage", "retry_deadletter"]:
+            for key in [
+                "history", "run_history", "run_rollups", "last_run_at", "daily_freed",
+                "latest_usage", "retry_deadletter", "dashboard_snapshot",
+            ]:
                 self.del_data(key=key)
+            self._dashboard_snapshot = None
+            run_log_path = self._run_log_path()
+            if run_log_path and run_log_path.exists():
+                try:
+                    run_log_path.unlink()
+                except Exception as err:
+                    logger.warning(f"{self.plugin_name}清理运行记录文件失败：{err}")
             self._clear_history = False
             logger.info(f"{self.plugin_name}已清空历史数据")
             self.__update_config()
@@ -241,6 +734,14 @@ class DiskCleaner(_PluginBase):
                 except Exception as err:
                     logger.error(f"{self.plugin_name}定时任务配置错误：{err}")
 
+            if self._enabled and self._dashboard_refresh_minutes > 0:
+                self._scheduler.add_job(
+                    func=self._background_refresh_dashboard,
+                    trigger="interval",
+                    minutes=self._dashboard_refresh_minutes,
+                    name=f"{self.plugin_name}-看板刷新",
+                )
+
             if self._onlyonce:
                 logger.info(f"{self.plugin_name}服务启动，立即运行一次")
                 self._scheduler.add_job(
@@ -311,12 +812,22 @@ class DiskCleaner(_PluginBase):
                 "summary": "手动清理",
                 "description": "手动触发一次清理任务",
             },
+            {
+                "path": "/refresh_dashboard",
+                "endpoint": self.refresh_dashboard,
+                "methods": ["GET"],
+                "summary": "刷新看板数据",
+                "description": "立即重新统计空间与运行记录，更新插件页面快照",
+            },
             {
                 "path": "/logs",
                 "endpoint": self._tail_plugin_logs,
                 "methods": ["GET"],
                 "summary": "查看磁盘清理日志",
-                "description": "返回最近磁盘清理相关日志内容",
+                "description": (
+                    "返回最近磁盘清理相关日志内容，支持 limit（条数，默认 200，最多 500；"
+                    "指定 since 时最多 5000）与 since（起始时间，早于缓存范围时回读日志文件）参数"
+                ),
             },
         ]
 
@@ -324,6 +835,67 @@ class DiskCleaner(_PluginBase):
         self.save_data("risk_notice_acked", True)
         return {"success": True}
 
+    def refresh_dashboard(self):
+        if not self._lock.acquire(blocking=False):
+            return {"success": False, "message": "任务正在执行中，结束后会自动刷新看板"}
+        try:
+            snapshot = self._refresh_dashboard_snapshot()
+        finally:
+            self._lock.release()
+        if not snapshot:
+            return {"success": False, "message": "看板数据刷新失败，请查看日志"}
+        return {"success": True, "message": f"看板数据已刷新（{snapshot.get('generated_at')}）"}
+
+    def _background_refresh_dashboard(self):
+        # 清理任务执行中跳过，任务结束时会自行刷新；刷新期间持有任务锁，避免与清理任务交错
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            self._refresh_dashboard_snapshot()
+        finally:
+            self._lock.release()
+
+    def _build_dashboard_snapshot(self) -> dict:
+        # 看板只读测量，不提交排队的删种
+        usage = self._measure_monitor_usage()
+        run_stats = self._load_run_stats()
+        if run_stats:
+            recent_runs = self._collect_run_history(limit=10)
+        else:
+            all_runs = self._collect_run_history()
+            recent_runs = all_runs[:10]
+            run_stats = self._build_run_stats(all_runs)
+        return {
+            "generated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "usage": usage or {},
+            "run_stats": run_stats,
+            "recent_runs": recent_runs,
+            "daily_freed_bytes": self._get_daily_freed_bytes(),
+        }
+
+    def _refresh_dashboard_snapshot(self) -> Optional[dict]:
+        try:
+            snapshot = self._sanitize_for_json(self._build_dashboard_snapshot())
+        except Exception as err:
+            logger.warning(f"{self.plugin_name}生成看板快照失败：{err}")
+            return None
+        self._dashboard_snapshot = snapshot
+        try:
+            self.save_data("dashboard_snapshot", snapshot)
+        except Exception as err:
+            logger.warning(f"{self.plugin_name}保存看板快照失败：{err}")
+        return snapshot
+
+    def _get_dashboard_snapshot(self) -> dict:
+        if self._dashboard_snapshot is None:
+            stored = self.get_data("dashboard_snapshot")
+            if isinstance(stored, dict) and stored.get("generated_at"):
+                self._dashboard_snapshot = stored
+        if self._dashboard_snapshot is None:
+            # 首次打开且尚无快照时才现场统计一次
+            return self._refresh_dashboard_snapshot() or self._build_dashboard_snapshot()
+        return self._dashboard_snapshot
+
     def _trigger_manual_clean(self):
         if self._lock.locked():
             return {"success": False, "message": "任务正在执行中，请稍后重试"}
@@ -341,25 +913,183 @@ class DiskCleaner(_PluginBase):
         ).start()
         return {"success": True, "message": "已触发手动清理任务，请稍后刷新查看结果"}
 
-    def _tail_plugin_logs(self):
+    def _tail_plugin_logs(self, limit: int = 200, since: Optional[str] = None):
         log_file = Path(settings.LOG_PATH) / "moviepilot.log"
         if not log_file.exists():
             return PlainTextResponse("日志文件不存在", status_code=404)
 
-        keywords = [self.plugin_name, self.__class__.__name__, "diskcleaner", "DiskCleaner"]
-        lines = deque(maxlen=200)
+        since_key = self._log_since_key(since)
+        max_limit = self._log_tail_since_limit if since_key else self._log_tail_keep
+        limit = max(1, min(max_limit, int(self._safe_float(limit, 200))))
         try:
-            with log_file.open("r", encoding="utf-8", errors="ignore") as fp:
-                for line in fp:
-                    if any((kw and kw in line) for kw in keywords):
-                        lines.append(line.rstrip("\n"))
+            with self._log_tail_lock:
+                lines = self._refresh_log_tail(log_file)
         except Exception as err:
             return PlainTextResponse(f"读取日志失败：{err}", status_code=500)
 
+        if since_key:
+            filtered = self._filter_log_lines_since(lines, since_key)
+            if len(filtered) < limit and len(lines) >= self._log_tail_keep and self._log_oldest_key(lines) > since_key:
+                # 缓存只保留最近若干行，起始时间早于缓存时改为从文件末尾倒读到 since 为止
+                try:
+                    lines, _ = self._scan_log_backward(log_file, log_file.stat().st_size, limit, since_key=since_key)
+                except Exception as err:
+                    return PlainTextResponse(f"读取日志失败：{err}", status_code=500)
+                filtered = self._filter_log_lines_since(lines, since_key)
+            lines = filtered
+        lines = lines[-limit:]
         if not lines:
             return PlainTextResponse("暂无磁盘清理相关日志")
         return PlainTextResponse("\n".join(lines))
 
+    def _log_line_matches(self, line: str) -> bool:
+        keywords = [self.plugin_name, self.__class__.__name__, "diskcleaner", "DiskCleaner"]
+        return any((kw and kw in line) for kw in keywords)
+
+    def _log_tail_index_path(self) -> Optional[Path]:
+        try:
+            return Path(self.get_data_path()) / "log_tail_index.json"
+        except Exception:
+            return None
+
+    def _load_log_tail_index(self) -> dict:
+        if self._log_tail_index is None:
+            index: dict = {}
+            index_path = self._log_tail_index_path()
+            if index_path and index_path.exists():
+                try:
+                    index = json.loads(index_path.read_text(encoding="utf-8")) or {}
+                except Exception:
+                    index = {}
+            self._log_tail_index = index if isinstance(index, dict) else {}
+        return self._log_tail_index
+
+    def _save_log_tail_index(self, index: dict):
+        self._log_tail_index = index
+        index_path = self._log_tail_index_path()
+        if not index_path:
+            return
+        try:
+            index_path.parent.mkdir(parents=True, exist_ok=True)
+            index_path.write_text(json.dumps(index, ensure_ascii=False), encoding="utf-8")
+        except Exception as err:
+            logger.debug(f"{self.plugin_name}保存日志索引失败：{err}")
+
+    def _refresh_log_tail(self, log_file: Path) -> List[str]:
+        stat = log_file.stat()
+        index = self._load_log_tail_index()
+        offset = int(index.get("offset", 0) or 0)
+        same_file = index.get("inode") == stat.st_ino and index.get("path") == log_file.as_posix()
+        # 同一文件且未截断：只扫描索引之后新追加的字节；否则（首次/轮转/截断/追加过多）从末尾倒读
+        if same_file and offset <= stat.st_size and stat.st_size - offset <= self._log_tail_forward_limit:
+            if stat.st_size == offset:
+                return list(index.get("lines") or [])
+            new_lines, offset = self._scan_log_forward(log_file, offset, stat.st_size)
+            lines = (list(index.get("lines") or []) + new_lines)[-self._log_tail_keep:]
+        else:
+            lines, offset = self._scan_log_backward(log_file, stat.st_size, self._log_tail_keep)
+        self._save_log_tail_index({
+            "path": log_file.as_posix(),
+            "inode": stat.st_ino,
+            "offset": offset,
+            "lines": lines,
+        })
+        return lines
+
+    def _scan_log_forward(self, log_file: Path, start: int, end: int) -> Tuple[List[str], int]:
+        with log_file.open("rb") as handle:
+            handle.seek(start)
+            data = handle.read(end - start)
+        # 末尾未换行的半行留到下次再读
+        last_newline = data.rfind(b"\n")
+        if last_newline < 0:
+            return [], start
+        lines = []
+        for raw in data[:last_newline].split(b"\n"):
+            line = raw.decode("utf-8", errors="ignore").rstrip("\r")
+            if self._log_line_matches(line):
+                lines.append(line)
+        return lines[-self._log_tail_keep:], start + last_newline + 1
+
+    def _scan_log_backward(self, log_file: Path, end: int, keep: int, since_key: str = "") -> Tuple[List[str], int]:
+        # since_key 非空时读到早于该时间的带时间戳行即停止
+        matched: List[str] = []
+        reached = False
+        with log_file.open("rb") as handle:
+            handle.seek(max(0, end - 1))
+            # 末尾未换行的半行不计入，偏移停在最后一个换行之后
+            tail_end = end
+            if end > 0 and handle.read(1) != b"\n":
+                position = end
+                tail_end = 0
+                while position > 0:
+                    step = min(65536, position)
+                    position -= step
+                    handle.seek(position)
+                    chunk = handle.read(step)
+                    index = chunk.rfind(b"\n")
+                    if index >= 0:
+                        tail_end = position + index + 1
+                        break
+            position = tail_end
+            remainder = b""
+            while position > 0 and len(matched) < keep and not reached:
+                step = min(65536, position)
+                position -= step
+                handle.seek(position)
+                chunk = handle.read(step) + remainder
+                parts = chunk.split(b"\n")
+                # 块首可能是被截断的半行，留到下一块拼接
+                remainder = parts[0] if position > 0 else b""
+                body = parts[1:] if position > 0 else parts
+                for raw in reversed(body):
+                    if not raw:
+                        continue
+                    line = raw.decode("utf-8", errors="ignore").rstrip("\r")
+                    if self._log_line_matches(line):
+                        matched.append(line)
+                        if since_key and self._log_oldest_key([line]) < since_key:
+                            reached = True
+                            break
+                        if len(matched) >= keep:
+                            break
+        matched.reverse()
+        return matched, tail_end
+
+    @classmethod
+    def _log_since_key(cls, since: Optional[str]) -> str:
+        text = str(since or "").strip()
+        if not text:
+            return ""
+        matched = cls._LOG_TS_PATTERN.search(text)
+        if matched:
+            return f"{matched.group(1)} {matched.group(2)}"
+        if re.fullmatch(r"\d{4}-\d{2}-\d{2}", text):
+            return f"{text} 00:00:00"
+        return ""
+
+    @classmethod
+    def _log_oldest_key(cls, lines: List[str]) -> str:
+        # 返回首个带时间戳行的时间；均无时间戳时返回极大值，视为不早于任何时间
+        for line in lines:
+            matched = cls._LOG_TS_PATTERN.search(line)
+            if matched:
+                return f"{matched.group(1)} {matched.group(2)}"
+        return "\uffff"
+
+    @classmethod
+    def _filter_log_lines_since(cls, lines: List[str], since_key: str) -> List[str]:
+        # 无时间戳的续行（如异常堆栈）跟随上一条带时间戳的行
+        result: List[str] = []
+        keep = False
+        for line in lines:
+            matched = cls._LOG_TS_PATTERN.search(line)
+            if matched:
+                keep = f"{matched.group(1)} {matched.group(2)}" >= since_key
+            if keep:
+                result.append(line)
+        return result
+
     def get_form(self) -> Tuple[List[dict], Dict[str, Any]]:
         downloader_items = [
             {"title": conf.name, "value": conf.name}
@@ -480,6 +1210,7 @@ class DiskCleaner(_PluginBase):
                         "content": [{"component": "VSelect", "props": {"density": "compact", "hideDetails": True, "model": "library_threshold_mode", "label": "媒体库告警方式", "items": [{"title": "按剩余容量（如 100G）", "value": "size"}, {"title": "按剩余比例（如 10%）", "value": "percent"}]}}],
                     },
                     {"component": "VCol", "props": {"cols": 12, "md": 4}, "content": [{"component": "VTextField", "props": {"density": "compact", "hideDetails": True, "model": "library_threshold_value", "label": "媒体库告警阈值", "placeholder": "支持 100G 或 10%"}}]},
+                    {"component": "VCol", "props": {"cols": 12, "md": 4}, "content": [{"component": "VTextField", "props": {"density": "compact", "hideDetails": True, "model": "library_target_value", "label": "媒体库清理目标(留空=阈值)", "placeholder": "如 150G 或 15%"}}]},
                     {
                         "component": "VCol",
                         "props": {"cols": 12, "md": 6},
@@ -492,6 +1223,9 @@ class DiskCleaner(_PluginBase):
                     },
                     {"component": "VCol", "props": {"cols": 12, "md": 6}, "content": [{"component": "VTextField", "props": {"density": "compact", "hideDetails": True, "model": "protect_recent_days", "label": "近期入库保护(天)"}}]},
                     {"component": "VCol", "props": {"cols": 12, "md": 6}, "content": [{"component": "VSwitch", "props": {"density": "compact", "model": "prefer_playback_history", "label": "优先按播放历史判定老化"}}]},
+                    {"component": "VCol", "props": {"cols": 12, "md": 6}, "content": [{"component": "VSwitch", "props": {"density": "compact", "model": "library_index_enabled", "label": "启用媒体库文件索引(增量扫描)"}}]},
+                    {"component": "VCol", "props": {"cols": 12, "md": 3}, "content": [{"component": "VTextField", "props": {"density": "compact", "hideDetails": True, "model": "library_scan_workers", "label": "媒体库并发扫描线程"}}]},
+                    {"component": "VCol", "props": {"cols": 12, "md": 3}, "content": [{"component": "VTextField", "props": {"density": "compact", "hideDetails": True, "model": "library_scan_device_limit", "label": "单设备并发上限"}}]},
                     {
                         "component": "VCol",
                         "props": {"cols": 12, "md": 6},
@@ -564,6 +1298,8 @@ class DiskCleaner(_PluginBase):
                     {"component": "VCol", "props": {"cols": 12, "md": 4}, "content": [{"component": "VSwitch", "props": {"density": "compact", "model": "clean_downloader_seed", "label": "删除做种"}}]},
                     {"component": "VCol", "props": {"cols": 12, "md": 4}, "content": [{"component": "VSwitch", "props": {"density": "compact", "model": "delete_downloader_files", "label": "同步删除文件"}}]},
                     {"component": "VCol", "props": {"cols": 12, "md": 4}, "content": [{"component": "VSwitch", "props": {"density": "compact", "model": "media_flow_seed_check", "label": "媒体流程删种校验做种时长"}}]},
+                    {"component": "VCol", "props": {"cols": 12, "md": 4}, "content": [{"component": "VSwitch", "props": {"density": "compact", "model": "downloader_incremental_sync", "label": "下载器任务增量同步"}}]},
+                    {"component": "VCol", "props": {"cols": 12, "md": 4}, "content": [{"component": "VTextField", "props": {"density": "compact", "hideDetails": True, "model": "downloader_timeout", "label": "单个下载器读取超时(秒，0=不限)"}}]},
                     {"component": "VCol", "props": {"cols": 12, "md": 4}, "content": [{"component": "VSwitch", "props": {"density": "compact", "model": "monitor_download", "label": "启用下载目录空间告警"}}]},
                     {
                         "component": "VCol",
@@ -571,6 +1307,7 @@ class DiskCleaner(_PluginBase):
                         "content": [{"component": "VSelect", "props": {"density": "compact", "hideDetails": True, "model": "download_threshold_mode", "label": "下载目录告警方式", "items": [{"title": "按剩余容量（如 100G）", "value": "size"}, {"title": "按剩余比例（如 10%）", "value": "percent"}]}}],
                     },
                     {"component": "VCol", "props": {"cols": 12, "md": 4}, "content": [{"component": "VTextField", "props": {"density": "compact", "hideDetails": True, "model": "download_threshold_value", "label": "下载目录告警阈值", "placeholder": "支持 100G 或 10%"}}]},
+                    {"component": "VCol", "props": {"cols": 12, "md": 4}, "content": [{"component": "VTextField", "props": {"density": "compact", "hideDetails": True, "model": "download_target_value", "label": "下载目录清理目标(留空=阈值)", "placeholder": "如 150G 或 15%"}}]},
                     {"component": "VCol", "props": {"cols": 12, "md": 4}, "content": [{"component": "VSwitch", "props": {"density": "compact", "model": "monitor_downloader", "label": "监听下载器做种时长(独立触发)"}}]},
                     {"component": "VCol", "props": {"cols": 12, "md": 4}, "content": [{"component": "VTextField", "props": {"density": "compact", "hideDetails": True, "model": "seeding_days", "label": "做种时长阈值(天，按完成时间计算)"}}]},
                     {
@@ -610,6 +1347,7 @@ class DiskCleaner(_PluginBase):
                     {"component": "VCol", "props": {"cols": 12, "md": 4}, "content": [{"component": "VTextField", "props": {"density": "compact", "hideDetails": True, "model": "retry_max_attempts", "label": "最大重试次数"}}]},
                     {"component": "VCol", "props": {"cols": 12, "md": 4}, "content": [{"component": "VTextField", "props": {"density": "compact", "hideDetails": True, "model": "retry_interval_minutes", "label": "重试间隔(分钟)"}}]},
                     {"component": "VCol", "props": {"cols": 12, "md": 4}, "content": [{"component": "VTextField", "props": {"density": "compact", "hideDetails": True, "model": "retry_batch_size", "label": "单轮补偿处理数"}}]},
+                    {"component": "VCol", "props": {"cols": 12, "md": 4}, "content": [{"component": "VTextField", "props": {"density": "compact", "hideDetails": True, "model": "dashboard_refresh_minutes", "label": "看板后台刷新间隔(分钟，0=仅任务后刷新)"}}]},
                 ],
             },
         ]
@@ -1044,8 +1782,10 @@ class DiskCleaner(_PluginBase):
             "monitor_downloader": False,
             "download_threshold_mode": "size",
             "download_threshold_value": "100G",
+            "download_target_value": "",
             "library_threshold_mode": "size",
             "library_threshold_value": "100G",
+            "library_target_value": "",
             "media_servers": [],
             "media_libraries": [],
             "downloaders": [],
@@ -1066,6 +1806,11 @@ class DiskCleaner(_PluginBase):
             "clean_empty_media_dirs": True,
             "empty_media_exts": "mp4,mkv,ts,iso,rmvb,avi,mov,mpeg,mpg,wmv,3gp,asf,m4v,flv,m2ts,tp,f4v",
             "prefer_playback_history": True,
+            "library_index_enabled": True,
+            "downloader_incremental_sync": True,
+            "downloader_timeout": 30,
+            "library_scan_workers": 1,
+            "library_scan_device_limit": 1,
             "media_path_mapping": "",
             "path_allowlist": "",
             "path_blocklist": "",
@@ -1077,19 +1822,21 @@ class DiskCleaner(_PluginBase):
             "retry_max_attempts": 3,
             "retry_interval_minutes": 30,
             "retry_batch_size": 5,
+            "dashboard_refresh_minutes": 30,
             "risk_notice_dialog": False,
             "risk_notice_countdown": 0,
         }
 
     def get_page(self) -> List[dict]:
         manual_clean_event_api = f"plugin/{self.__class__.__name__}/clean"
-        usage = self._collect_monitor_usage()
-        all_runs = self._collect_run_history()
-        recent_runs = all_runs[:10]
-        run_stats = self._build_run_stats(all_runs)
+        refresh_dashboard_event_api = f"plugin/{self.__class__.__name__}/refresh_dashboard"
+        snapshot = self._get_dashboard_snapshot()
+        usage = snapshot.get("usage") or {}
+        run_stats = snapshot.get("run_stats") or {}
+        recent_runs = snapshot.get("recent_runs") or []
         usage_download = usage.get("download", {})
         usage_library = usage.get("library", {})
-        daily_freed_bytes = self._get_daily_freed_bytes()
+        daily_freed_bytes = int(snapshot.get("daily_freed_bytes", 0) or 0)
         daily_limit_bytes = int(self._max_gb_per_day * (1024 ** 3)) if self._max_gb_per_day > 0 else 0
         daily_percent = min(100, int(daily_freed_bytes * 100 / daily_limit_bytes)) if daily_limit_bytes else 0
         last_run_text = str(run_stats.get("last_run_at", "-") or "-")
@@ -1305,6 +2052,30 @@ class DiskCleaner(_PluginBase):
                                 "props": {"class": "text-caption text-medium-emphasis"},
                                 "text": f"流程：{self._trigger_flow_label()} | 冷却：{self._cooldown_minutes} 分钟 | 单轮：{self._max_delete_items} 条 / {self._max_gb_per_run} GB",
                             },
+                            {
+                                "component": "div",
+                                "props": {"class": "text-caption text-medium-emphasis"},
+                                "content": [
+                                    {"component": "span", "text": f"数据更新于 {snapshot.get('generated_at') or '-'} "},
+                                    {
+                                        "component": "VBtn",
+                                        "props": {
+                                            "id": "diskcleaner-refresh-dashboard-btn",
+                                            "size": "x-small",
+                                            "variant": "text",
+                                            "color": "primary",
+                                        },
+                                        "events": {
+                                            "click": {
+                                                "api": refresh_dashboard_event_api,
+                                                "method": "GET",
+                                                "params": {"apikey": settings.API_TOKEN},
+                                            }
+                                        },
+                                        "text": "刷新",
+                                    },
+                                ],
+                            },
                             {
                                 "component": "VRow",
                                 "props": {"class": "mt-1"},
@@ -1347,7 +2118,10 @@ class DiskCleaner(_PluginBase):
             },
         ]
 
-    def _collect_run_history(self) -> List[dict]:
+    def _collect_run_history(self, limit: Optional[int] = None) -> List[dict]:
+        log_path = self._run_log_path()
+        if log_path and log_path.exists():
+            return self._read_jsonl_tail(log_path, limit or self._run_history_keep)
         run_history = self.get_data("run_history") or []
         if not run_history:
             run_history = self._build_run_history_from_actions(self.get_data("history") or [])
@@ -1393,6 +2167,135 @@ class DiskCleaner(_PluginBase):
             )
         return list(grouped.values())
 
+    def _run_log_path(self) -> Optional[Path]:
+        try:
+            return Path(self.get_data_path()) / "run_history.jsonl"
+        except Exception:
+            return None
+
+    def _read_jsonl_tail(self, path: Path, limit: int) -> List[dict]:
+        # 从文件末尾按块倒读，只解析最后 limit 行；返回新到旧
+        limit = max(1, int(limit or 1))
+        records: List[dict] = []
+        try:
+            with open(path, "rb") as handle:
+                handle.seek(0, os.SEEK_END)
+                position = handle.tell()
+                buffer = b""
+                while position > 0 and buffer.count(b"\n") <= limit:
+                    step = min(65536, position)
+                    position -= step
+                    handle.seek(position)
+                    buffer = handle.read(step) + buffer
+        except Exception as err:
+            logger.warning(f"{self.plugin_name}读取运行记录失败 {path}：{err}")
+            return []
+        for line in reversed(buffer.splitlines()):
+            if len(records) >= limit:
+                break
+            try:
+                record = json.loads(line.decode("utf-8"))
+            except Exception:
+                continue
+            if isinstance(record, dict):
+                records.append(record)
+        return records
+
+    @staticmethod
+    def _empty_run_rollups() -> dict:
+        return {
+            "total_runs": 0,
+            "completed_runs": 0,
+            "skipped_runs": 0,
+            "failed_runs": 0,
+            "total_actions": 0,
+            "total_freed_bytes": 0,
+            "last_run_at": "",
+            "log_lines": 0,
+            "seq": 0,
+            "window": [],
+        }
+
+    @staticmethod
+    def _rollup_apply(rollups: dict, status: Any, actions: int, freed: int, sign: int):
+        rollups["total_runs"] += sign
+        if status == "completed":
+            rollups["completed_runs"] += sign
+        elif status in {"skipped", "idle"}:
+            rollups["skipped_runs"] += sign
+        elif status == "failed":
+            rollups["failed_runs"] += sign
+        rollups["total_actions"] += sign * actions
+        rollups["total_freed_bytes"] += sign * freed
+
+    def _rollup_run(self, rollups: dict, record: dict):
+        # 汇总只覆盖最近 _run_history_keep 轮（与日志保留窗口一致）：窗口内保存每轮的贡献，移出窗口时扣减
+        status = record.get("status")
+        actions = int(record.get("action_count", 0) or 0)
+        freed = int(record.get("freed_bytes", 0) or 0)
+        window = rollups.setdefault("window", [])
+        window.append([status, actions, freed])
+        self._rollup_apply(rollups, status, actions, freed, 1)
+        while len(window) > self._run_history_keep:
+            self._rollup_apply(rollups, *window.pop(0), -1)
+        if str(record.get("time") or "") >= str(rollups.get("last_run_at") or ""):
+            rollups["last_run_at"] = record.get("time") or ""
+
+    def _load_run_rollups(self, log_path: Path) -> dict:
+        rollups = self.get_data("run_rollups")
+        if isinstance(rollups, dict) and "window" in rollups and log_path.exists():
+            return rollups
+        rollups = self._empty_run_rollups()
+        if log_path.exists():
+            # 汇总丢失时从日志重建（仅发生一次）
+            records = list(reversed(self._read_jsonl_tail(log_path, 1 << 30)))
+            log_lines = len(records)
+        else:
+            # 旧版 run_history 列表迁移为 JSONL
+            records = sorted(self.get_data("run_history") or [], key=lambda x: x.get("time", ""))
+            log_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(log_path, "w", encoding="utf-8") as handle:
+                for record in records[-self._run_history_keep:]:
+                    handle.write(json.dumps(self._sanitize_for_json(record), ensure_ascii=False) + "\n")
+            log_lines = min(len(records), self._run_history_keep)
+            if records:
+                try:
+                    self.del_data(key="run_history")
+                except Exception:
+                    pass
+        for record in records:
+            self._rollup_run(rollups, record)
+        rollups["log_lines"] = log_lines
+        rollups["seq"] = len(records)
+        return rollups
+
+    def _load_run_stats(self) -> Optional[dict]:
+        log_path = self._run_log_path()
+        rollups = self.get_data("run_rollups")
+        if not log_path or not log_path.exists() or not isinstance(rollups, dict) or "window" not in rollups:
+            return None
+        total_runs = int(rollups.get("total_runs", 0) or 0)
+        total_freed = int(rollups.get("total_freed_bytes", 0) or 0)
+        return {
+            "total_runs": total_runs,
+            "completed_runs": int(rollups.get("completed_runs", 0) or 0),
+            "skipped_runs": int(rollups.get("skipped_runs", 0) or 0),
+            "failed_runs": int(rollups.get("failed_runs", 0) or 0),
+            "total_actions": int(rollups.get("total_actions", 0) or 0),
+            "total_freed_bytes": total_freed,
+            "avg_freed_bytes": int(total_freed / total_runs) if total_runs else 0,
+            "last_run_at": rollups.get("last_run_at") or (self.get_data("last_run_at") or "-"),
+        }
+
+    def _compact_run_log(self, log_path: Path) -> int:
+        records = list(reversed(self._read_jsonl_tail(log_path, self._run_history_keep)))
+        temp_path = log_path.with_suffix(".jsonl.tmp")
+        with open(temp_path, "w", encoding="utf-8") as handle:
+            for record in records:
+                handle.write(json.dumps(record, ensure_ascii=False) + "\n")
+        os.replace(temp_path, log_path)
+        return len(records)
+
     def _build_run_stats(self, run_history: List[dict]) -> dict:
         total_runs = len(run_history)
         total_actions = sum(int(item.get("action_count", 0) or 0) for item in run_history)
@@ -1606,7 +2509,6 @@ class DiskCleaner(_PluginBase):
         status: str = "completed",
         reason: str = "",
     ):
-        run_history = self.get_data("run_history") or []
         triggers = sorted({item.get("trigger") for item in actions if item.get("trigger")})
         items = []
         for item in actions[:100]:
@@ -1622,7 +2524,7 @@ class DiskCleaner(_PluginBase):
                 }
             )
         run_record = {
-            "run_id": f"{int(time.time() * 1000)}-{len(run_history) + 1}",
+            "run_id": "",
             "time": run_time,
             "status": status,
             "reason": reason,
@@ -1635,8 +2537,29 @@ class DiskCleaner(_PluginBase):
             "usage": usage or {},
             "items": items,
         }
-        run_history.append(self._sanitize_for_json(run_record))
-        self.save_data("run_history", self._sanitize_for_json(run_history[-200:]))
+        run_record = self._sanitize_for_json(run_record)
+        log_path = self._run_log_path()
+        if not log_path:
+            run_history = self.get_data("run_history") or []
+            run_record["run_id"] = f"{int(time.time() * 1000)}-{len(run_history) + 1}"
+            run_history.append(run_record)
+            self.save_data("run_history", self._sanitize_for_json(run_history[-self._run_history_keep:]))
+            return
+
+        # 追加一行并增量更新汇总；日志超过保留条数两倍时压缩一次，摊还后每轮 O(1)
+        try:
+            rollups = self._load_run_rollups(log_path)
+            rollups["seq"] = int(rollups.get("seq", 0) or 0) + 1
+            run_record["run_id"] = f"{int(time.time() * 1000)}-{rollups['seq']}"
+            with open(log_path, "a", encoding="utf-8") as handle:
+                handle.write(json.dumps(run_record, ensure_ascii=False) + "\n")
+            self._rollup_run(rollups, run_record)
+            rollups["log_lines"] = int(rollups.get("log_lines", 0) or 0) + 1
+            if rollups["log_lines"] > self._run_history_keep * 2:
+                rollups["log_lines"] = self._compact_run_log(log_path)
+            self.save_data("run_rollups", rollups)
+        except Exception as err:
+            logger.warning(f"{self.plugin_name}写入运行记录失败：{err}")
 
     def get_service(self) -> List[Dict[str, Any]]:
         return []
@@ -1650,6 +2573,13 @@ class DiskCleaner(_PluginBase):
                 self._scheduler = None
         except Exception as err:
             logger.error(f"{self.plugin_name}停止服务失败：{err}")
+        if self._library_index:
+            self._library_index.close()
+            self._library_index = None
+        self._flush_tv_end_state_cache()
+        self._flush_playback_index()
+        self._flush_torrent_replicas()
+        self._flush_retry_store()
 
     def _task(self, manual_run: bool = False):
         with self._lock:
@@ -1669,9 +2599,23 @@ class DiskCleaner(_PluginBase):
                 self._current_run_no_media_dirs_deleted = {}
                 self._current_run_no_media_checks = 0
                 self._current_run_dir_cleanup_dryrun_skips = 0
+                self._dir_media_counts = {}
+                self._dir_media_scanned = {}
+                self._no_media_sweep_queue = {}
+                self._dir_listing_cache = {}
                 self._playback_ts_cache = {}
                 self._last_library_scan_summary = ""
                 self._last_library_scan_stats = {}
+                self._library_index_roots = set()
+                self._hardlink_inode_map = None
+                self._hardlink_inode_roots = None
+                self._transfer_dest_map = None
+                self._transfer_dest_map_keys = None
+                self._transfer_dest_map_failed = False
+                self._device_usage_cache = {}
+                self._path_device_cache = {}
+                self._usage_projected_freed = {}
+                self._torrent_snapshots = {}
                 retry_actions: List[dict] = []
                 skip_normal_cleanup = False
                 if self._enable_retry_queue and not self._dry_run:
@@ -1713,7 +2657,16 @@ class DiskCleaner(_PluginBase):
 
                 round_actions: List[dict] = []
                 if not skip_normal_cleanup:
+                    self._torrent_delete_queue = None if self._dry_run else []
+                    self._history_delete_queue = None if self._dry_run else {
+                        "transfer_ids": set(), "hashes": set(), "tickets": [], "unbound": [],
+                    }
                     round_actions = self._execute_trigger_flow(usage=usage)
+                    self._flush_torrent_delete_queue()
+                    self._torrent_delete_queue = None
+                    self._flush_history_delete_queue()
+                    self._history_delete_queue = None
+                self._sweep_no_media_dirs()
 
                 all_actions = retry_actions + round_actions
                 if not all_actions:
@@ -1783,6 +2736,27 @@ class DiskCleaner(_PluginBase):
                 except Exception:
                     pass
                 logger.error(f"{self.plugin_name}任务执行异常：{err}", exc_info=True)
+            finally:
+                if self._torrent_delete_queue:
+                    self._flush_torrent_delete_queue()
+                self._torrent_delete_queue = None
+                if self._history_delete_queue:
+                    self._flush_history_delete_queue()
+                self._history_delete_queue = None
+                if self._no_media_sweep_queue:
+                    self._sweep_no_media_dirs()
+                self._no_media_sweep_queue = None
+                self._close_transfer_history_stream()
+                self._dir_media_counts = None
+                self._dir_media_scanned = {}
+                self._dir_listing_cache = None
+                self._flush_retry_store()
+                self._refresh_dashboard_snapshot()
+                self._flush_tv_end_state_cache()
+                self._flush_playback_index()
+                self._flush_torrent_replicas()
+                self._usage_projected_freed = {}
+                self._torrent_snapshots = None
 
     def _execute_trigger_flow(self, usage: dict) -> List[dict]:
         flow = self._trigger_flow or "flow_library_mp_downloader"
@@ -1893,28 +2867,57 @@ class DiskCleaner(_PluginBase):
 
         actions: List[dict] = []
         skipped_paths = set()
+        candidate_heap: Optional[List[tuple]] = None
+        delete_roots = self._media_delete_roots(self._library_paths())
+
+        def _estimate(item: dict) -> Tuple[Optional[str], int]:
+            path = item.get("path")
+            return self._estimate_media_cleanup(path, self._find_transfer_history_by_media_path(path), delete_roots)
+
         while not self._is_run_limit_reached(actions):
-            current_usage = self._collect_monitor_usage().get("library", {})
-            if not self._is_threshold_hit(current_usage, self._library_threshold_mode, self._library_threshold_value):
+            current_usage = self._loop_usage(
+                lambda usage: self._is_threshold_hit(
+                    usage.get("library", {}),
+                    self._library_threshold_mode,
+                    self._library_threshold_value,
+                )
+            )
+            if not current_usage:
                 break
 
-            candidate = self._pick_oldest_library_media(skipped_paths=skipped_paths)
-            if not candidate:
+            if candidate_heap is None:
+                candidate_heap = self._build_library_candidate_heap(skipped_paths=skipped_paths)
+            deficit = self._usage_deficit_bytes(
+                current_usage.get("library", {}),
+                self._library_threshold_mode,
+                self._library_threshold_value,
+                self._library_target_value,
+            )
+            plan, _ = self._plan_deficit_batch(
+                next_candidate=lambda: self._pop_library_candidate(candidate_heap, skipped_paths=skipped_paths),
+                estimate=_estimate,
+                deficit=deficit,
+                actions_count=len(actions),
+            )
+            if not plan:
                 logger.warning(
                     f"{self.plugin_name}流程1未找到可清理的媒体文件；"
                     f"{self._last_library_scan_summary or '无扫描摘要'}"
                 )
                 break
 
-            result = self._cleanup_by_media_file(
-                candidate=candidate,
-                trigger="流程1:媒体目录→优先联动MP整理与下载器",
-                require_torrent_link=False,
-            )
-            skipped_paths.add(candidate.get("path").as_posix())
-            if result:
-                actions.append(result)
-                self._current_run_freed_bytes += int(result.get("freed_bytes", 0) or 0)
+            for candidate in plan:
+                if self._is_run_limit_reached(actions):
+                    break
+                result = self._cleanup_by_media_file(
+                    candidate=candidate,
+                    trigger="流程1:媒体目录→优先联动MP整理与下载器",
+                    require_torrent_link=False,
+                )
+                skipped_paths.add(candidate.get("path").as_posix())
+                if result:
+                    actions.append(result)
+                    self._current_run_freed_bytes += int(result.get("freed_bytes", 0) or 0)
         return actions
 
     def _clean_by_download_threshold(self, usage: Optional[dict] = None) -> List[dict]:
@@ -1978,28 +2981,69 @@ class DiskCleaner(_PluginBase):
 
         actions: List[dict] = []
         skipped_ids = set()
-        while not self._is_run_limit_reached(actions):
-            current_usage = self._collect_monitor_usage()
-            if not self._flow3_trigger_reasons(current_usage):
-                break
+        self._close_transfer_history_stream()
+        delete_roots: Optional[List[Path]] = None
 
+        def _next_history() -> Optional[TransferHistory]:
             history = self._pick_oldest_transfer_history(skipped_ids=skipped_ids)
-            if not history:
-                logger.warning(f"{self.plugin_name}流程3未找到可清理的整理记录")
-                break
-
-            hid = int(getattr(history, "id", 0) or 0)
+            hid = int(getattr(history, "id", 0) or 0) if history else 0
             if hid > 0:
                 skipped_ids.add(hid)
+            return history
 
-            result = self._cleanup_by_transfer_history(
-                history=history,
-                trigger="流程3:MP整理记录(旧到新)→媒体与下载器",
-            )
-            if result:
-                actions.append(result)
-                self._current_run_freed_bytes += int(result.get("freed_bytes", 0) or 0)
+        def _estimate(history: TransferHistory) -> Tuple[Optional[str], int]:
+            nonlocal delete_roots
+            dest = getattr(history, "dest", None)
+            if not dest:
+                return None, 0
+            if delete_roots is None:
+                delete_roots = self._media_delete_roots(self._library_paths())
+            return self._estimate_media_cleanup(self._resolve_local_media_path(dest), history, delete_roots)
 
+        try:
+            while not self._is_run_limit_reached(actions):
+                current_usage = self._loop_usage(lambda usage: bool(self._flow3_trigger_reasons(usage)))
+                if not current_usage:
+                    break
+
+                deficits = [0]
+                if self._monitor_library:
+                    deficits.append(self._usage_deficit_bytes(
+                        current_usage.get("library", {}),
+                        self._library_threshold_mode,
+                        self._library_threshold_value,
+                        self._library_target_value,
+                    ))
+                if self._monitor_download:
+                    deficits.append(self._usage_deficit_bytes(
+                        current_usage.get("download", {}),
+                        self._download_threshold_mode,
+                        self._download_threshold_value,
+                        self._download_target_value,
+                    ))
+                plan, _ = self._plan_deficit_batch(
+                    next_candidate=_next_history,
+                    estimate=_estimate,
+                    deficit=max(deficits),
+                    actions_count=len(actions),
+                )
+                if not plan:
+                    logger.warning(f"{self.plugin_name}流程3未找到可清理的整理记录")
+                    break
+
+                for history in plan:
+                    if self._is_run_limit_reached(actions):
+                        break
+                    result = self._cleanup_by_transfer_history(
+                        history=history,
+                        trigger="流程3:MP整理记录(旧到新)→媒体与下载器",
+                    )
+                    if result:
+                        actions.append(result)
+                        self._current_run_freed_bytes += int(result.get("freed_bytes", 0) or 0)
+        finally:
+            # 游标持有数据库会话，流程结束即关闭，不跨轮次保留连接
+            self._close_transfer_history_stream()
         return actions
 
     def _flow3_trigger_reasons(self, usage: dict) -> List[str]:
@@ -2027,55 +3071,147 @@ class DiskCleaner(_PluginBase):
         # 2026-02: 清理与空间监控统一改为“全本地媒体库目录”，不再按媒体库选择做路径过滤。
         return False
 
+    def _close_transfer_history_stream(self):
+        stream = self._transfer_history_stream
+        self._transfer_history_stream = None
+        if stream is None or not hasattr(stream, "close"):
+            return
+        try:
+            stream.close()
+        except Exception as err:
+            logger.warning(f"{self.plugin_name}关闭整理记录游标失败：{err}")
+
     def _pick_oldest_transfer_history(self, skipped_ids: set) -> Optional[TransferHistory]:
+        # 单轮流程3共用一个按日期升序的候选游标，每次只向后推进到下一条符合条件的记录。
+        if self._transfer_history_stream is None:
+            self._transfer_history_stream_stats = {
+                "checked": 0,
+                "picked": 0,
+                "recent": 0,
+                "tv_unended": 0,
+                "block_keyword": 0,
+                "no_target": 0,
+                "marked": 0,
+                "queued": 0,
+            }
+            self._transfer_history_stream = self._iter_transfer_history_candidates(
+                self._transfer_history_stream_stats
+            )
+        stats = self._transfer_history_stream_stats
+        for history in self._transfer_history_stream:
+            hid = int(getattr(history, "id", 0) or 0)
+            if hid > 0 and hid in skipped_ids:
+                stats["marked"] += 1
+                continue
+            stats["picked"] += 1
+            logger.info(
+                f"{self.plugin_name}流程3整理记录出队：id={hid} {getattr(history, 'dest', '-') or '-'} "
+                f"(已检查 {stats['checked']} 条)"
+            )
+            return history
+        logger.info(
+            f"{self.plugin_name}流程3整理记录统计：已检查{stats['checked']} 已选{stats['picked']} | "
+            f"近期保护{stats['recent']} 未完结{stats['tv_unended']} "
+            f"关键词过滤{stats['block_keyword']} 无目标{stats['no_target']} 已跳过{stats['marked']} "
+            f"待删除{stats.get('queued', 0)}"
+        )
+        return None
+
+    def _iter_transfer_history_candidates(self, stats: Dict[str, int]) -> Iterator[TransferHistory]:
+        # 先遍历优先类型，再遍历其余类型；过滤条件按需逐条判断，取够即停。
+        preferred_type = self._media_cleanup_priority
+        for preferred_pass in (True, False):
+            for history in self._iter_transfer_history_ordered():
+                is_preferred = self._history_media_type_key(history) == preferred_type
+                if is_preferred != preferred_pass:
+                    continue
+                # 排队待删的整理记录本轮结束才提交，游标仍会读到它们：直接跳过，不占用计划名额
+                queue = self._history_delete_queue
+                if queue and getattr(history, "id", None) in queue["transfer_ids"]:
+                    stats["queued"] = stats.get("queued", 0) + 1
+                    continue
+                stats["checked"] += 1
+                if self._is_history_recent(history):
+                    stats["recent"] += 1
+                    continue
+                if self._path_contains_block_keyword(getattr(history, "dest", None)):
+                    stats["block_keyword"] += 1
+                    continue
+                if not getattr(history, "dest", None) and not getattr(history, "download_hash", None):
+                    stats["no_target"] += 1
+                    continue
+                if not self._is_tv_cleanup_allowed(history):
+                    stats["tv_unended"] += 1
+                    continue
+                yield history
+
+    def _iter_transfer_history_ordered(self, page_size: int = 500) -> Iterator[TransferHistory]:
+        yielded = False
+        try:
+            for history in self._iter_transfer_history_keyset(page_size=page_size):
+                yielded = True
+                yield history
+            return
+        except Exception as err:
+            if yielded:
+                logger.warning(f"{self.plugin_name}流程3整理记录分页读取中断：{err}")
+                return
+            logger.warning(f"{self.plugin_name}流程3整理记录分页查询不可用，回退为全量读取：{err}")
+        yield from self._iter_transfer_history_full()
+
+    def _iter_transfer_history_keyset(self, page_size: int) -> Iterator[TransferHistory]:
+        # 按 (date, id) 升序做键集分页，每页只取 page_size 条；近期保护范围直接在查询中排除，
+        # 无日期记录排在最后（与“缺失日期视为当前时间”的排序一致）。
+        with self._db_session() as db:
+            if db is None:
+                raise ValueError("数据库会话不可用")
+            yield from self._iter_transfer_history_pages(db, page_size)
+
+    def _iter_transfer_history_pages(self, db: Any, page_size: int) -> Iterator[TransferHistory]:
+        model = TransferHistory
+        base_filters = [model.status == True, model.date > ""]  # noqa: E712
+        if self._protect_recent_days > 0:
+            cutoff = datetime.now() - timedelta(days=self._protect_recent_days)
+            base_filters.append(model.date <= cutoff.strftime("%Y-%m-%d %H:%M:%S"))
+        last_date, last_id = None, 0
+        while True:
+            query = db.query(model).filter(*base_filters)
+            if last_date is not None:
+                query = query.filter((model.date > last_date) | ((model.date == last_date) & (model.id > last_id)))
+            rows = query.order_by(model.date.asc(), model.id.asc()).limit(page_size).all()
+            yield from rows
+            if len(rows) < page_size:
+                break
+            last_date, last_id = rows[-1].date, rows[-1].id
+
+        last_id = 0
+        while True:
+            rows = (
+                db.query(model)
+                .filter(model.status == True, model.date.is_(None) | (model.date == ""), model.id > last_id)  # noqa: E712
+                .order_by(model.id.asc())
+                .limit(page_size)
+                .all()
+            )
+            yield from rows
+            if len(rows) < page_size:
+                break
+            last_id = rows[-1].id
+
+    def _iter_transfer_history_full(self) -> Iterator[TransferHistory]:
         records = TransferHistory.list_by_page(
             db=self._transfer_oper._db if self._transfer_oper else None,
             page=1,
             count=-1,
             status=True,
         ) or []
-        if not records:
-            logger.info(f"{self.plugin_name}流程3整理记录统计：总0 符合条件0")
-            return None
 
         def _sort_key(item: TransferHistory) -> Tuple[int, int]:
             date_ts = self._parse_datetime_to_ts(getattr(item, "date", None)) or int(time.time())
             item_id = int(getattr(item, "id", 0) or 0)
             return date_ts, item_id
 
-        candidates: List[TransferHistory] = []
-        skipped_mark = 0
-        skipped_recent = 0
-        skipped_tv_unended = 0
-        skipped_no_target = 0
-        skipped_block_keyword = 0
-        for history in sorted(records, key=_sort_key):
-            hid = int(getattr(history, "id", 0) or 0)
-            if hid > 0 and hid in skipped_ids:
-                skipped_mark += 1
-                continue
-            if self._is_history_recent(history):
-                skipped_recent += 1
-                continue
-            if not self._is_tv_cleanup_allowed(history):
-                skipped_tv_unended += 1
-                continue
-            if self._path_contains_block_keyword(getattr(history, "dest", None)):
-                skipped_block_keyword += 1
-                continue
-            if not getattr(history, "dest", None) and not getattr(history, "download_hash", None):
-                skipped_no_target += 1
-                continue
-            candidates.append(history)
-        logger.info(
-            f"{self.plugin_name}流程3整理记录统计：总{len(records)} 符合条件{len(candidates)} | "
-            f"近期保护{skipped_recent} 未完结{skipped_tv_unended} "
-            f"关键词过滤{skipped_block_keyword} 无目标{skipped_no_target} 已跳过{skipped_mark}"
-        )
-        if not candidates:
-            return None
-        preferred = [item for item in candidates if self._history_media_type_key(item) == self._media_cleanup_priority]
-        return preferred[0] if preferred else candidates[0]
+        yield from sorted(records, key=_sort_key)
 
     def _trigger_flow_label(self, flow: Optional[str] = None) -> str:
         mapping = {
@@ -2122,7 +3258,7 @@ class DiskCleaner(_PluginBase):
             logger.warning(f"{self.plugin_name}未找到可删除的下载记录，跳过下载记录删除：{dest or '-'}")
         scope_enabled = self._is_cleanup_scope_enabled()
         if scope_enabled:
-            if not media_path or not self._is_path_in_roots(media_path, library_paths):
+            if not media_path or not self._policy().in_roots(media_path, library_paths):
                 logger.info(f"{self.plugin_name}整理记录不在所选媒体库范围内，跳过：{dest or '-'}")
                 return None
 
@@ -2155,11 +3291,7 @@ class DiskCleaner(_PluginBase):
         )
         planned_download = self._count_download_records(download_hash) if self._clean_download_history and download_hash else 0
 
-        freed_bytes = 0
-        for target in media_targets:
-            freed_bytes += self._path_size(target)
-        for sidecar in sidecars:
-            freed_bytes += self._path_size(sidecar)
+        freed_bytes = self._reclaim_bytes(list(media_targets) + list(sidecars))
 
         if freed_bytes <= 0 and (planned_downloader + planned_transfer + planned_download) <= 0:
             return None
@@ -2225,20 +3357,20 @@ class DiskCleaner(_PluginBase):
             "download_history": self._build_step_result(planned_download, removed_download),
         }
         failed_steps = self._collect_failed_steps(step_result)
+        retry_payload = {
+            "mode": "media",
+            "retry_key": f"transfer:{getattr(history, 'id', 0)}",
+            "trigger": trigger,
+            "target": dest or "-",
+            "media_path": dest,
+            "media_targets": [item.as_posix() for item in media_targets],
+            "sidecars": [item.as_posix() for item in sidecars],
+            "download_hash": download_hash,
+            "downloader": downloader,
+            "history_dest": dest,
+        }
         if failed_steps and not self._dry_run and self._enable_retry_queue:
-            self._enqueue_retry({
-                "mode": "media",
-                "retry_key": f"transfer:{getattr(history, 'id', 0)}",
-                "trigger": trigger,
-                "target": dest or "-",
-                "media_path": dest,
-                "media_targets": [item.as_posix() for item in media_targets],
-                "sidecars": [item.as_posix() for item in sidecars],
-                "download_hash": download_hash,
-                "downloader": downloader,
-                "history_dest": dest,
-                "failed_steps": failed_steps,
-            })
+            self._enqueue_retry(dict(retry_payload, failed_steps=failed_steps))
 
         total_actions = removed_media + removed_scrape + removed_downloader + removed_transfer + removed_download
         if total_actions <= 0:
@@ -2254,7 +3386,7 @@ class DiskCleaner(_PluginBase):
         if refresh_item:
             refresh_items.append(refresh_item)
 
-        return {
+        action = {
             "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             "trigger": trigger,
             "target": dest or "-",
@@ -2264,6 +3396,8 @@ class DiskCleaner(_PluginBase):
             "refresh_items": refresh_items,
             "steps": step_result,
         }
+        self._bind_deferred_deletes(downloader, download_hash, action, retry_payload)
+        return action
 
     def _cleanup_by_media_file(
         self,
@@ -2345,11 +3479,7 @@ class DiskCleaner(_PluginBase):
         )
         planned_download = self._count_download_records(download_hash) if self._clean_download_history and download_hash else 0
 
-        freed_bytes = 0
-        for target in media_targets:
-            freed_bytes += self._path_size(target)
-        for sidecar in sidecars:
-            freed_bytes += self._path_size(sidecar)
+        freed_bytes = self._reclaim_bytes(list(media_targets) + list(sidecars))
 
         if freed_bytes <= 0 and (planned_downloader + planned_transfer + planned_download) <= 0:
             return None
@@ -2416,20 +3546,20 @@ class DiskCleaner(_PluginBase):
         }
         failed_steps = self._collect_failed_steps(step_result)
         target_path = cleanup_target.as_posix() if cleanup_target else media_path.as_posix()
-        if failed_steps and not self._dry_run and self._enable_retry_queue:
-            self._enqueue_retry({
-                "mode": "media",
-                "retry_key": f"media:{media_path.as_posix()}:{download_hash or ''}",
-                "trigger": trigger,
-                "target": target_path,
-                "media_path": media_path.as_posix(),
-                "media_targets": [item.as_posix() for item in media_targets],
-                "sidecars": [item.as_posix() for item in sidecars],
-                "download_hash": download_hash,
-                "downloader": downloader,
-                "history_dest": getattr(history, "dest", None) if history else None,
-                "failed_steps": failed_steps,
-            })
+        retry_payload = {
+            "mode": "media",
+            "retry_key": f"media:{media_path.as_posix()}:{download_hash or ''}",
+            "trigger": trigger,
+            "target": target_path,
+            "media_path": media_path.as_posix(),
+            "media_targets": [item.as_posix() for item in media_targets],
+            "sidecars": [item.as_posix() for item in sidecars],
+            "download_hash": download_hash,
+            "downloader": downloader,
+            "history_dest": getattr(history, "dest", None) if history else None,
+        }
+        if failed_steps and not self._dry_run and self._enable_retry_queue:
+            self._enqueue_retry(dict(retry_payload, failed_steps=failed_steps))
 
         total_actions = removed_media + removed_scrape + removed_downloader + removed_transfer + removed_download
         if total_actions <= 0:
@@ -2446,7 +3576,7 @@ class DiskCleaner(_PluginBase):
             if refresh_item:
                 refresh_items.append(refresh_item)
 
-        return {
+        action = {
             "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             "trigger": trigger,
             "target": target_path,
@@ -2456,6 +3586,8 @@ class DiskCleaner(_PluginBase):
             "refresh_items": refresh_items,
             "steps": step_result,
         }
+        self._bind_deferred_deletes(downloader, download_hash, action, retry_payload)
+        return action
 
     def _cleanup_by_torrent(
         self,
@@ -2479,7 +3611,7 @@ class DiskCleaner(_PluginBase):
             scoped_histories = []
             for history in histories:
                 path = self._resolve_local_media_path(getattr(history, "dest", None))
-                if path and self._is_path_in_roots(path, library_paths):
+                if path and self._policy().in_roots(path, library_paths):
                     scoped_histories.append(history)
             histories = scoped_histories
             allow_non_mp_hardlink = self._force_hardlink_cleanup and self._clean_media_data
@@ -2545,7 +3677,7 @@ class DiskCleaner(_PluginBase):
         ):
             return None
         if scope_enabled and not histories and self._force_hardlink_cleanup and self._clean_media_data:
-            if not any(self._is_path_in_roots(item, library_paths) for item in media_targets):
+            if not any(self._policy().in_roots(item, library_paths) for item in media_targets):
                 logger.info(f"{self.plugin_name}下载器任务未匹配到媒体库范围，跳过：{downloader}:{name}")
                 return None
 
@@ -2563,8 +3695,7 @@ class DiskCleaner(_PluginBase):
         planned_transfer = len(histories) if self._clean_transfer_history else 0
         planned_download = self._count_download_records(download_hash) if self._clean_download_history else 0
 
-        freed_bytes = sum(self._path_size(path) for path in media_targets) + \
-            sum(self._path_size(path) for path in sidecar_targets)
+        freed_bytes = self._reclaim_bytes(list(media_targets) + list(sidecar_targets))
 
         if freed_bytes <= 0 and (planned_downloader + planned_transfer + planned_download) <= 0:
             return None
@@ -2627,19 +3758,19 @@ class DiskCleaner(_PluginBase):
             "download_history": self._build_step_result(planned_download, removed_download),
         }
         failed_steps = self._collect_failed_steps(step_result)
+        retry_payload = {
+            "mode": "torrent",
+            "retry_key": f"torrent:{download_hash}",
+            "trigger": trigger,
+            "target": f"{downloader}:{name}",
+            "download_hash": download_hash,
+            "downloader": downloader,
+            "media_targets": [item.as_posix() for item in media_targets],
+            "sidecar_targets": [item.as_posix() for item in sidecar_targets],
+            "history_dests": [getattr(item, "dest", None) for item in histories if getattr(item, "dest", None)],
+        }
         if failed_steps and not self._dry_run and self._enable_retry_queue:
-            self._enqueue_retry({
-                "mode": "torrent",
-                "retry_key": f"torrent:{download_hash}",
-                "trigger": trigger,
-                "target": f"{downloader}:{name}",
-                "download_hash": download_hash,
-                "downloader": downloader,
-                "media_targets": [item.as_posix() for item in media_targets],
-                "sidecar_targets": [item.as_posix() for item in sidecar_targets],
-                "history_dests": [getattr(item, "dest", None) for item in histories if getattr(item, "dest", None)],
-                "failed_steps": failed_steps,
-            })
+            self._enqueue_retry(dict(retry_payload, failed_steps=failed_steps))
 
         total_actions = removed_media + removed_scrape + removed_downloader + removed_transfer + removed_download
         if total_actions <= 0:
@@ -2656,7 +3787,7 @@ class DiskCleaner(_PluginBase):
             if refresh_item:
                 refresh_items.append(refresh_item)
 
-        return {
+        action = {
             "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             "trigger": trigger,
             "target": f"{downloader}:{name}",
@@ -2666,13 +3797,16 @@ class DiskCleaner(_PluginBase):
             "refresh_items": refresh_items,
             "steps": step_result,
         }
+        self._bind_deferred_deletes(downloader, download_hash, action, retry_payload)
+        return action
 
-    def _pick_oldest_library_media(self, skipped_paths: Optional[set] = None) -> Optional[dict]:
+    def _build_library_candidate_heap(self, skipped_paths: Optional[set] = None) -> List[tuple]:
+        # 单轮只扫描一次媒体库，按（优先类型, 有效访问时间）构建候选小顶堆，后续逐条出队。
         library_paths = self._library_paths()
         if not library_paths:
             self._last_library_scan_summary = "媒体候选扫描结束：未配置可用媒体库目录"
             logger.info(f"{self.plugin_name}{self._last_library_scan_summary}")
-            return None
+            return []
 
         skipped_paths = skipped_paths or set()
         media_exts = {ext.lower() for ext in settings.RMT_MEDIAEXT}
@@ -2694,91 +3828,87 @@ class DiskCleaner(_PluginBase):
         skipped_by_mark = 0
         skipped_block_keyword = 0
 
+        indexed_roots = self._refresh_library_index(library_paths)
+        library_index = self._get_library_index()
+        walk_results = self._scan_library_roots(
+            [
+                root for root in library_paths
+                if not (library_index and root.as_posix() in indexed_roots)
+            ],
+            exts=media_exts,
+        )
         for root in library_paths:
             if not root.exists():
                 continue
             existing_roots += 1
 
-            for current_root, _, files in os.walk(root.as_posix()):
-                for filename in files:
-                    scanned_files += 1
-                    path = Path(current_root) / filename
-                    if path.as_posix() in skipped_paths:
-                        skipped_by_mark += 1
-                        continue
-                    if path.suffix.lower() not in media_exts:
-                        skipped_non_media += 1
-                        continue
-                    if self._path_contains_block_keyword(path):
-                        skipped_block_keyword += 1
-                        continue
-                    matched_media_ext += 1
-                    try:
-                        stat = path.stat()
-                    except Exception:
-                        skipped_stat_error += 1
-                        continue
-                    history = self._find_transfer_history_by_media_path(path) if need_history else None
-                    if history and self._is_history_recent(history):
-                        skipped_recent += 1
-                        continue
-                    if history and not self._is_tv_cleanup_allowed(history):
-                        skipped_tv_unended += 1
-                        continue
-                    atime = stat.st_atime or stat.st_mtime
-                    candidates.append({
-                        "path": path,
-                        "atime": atime,
-                        "history": history,
-                        "media_type": self._history_media_type_key(history),
-                    })
+            if library_index and root.as_posix() in indexed_roots:
+                # 索引已按目录 mtime 增量刷新，直接按扩展名取出媒体文件，无需再逐个 stat。
+                root_files = library_index.count_files(root)
+                indexed_media = list(library_index.iter_files(root, exts=media_exts))
+                scanned_files += root_files
+                skipped_non_media += max(0, root_files - len(indexed_media))
+                entries = ((Path(path_text), stat) for path_text, stat in indexed_media)
+            else:
+                walk_entries, walk_stats = walk_results.get(root.as_posix(), ([], {}))
+                entries = ((Path(path_text), stat) for path_text, stat in walk_entries)
 
-        if not candidates:
-            self._last_library_scan_stats = {
-                "roots_total": total_roots,
-                "roots_existing": existing_roots,
-                "files_total": scanned_files,
-                "media_files": matched_media_ext,
-                "eligible": 0,
-                "filtered_recent": skipped_recent,
-                "filtered_tv_unended": skipped_tv_unended,
-                "filtered_marked": skipped_by_mark,
-                "filtered_stat_error": skipped_stat_error,
-                "filtered_non_media": skipped_non_media,
-                "filtered_block_keyword": skipped_block_keyword,
-            }
-            self._last_library_scan_summary = (
-                f"媒体候选扫描结束：未找到可清理媒体文件 | "
-                f"目录 {existing_roots}/{total_roots} | 扫描文件 {scanned_files} | "
-                f"媒体文件 {matched_media_ext} | 非媒体扩展 {skipped_non_media} | 近期保护 {skipped_recent} | "
-                f"未完结电视剧 {skipped_tv_unended} | 关键词过滤 {skipped_block_keyword} | "
-                f"已跳过标记 {skipped_by_mark} | 读取失败 {skipped_stat_error}"
-            )
-            logger.info(
-                f"{self.plugin_name}流程1媒体库任务统计：总文件{scanned_files} 媒体文件{matched_media_ext} "
-                f"符合条件0 | 近期保护{skipped_recent} 未完结{skipped_tv_unended} "
-                f"关键词过滤{skipped_block_keyword} 已跳过{skipped_by_mark}"
-            )
-            logger.info(f"{self.plugin_name}{self._last_library_scan_summary}")
-            return None
+            for path, stat in entries:
+                if path.as_posix() in skipped_paths:
+                    skipped_by_mark += 1
+                    continue
+                if self._path_contains_block_keyword(path):
+                    skipped_block_keyword += 1
+                    continue
+                matched_media_ext += 1
+                history = self._find_transfer_history_by_media_path(path) if need_history else None
+                if history and self._is_history_recent(history):
+                    skipped_recent += 1
+                    continue
+                atime = stat.st_atime or stat.st_mtime
+                candidates.append({
+                    "path": path,
+                    "atime": atime,
+                    "history": history,
+                    "media_type": self._history_media_type_key(history),
+                })
+            if not (library_index and root.as_posix() in indexed_roots):
+                scanned_files += walk_stats.get("files", 0)
+                skipped_non_media += walk_stats.get("filtered_ext", 0)
+                skipped_stat_error += walk_stats.get("stat_errors", 0)
 
-        preferred = [item for item in candidates if item.get("media_type") == self._media_cleanup_priority]
-        candidate_pool = preferred if preferred else candidates
-        selected = None
-        selected_ts = int(time.time())
-        for candidate in candidate_pool:
-            current_ts = self._effective_access_ts(
+        if need_history:
+            try:
+                self._refresh_playback_index()
+            except Exception as err:
+                logger.warning(f"{self.plugin_name}播放记录索引刷新失败，回退为逐条查询：{err}")
+
+        # 先并发预取所有电视剧候选的 TMDB 完结状态，再统一过滤，避免逐条阻塞查询。
+        self._prefetch_tv_end_states([candidate.get("history") for candidate in candidates])
+        allowed_candidates: List[dict] = []
+        for candidate in candidates:
+            history = candidate.get("history")
+            if history and not self._is_tv_cleanup_allowed(history):
+                skipped_tv_unended += 1
+                continue
+            allowed_candidates.append(candidate)
+        candidates = allowed_candidates
+
+        # 优先类型排在前面；同类型内按有效访问时间从旧到新，序号用于稳定排序。
+        candidate_heap: List[tuple] = []
+        preferred_count = 0
+        for seq, candidate in enumerate(candidates):
+            effective_ts = self._effective_access_ts(
                 path=candidate.get("path"),
                 history=candidate.get("history"),
                 fallback_ts=candidate.get("atime"),
             )
-            if selected is None or current_ts < selected_ts:
-                selected = candidate
-                selected_ts = current_ts
-        if not selected:
-            return None
+            is_preferred = candidate.get("media_type") == self._media_cleanup_priority
+            if is_preferred:
+                preferred_count += 1
+            candidate_heap.append((0 if is_preferred else 1, int(effective_ts), seq, candidate))
+        heapq.heapify(candidate_heap)
 
-        selected_path = selected.get("path")
         self._last_library_scan_stats = {
             "roots_total": total_roots,
             "roots_existing": existing_roots,
@@ -2791,24 +3921,192 @@ class DiskCleaner(_PluginBase):
             "filtered_stat_error": skipped_stat_error,
             "filtered_non_media": skipped_non_media,
             "filtered_block_keyword": skipped_block_keyword,
+            "scan_workers": self._library_scan_workers,
         }
-        self._last_library_scan_summary = (
-            f"媒体候选扫描完成：候选 {len(candidates)} 条 "
-            f"(优先类型候选 {len(preferred)} 条)，选中 {selected_path.as_posix() if selected_path else '-'} | "
-            f"扫描文件 {scanned_files} 媒体文件 {matched_media_ext}"
-        )
         logger.info(
             f"{self.plugin_name}流程1媒体库任务统计：总文件{scanned_files} 媒体文件{matched_media_ext} "
             f"符合条件{len(candidates)} | 近期保护{skipped_recent} 未完结{skipped_tv_unended} "
             f"关键词过滤{skipped_block_keyword} 已跳过{skipped_by_mark}"
         )
+        if not candidates:
+            self._last_library_scan_summary = (
+                f"媒体候选扫描结束：未找到可清理媒体文件 | "
+                f"目录 {existing_roots}/{total_roots} | 扫描文件 {scanned_files} | "
+                f"媒体文件 {matched_media_ext} | 非媒体扩展 {skipped_non_media} | 近期保护 {skipped_recent} | "
+                f"未完结电视剧 {skipped_tv_unended} | 关键词过滤 {skipped_block_keyword} | "
+                f"已跳过标记 {skipped_by_mark} | 读取失败 {skipped_stat_error}"
+            )
+        else:
+            self._last_library_scan_summary = (
+                f"媒体候选扫描完成：候选 {len(candidates)} 条 "
+                f"(优先类型候选 {preferred_count} 条) | "
+                f"扫描文件 {scanned_files} 媒体文件 {matched_media_ext}"
+            )
         logger.info(f"{self.plugin_name}{self._last_library_scan_summary}")
+        return candidate_heap
 
-        return {
-            "path": selected.get("path"),
-            "atime": selected_ts,
-            "raw_atime": selected.get("atime"),
-        }
+    def _scan_library_roots(self, roots: List[Path], exts: Optional[set] = None) -> Dict[str, tuple]:
+        # 多个根目录（及根目录下的一级子目录）放入有界线程池并发遍历，按设备限制并发，
+        # 结果按根目录合并为 {根目录: ([(路径, stat)], 统计)}，顺序与串行遍历一致。
+        results: Dict[str, tuple] = {}
+        existing_roots: List[Tuple[Path, int]] = []
+        for root in roots or []:
+            try:
+                if root.exists():
+                    existing_roots.append((root, int(root.stat().st_dev)))
+            except Exception:
+                continue
+        if not existing_roots:
+            return results
+
+        workers = max(1, int(self._library_scan_workers or 1))
+        tasks: List[Tuple[str, str, bool, int]] = []
+        for root, device in existing_roots:
+            root_text = root.as_posix()
+            results[root_text] = ([], {})
+            if workers <= 1:
+                tasks.append((root_text, root_text, True, device))
+                continue
+            subdirs: List[str] = []
+            try:
+                with os.scandir(root_text) as iterator:
+                    for entry in iterator:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                subdirs.append(entry.path)
+                        except OSError:
+                            continue
+            except OSError:
+                pass
+            tasks.append((root_text, root_text, False, device))
+            tasks.extend((root_text, subdir, True, device) for subdir in subdirs)
+
+        device_limit = max(1, int(self._library_scan_device_limit or 1))
+        device_slots = {device: threading.BoundedSemaphore(device_limit) for _, device in existing_roots}
+
+        def _scan(task: Tuple[str, str, bool, int]) -> Tuple[str, list, Dict[str, int]]:
+            root_text, target, recursive, device = task
+            task_stats: Dict[str, int] = {}
+            with device_slots[device]:
+                entries = list(self._scan_files(
+                    target,
+                    exts=exts,
+                    include_symlinks=True,
+                    stats=task_stats,
+                    recursive=recursive,
+                ))
+            return root_text, entries, task_stats
+
+        if workers <= 1 or len(tasks) <= 1:
+            scanned = map(_scan, tasks)
+        else:
+            logger.info(
+                f"{self.plugin_name}媒体库并发扫描：根目录{len(existing_roots)} 任务{len(tasks)} "
+                f"线程{workers} 单设备上限{device_limit}"
+            )
+            with ThreadPoolExecutor(max_workers=min(workers, len(tasks)), thread_name_prefix="diskcleaner-scan") as pool:
+                scanned = list(pool.map(_scan, tasks))
+        for root_text, entries, task_stats in scanned:
+            root_entries, root_stats = results[root_text]
+            root_entries.extend(entries)
+            for key, value in task_stats.items():
+                root_stats[key] = root_stats.get(key, 0) + value
+        return results
+
+    def _get_library_index(self) -> Optional[LibraryFileIndex]:
+        if not self._library_index_enabled:
+            return None
+        if self._library_index is None:
+            try:
+                self._library_index = LibraryFileIndex(Path(self.get_data_path()) / "library_index.db")
+            except Exception as err:
+                logger.warning(f"{self.plugin_name}媒体库文件索引不可用，回退为目录遍历：{err}")
+                self._library_index_enabled = False
+                return None
+        return self._library_index
+
+    def _refresh_library_index(self, roots: List[Path]) -> set:
+        # 每轮对同一根目录只增量刷新一次，返回本轮已刷新（可直接查询索引）的根目录集合。
+        library_index = self._get_library_index()
+        if not library_index:
+            return set()
+        if self._library_index_roots is None:
+            self._library_index_roots = set()
+        pending = []
+        for root in roots or []:
+            try:
+                if root.as_posix() not in self._library_index_roots and root.exists() and root.is_dir():
+                    pending.append(root)
+            except Exception:
+                continue
+        if pending:
+            started = time.time()
+            try:
+                stats = library_index.refresh(
+                    pending,
+                    workers=self._library_scan_workers,
+                    device_limit=self._library_scan_device_limit,
+                )
+            except Exception as err:
+                logger.warning(f"{self.plugin_name}媒体库文件索引刷新失败，回退为目录遍历：{err}")
+                return set(self._library_index_roots)
+            self._library_index_roots.update(root.as_posix() for root in pending)
+            logger.info(
+                f"{self.plugin_name}媒体库文件索引刷新：根目录{len(pending)} 目录{stats.get('dirs_total', 0)} "
+                f"重新列举{stats.get('dirs_rescanned', 0)} 更新文件{stats.get('files_updated', 0)} "
+                f"移除目录{stats.get('dirs_removed', 0)} 耗时{time.time() - started:.2f}s"
+            )
+        return set(self._library_index_roots)
+
+    def _library_index_covers(self, path: Path) -> bool:
+        if not self._library_index or not self._library_index_roots:
+            return False
+        return self._policy().in_roots(Path(path), sorted(self._library_index_roots))
+
+    def _forget_library_index_path(self, path: Path):
+        if not self._library_index or not self._library_index_covers(path):
+            return
+        try:
+            self._library_index.forget(path)
+        except Exception as err:
+            logger.debug(f"{self.plugin_name}媒体库文件索引同步删除失败：{path} err={err}")
+
+    def _pop_library_candidate(self, candidate_heap: List[tuple], skipped_paths: Optional[set] = None) -> Optional[dict]:
+        skipped_paths = skipped_paths or set()
+        while candidate_heap:
+            priority, effective_ts, seq, candidate = heapq.heappop(candidate_heap)
+            path: Path = candidate.get("path")
+            if not path or path.as_posix() in skipped_paths:
+                continue
+            try:
+                # 前序删除可能已连带清理（如整季目录），出队时再确认一次。
+                if not path.exists():
+                    continue
+                current_stat = path.stat()
+            except Exception:
+                continue
+            # 索引中的 atime 可能已过期（目录 mtime 不反映文件访问），按最新值重算后重新入堆。
+            current_atime = current_stat.st_atime or current_stat.st_mtime
+            if current_atime > float(candidate.get("atime") or 0):
+                candidate["atime"] = current_atime
+                refreshed_ts = self._effective_access_ts(
+                    path=path,
+                    history=candidate.get("history"),
+                    fallback_ts=current_atime,
+                )
+                if refreshed_ts > effective_ts:
+                    heapq.heappush(candidate_heap, (priority, int(refreshed_ts), seq, candidate))
+                    continue
+            logger.info(
+                f"{self.plugin_name}媒体候选出队：{path.as_posix()} "
+                f"(剩余候选 {len(candidate_heap)} 条)"
+            )
+            return {
+                "path": path,
+                "atime": effective_ts,
+                "raw_atime": candidate.get("atime"),
+            }
+        return None
 
     @staticmethod
     def _normalize_media_priority(value: Any) -> str:
@@ -2851,13 +4149,13 @@ class DiskCleaner(_PluginBase):
         except Exception:
             return False
         cache_key = str(tmdb_id)
-        cached = self._tv_end_state_cache.get(cache_key)
+        cached = self._get_tv_end_state(cache_key)
         if cached is not None:
             return bool(cached)
         try:
             tmdb_info = self.chain.tmdb_info(tmdbid=tmdb_id, mtype=MediaType.TV) if self.chain else None
             if not isinstance(tmdb_info, dict) or not tmdb_info:
-                self._tv_end_state_cache[cache_key] = False
+                self._set_tv_end_state(cache_key, ended=False, state="error")
                 return False
             status_text = str(tmdb_info.get("status") or "").strip().lower()
             ended_status = {"ended", "canceled", "cancelled", "已完结", "完结", "已取消", "取消"}
@@ -2866,12 +4164,105 @@ class DiskCleaner(_PluginBase):
                 is_ended = status_text in ended_status
             elif tmdb_info.get("in_production") is False:
                 is_ended = True
-            self._tv_end_state_cache[cache_key] = bool(is_ended)
+            self._set_tv_end_state(cache_key, ended=is_ended, state="ended" if is_ended else "returning")
             return bool(is_ended)
         except Exception as err:
             logger.warning(f"{self.plugin_name}查询TMDB电视剧状态失败 tmdbid={tmdb_id}: {err}")
-            self._tv_end_state_cache[cache_key] = False
+            self._set_tv_end_state(cache_key, ended=False, state="error")
+            return False
+
+    def _tv_end_state_entries(self) -> Dict[str, dict]:
+        # 完结状态缓存持久化在插件数据中，重启与保存配置后继续沿用，按状态分别过期。
+        if self._tv_end_state_cache is None:
+            stored = self.get_data("tv_end_state_cache")
+            self._tv_end_state_cache = dict(stored) if isinstance(stored, dict) else {}
+            self._tv_end_state_dirty = False
+        return self._tv_end_state_cache
+
+    def _is_tv_end_state_fresh(self, entry: Any, now: Optional[float] = None) -> bool:
+        if not isinstance(entry, dict):
             return False
+        ttl = self._tv_end_state_ttl.get(str(entry.get("state") or ""), 0)
+        fetched_at = self._safe_float(entry.get("fetched_at"), 0.0)
+        return fetched_at > 0 and (now or time.time()) - fetched_at < ttl
+
+    def _get_tv_end_state(self, cache_key: str) -> Optional[bool]:
+        with self._tv_end_state_lock:
+            entry = self._tv_end_state_entries().get(cache_key)
+        if not self._is_tv_end_state_fresh(entry):
+            return None
+        return bool(entry.get("ended"))
+
+    def _set_tv_end_state(self, cache_key: str, ended: bool, state: str):
+        with self._tv_end_state_lock:
+            self._tv_end_state_entries()[cache_key] = {
+                "ended": bool(ended),
+                "state": state,
+                "fetched_at": int(time.time()),
+            }
+            self._tv_end_state_dirty = True
+
+    def _prefetch_tv_end_states(self, histories: List[Any]) -> int:
+        if not self._tv_complete_only or not self.chain:
+            return 0
+        pending: List[int] = []
+        seen = set()
+        for history in histories or []:
+            if not history or self._history_media_type_key(history) != "tv":
+                continue
+            try:
+                tmdb_id = int(getattr(history, "tmdbid", None))
+            except Exception:
+                continue
+            if tmdb_id in seen:
+                continue
+            seen.add(tmdb_id)
+            if self._get_tv_end_state(str(tmdb_id)) is None:
+                pending.append(tmdb_id)
+        if len(pending) <= 1:
+            for tmdb_id in pending:
+                self._is_tv_series_ended_by_tmdb(tmdb_id)
+            return len(pending)
+
+        # 有界线程池 + 固定发起间隔限速，单轮耗时取决于最慢的一批查询而非查询总数。
+        interval = 1.0 / max(0.1, float(self._tmdb_prefetch_rate or 0.1))
+        slot_lock = threading.Lock()
+        next_slot = [time.monotonic()]
+
+        def _fetch(tmdb_id: int):
+            with slot_lock:
+                now = time.monotonic()
+                start_at = max(next_slot[0], now)
+                next_slot[0] = start_at + interval
+            if start_at > now:
+                time.sleep(start_at - now)
+            self._is_tv_series_ended_by_tmdb(tmdb_id)
+
+        started = time.time()
+        workers = max(1, min(int(self._tmdb_prefetch_workers or 1), len(pending)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="diskcleaner-tmdb") as pool:
+            list(pool.map(_fetch, pending))
+        logger.info(
+            f"{self.plugin_name}TMDB完结状态预取：剧集{len(seen)} 需查询{len(pending)} "
+            f"线程{workers} 耗时{time.time() - started:.2f}s"
+        )
+        return len(pending)
+
+    def _flush_tv_end_state_cache(self):
+        if self._tv_end_state_cache is None or not self._tv_end_state_dirty:
+            return
+        now = time.time()
+        fresh = {
+            key: entry
+            for key, entry in self._tv_end_state_cache.items()
+            if self._is_tv_end_state_fresh(entry, now=now)
+        }
+        try:
+            self.save_data("tv_end_state_cache", fresh)
+            self._tv_end_state_cache = fresh
+            self._tv_end_state_dirty = False
+        except Exception as err:
+            logger.warning(f"{self.plugin_name}保存电视剧完结状态缓存失败：{err}")
 
     def _effective_access_ts(self, path: Optional[Path], history: Any, fallback_ts: Optional[float]) -> int:
         playback_ts = self._get_history_playback_ts(history)
@@ -2907,6 +4298,11 @@ class DiskCleaner(_PluginBase):
         if cached_ts is not None:
             return cached_ts or None
 
+        indexed_ts = self._playback_index_lookup(mtype, tmdbid, season)
+        if indexed_ts is not None:
+            self._playback_ts_cache[cache_key] = indexed_ts
+            return indexed_ts or None
+
         try:
             if not self._mediaserver_oper:
                 self._mediaserver_oper = MediaServerOper()
@@ -2930,14 +4326,247 @@ class DiskCleaner(_PluginBase):
             item_info = self._mediaserver_chain.iteminfo(server=server, item_id=item_id)
             user_state = getattr(item_info, "user_state", None)
             last_played = getattr(user_state, "last_played_date", None) if user_state else None
-            ts = self._parse_datetime_to_ts(last_played) or 0
+            ts = self._parse_played_ts(last_played) or 0
             self._playback_ts_cache[cache_key] = ts
+            if ts:
+                self._playback_index_merge(self._playback_index_key(mtype, tmdbid, season), ts)
             return ts or None
         except Exception as err:
             logger.debug(f"{self.plugin_name}读取播放历史失败：{err}")
             self._playback_ts_cache[cache_key] = 0
             return None
 
+    @classmethod
+    def _parse_played_ts(cls, value: Any) -> Optional[int]:
+        ts = cls._parse_datetime_to_ts(value)
+        if ts or not value:
+            return ts
+        # 媒体服务器常返回 ISO 8601（如 2024-01-01T12:00:00.0000000Z）
+        text = str(value).strip().replace("Z", "+00:00")
+        text = re.sub(r"(\.\d{6})\d+", r"\1", text)
+        try:
+            return int(datetime.fromisoformat(text).timestamp())
+        except Exception:
+            return None
+
+    def _playback_index_key(self, mtype: Any, tmdbid: Any, season: Optional[int] = None) -> str:
+        return f"{self._media_type_key(mtype)}:{tmdbid}:{season if season is not None else ''}"
+
+    def _load_playback_index(self) -> dict:
+        # 播放记录索引持久化在插件数据中：
+        # {"updated_at", "complete", "items": {类型:tmdbid:季 -> 最近播放时间}, "watermarks": {服务器 -> 已同步到的播放时间},
+        #  "series_tmdb": {服务器:剧集ID -> tmdbid}, "season_servers": {服务器 -> 已导入分季播放记录},
+        #  "seasons_complete": 全部服务器均已导入分季记录}
+        if self._playback_index is None:
+            stored = self.get_data("playback_index")
+            if not isinstance(stored, dict) or not isinstance(stored.get("items"), dict):
+                stored = {"updated_at": 0, "complete": False, "items": {}}
+            stored.setdefault("watermarks", {})
+            stored.setdefault("series_tmdb", {})
+            stored.setdefault("season_servers", {})
+            self._playback_index = stored
+        return self._playback_index
+
+    def _playback_index_merge(self, key: str, ts: int) -> bool:
+        items = self._load_playback_index()["items"]
+        if int(ts or 0) > int(items.get(key) or 0):
+            items[key] = int(ts)
+            self._playback_index_dirty = True
+            return True
+        return False
+
+    def _flush_playback_index(self):
+        if self._playback_index is None or not self._playback_index_dirty:
+            return
+        try:
+            self.save_data("playback_index", self._sanitize_for_json(self._playback_index))
+            self._playback_index_dirty = False
+        except Exception as err:
+            logger.warning(f"{self.plugin_name}保存播放记录索引失败：{err}")
+
+    def _playback_index_lookup(self, mtype: Any, tmdbid: Any, season: Optional[int]) -> Optional[int]:
+        index = self._load_playback_index()
+        items = index.get("items") or {}
+        season_key = self._playback_index_key(mtype, tmdbid, season)
+        if season_key in items:
+            return int(items.get(season_key) or 0)
+        series_key = self._playback_index_key(mtype, tmdbid)
+        if season is not None and self._media_type_key(mtype) == "tv":
+            # 剧集级时间来自任意一季的播放，不能代表本季：剧集有播放记录但本季未入索引时，
+            # 仅在分季记录已全量导入时视为本季未播放，否则改为逐条查询
+            if series_key in items:
+                return 0 if index.get("seasons_complete") else None
+            return 0 if index.get("complete") else None
+        if series_key in items:
+            return int(items.get(series_key) or 0)
+        # 批量导入确认媒体服务器提供了播放状态时，索引未命中即视为未播放，不再逐条查询。
+        return 0 if index.get("complete") else None
+
+    def _refresh_playback_index(self, force: bool = False) -> int:
+        index = self._load_playback_index()
+        interval = max(1, int(self._playback_index_refresh_hours)) * 3600
+        if not force and time.time() - int(index.get("updated_at") or 0) < interval:
+            return 0
+        services = MediaServerHelper().get_services(
+            name_filters=self._media_servers if self._media_servers else None
+        )
+        if not services:
+            return 0
+        if not self._mediaserver_chain:
+            self._mediaserver_chain = MediaServerChain()
+
+        started = time.time()
+        scanned = 0
+        updated = 0
+        has_user_state = False
+        full_servers = 0
+        incremental_servers = 0
+        failed_servers: List[str] = []
+        watermarks = index.setdefault("watermarks", {})
+        season_servers = index.setdefault("season_servers", {})
+        for server_name, service in services.items():
+            if not force and watermarks.get(server_name):
+                try:
+                    result = self._refresh_playback_incremental(index, server_name, service)
+                except Exception as err:
+                    logger.warning(f"{self.plugin_name}增量读取播放记录失败，改用全量读取 {server_name}：{err}")
+                    result = None
+                if result is not None:
+                    incremental_servers += 1
+                    scanned += result[0]
+                    updated += result[1]
+                    continue
+            full_servers += 1
+            try:
+                latest_ts = 0
+                libraries = self._mediaserver_chain.librarys(server=server_name, hidden=True) or []
+                for library in libraries:
+                    library_id = getattr(library, "id", None)
+                    if not library_id:
+                        continue
+                    for item in self._mediaserver_chain.items(server=server_name, library_id=library_id) or []:
+                        scanned += 1
+                        tmdbid = getattr(item, "tmdbid", None)
+                        user_state = getattr(item, "user_state", None)
+                        if user_state is not None:
+                            has_user_state = True
+                        if not tmdbid or not user_state:
+                            continue
+                        ts = self._parse_played_ts(getattr(user_state, "last_played_date", None))
+                        if not ts:
+                            continue
+                        latest_ts = max(latest_ts, ts)
+                        # 媒体库列表为剧集级条目，只写剧集键；分季时间由下方单集列表导入
+                        if self._playback_index_merge(
+                            self._playback_index_key(getattr(item, "item_type", None), tmdbid), ts
+                        ):
+                            updated += 1
+                watermarks[server_name] = max(int(watermarks.get(server_name) or 0), latest_ts) or int(time.time())
+            except Exception as err:
+                failed_servers.append(server_name)
+                logger.warning(f"{self.plugin_name}批量读取播放记录失败 {server_name}：{err}")
+                continue
+            try:
+                result = self._refresh_playback_incremental(index, server_name, service, full=True)
+            except Exception as err:
+                logger.warning(f"{self.plugin_name}批量读取分季播放记录失败 {server_name}：{err}")
+                result = None
+            season_servers[server_name] = result is not None
+            if result is not None:
+                scanned += result[0]
+                updated += result[1]
+
+        index["updated_at"] = int(time.time())
+        if full_servers:
+            index["complete"] = bool((has_user_state or incremental_servers) and not failed_servers)
+        elif failed_servers:
+            index["complete"] = False
+        index["seasons_complete"] = bool(index.get("complete")) and all(
+            season_servers.get(server_name) for server_name in services
+        )
+        self._playback_index_dirty = True
+        self._flush_playback_index()
+        logger.info(
+            f"{self.plugin_name}播放记录索引刷新：服务器{len(services)}（全量{full_servers} 增量{incremental_servers}） "
+            f"条目{scanned} 更新{updated} 索引总数{len(index.get('items') or {})} 耗时{time.time() - started:.2f}s"
+        )
+        return updated
+
+    def _refresh_playback_incremental(
+        self,
+        index: dict,
+        server_name: str,
+        service: Any,
+        full: bool = False,
+    ) -> Optional[Tuple[int, int]]:
+        # Emby/Jellyfin：按 DatePlayed 倒序分页读取已播放的电影/单集，读到水位线之前即停止（full 时读完全部）；
+        # 单集带季号，写入分季键与剧集键。不支持的服务器返回 None，由调用方全量读取。
+        instance = getattr(service, "instance", None)
+        if not instance or not callable(getattr(instance, "get_data", None)):
+            return None
+        watermarks = index.setdefault("watermarks", {})
+        series_tmdb = index.setdefault("series_tmdb", {})
+        since = 0 if full else int(watermarks.get(server_name) or 0) - int(self._playback_watermark_overlap)
+        page_size = max(1, int(self._playback_incremental_page))
+        max_pages = None if full else max(1, int(self._playback_incremental_max_pages))
+        scanned = 0
+        updated = 0
+        latest_ts = 0
+        played: List[Tuple[str, Any, Optional[int], int, Optional[str]]] = []
+        for page in (itertools.count() if max_pages is None else range(max_pages)):
+            res = instance.get_data(
+                "[HOST]Users/[USER]/Items?Recursive=true&IncludeItemTypes=Movie,Episode&IsPlayed=true"
+                f"&SortBy=DatePlayed&SortOrder=Descending&Fields=ProviderIds"
+                f"&StartIndex={page * page_size}&Limit={page_size}&api_key=[APIKEY]"
+            )
+            if res is None or getattr(res, "status_code", 200) != 200:
+                raise RuntimeError(f"HTTP {getattr(res, 'status_code', '-')}")
+            entries = (res.json() or {}).get("Items") or []
+            reached = False
+            for entry in entries:
+                scanned += 1
+                ts = self._parse_played_ts(((entry or {}).get("UserData") or {}).get("LastPlayedDate"))
+                if not ts:
+                    continue
+                if ts < since:
+                    reached = True
+                    break
+                latest_ts = max(latest_ts, ts)
+                if entry.get("Type") == "Episode":
+                    played.append(("tv", None, entry.get("ParentIndexNumber"), ts, entry.get("SeriesId")))
+                else:
+                    played.append(("movie", (entry.get("ProviderIds") or {}).get("Tmdb"), None, ts, None))
+            if reached or len(entries) < page_size:
+                break
+
+        unknown = sorted({
+            series_id for mtype, _, _, _, series_id in played
+            if series_id and f"{server_name}:{series_id}" not in series_tmdb
+        })
+        for start in range(0, len(unknown), 50):
+            res = instance.get_data(
+                f"[HOST]Users/[USER]/Items?Ids={','.join(unknown[start:start + 50])}"
+                f"&Fields=ProviderIds&api_key=[APIKEY]"
+            )
+            if res is None or getattr(res, "status_code", 200) != 200:
+                raise RuntimeError(f"HTTP {getattr(res, 'status_code', '-')}")
+            for entry in (res.json() or {}).get("Items") or []:
+                series_tmdb[f"{server_name}:{entry.get('Id')}"] = (entry.get("ProviderIds") or {}).get("Tmdb") or ""
+
+        for mtype, tmdbid, season, ts, series_id in played:
+            if mtype == "tv":
+                tmdbid = series_tmdb.get(f"{server_name}:{series_id}")
+            if not tmdbid:
+                continue
+            keys = [self._playback_index_key(mtype, tmdbid)]
+            if season is not None:
+                keys.append(self._playback_index_key(mtype, tmdbid, int(season)))
+            for key in keys:
+                if self._playback_index_merge(key, ts):
+                    updated += 1
+        watermarks[server_name] = max(int(watermarks.get(server_name) or 0), latest_ts)
+        return scanned, updated
+
     @staticmethod
     def _extract_season_number(value: Any) -> Optional[int]:
         if value is None:
@@ -2970,6 +4599,8 @@ class DiskCleaner(_PluginBase):
         best = None
         min_seconds = int(min_days * 86400) if min_days else 0
         stats: Dict[str, Dict[str, Any]] = {}
+        store = self._torrent_snapshot_store()
+        self._prefetch_torrent_snapshots(store, services)
 
         for downloader_name, service in services.items():
             stats_item = {
@@ -2989,30 +4620,27 @@ class DiskCleaner(_PluginBase):
                 stats_item["inactive"] = True
                 continue
 
-            try:
-                service_type = str(getattr(service, "type", "") or "").strip().lower()
-                torrents = self._list_completed_torrents_for_cleanup(instance=instance, service_type=service_type)
-            except Exception as err:
-                stats_item["error"] = str(err)
-                logger.warning(f"{self.plugin_name}读取下载器完成任务失败 {downloader_name}：{err}")
+            snapshot = self._ensure_completed_torrent_snapshot(store, downloader_name, service)
+            if snapshot.get("error"):
+                stats_item["error"] = snapshot.get("error")
                 continue
-            stats_item["total"] = len(torrents)
-            for torrent in torrents:
-                torrent_hash = self._torrent_hash(torrent)
-                if not torrent_hash:
-                    stats_item["invalid_hash"] += 1
+            removed = snapshot["removed"]
+            entries = snapshot["completed"]
+            stats_item["total"] = len(snapshot["by_hash"]) + snapshot.get("invalid_hash", 0)
+            stats_item["invalid_hash"] = snapshot.get("invalid_hash", 0)
+            # 快照已按做种时长降序，第一个可选种子即为该下载器最优；继续遍历以保持可选数统计准确
+            for seed_seconds, torrent_hash in entries:
+                if torrent_hash in removed:
                     continue
                 if torrent_hash in skipped_hashes:
                     stats_item["skip_hash"] += 1
                     continue
-
-                seed_seconds = self._torrent_seed_seconds(torrent)
                 if seed_seconds < min_seconds:
                     stats_item["below_min"] += 1
                     continue
-
                 stats_item["eligible"] += 1
                 if not best or seed_seconds > best["seed_seconds"]:
+                    _, torrent = snapshot["by_hash"].get(torrent_hash)
                     best = {
                         "downloader": downloader_name,
                         "hash": torrent_hash,
@@ -3139,6 +4767,330 @@ class DiskCleaner(_PluginBase):
             return self._safe_list_torrents(instance=instance, status=["stopped"]) or []
         return self._safe_list_torrents(instance=instance, status="paused") or []
 
+    def _torrent_snapshot_store(self) -> Dict[str, dict]:
+        # 任务周期外（接口/测试直接调用）不复用快照，避免读到上一轮的旧数据
+        if self._torrent_snapshots is None:
+            return {}
+        return self._torrent_snapshots
+
+    @staticmethod
+    def _torrent_snapshot_entry(store: Dict[str, dict], downloader_name: str) -> dict:
+        snapshot = store.get(downloader_name)
+        if snapshot is None:
+            snapshot = {
+                "completed": None,
+                "by_hash": {},
+                "invalid_hash": 0,
+                "error": "",
+                "overview": None,
+                "overview_error": "",
+                "replica": None,
+                "replica_target": None,
+                "full": None,
+                "removed": set(),
+            }
+            store[downloader_name] = snapshot
+        return snapshot
+
+    def _ensure_completed_torrent_snapshot(self, store: Dict[str, dict], downloader_name: str, service: Any) -> dict:
+        snapshot = self._torrent_snapshot_entry(store, downloader_name)
+        if snapshot["completed"] is not None or snapshot["error"]:
+            return snapshot
+        try:
+            full = self._snapshot_full_torrents(snapshot, downloader_name, service)
+            if full is not None:
+                torrents = [torrent for torrent in full if self._is_torrent_completed(torrent)]
+            else:
+                service_type = str(getattr(service, "type", "") or "").strip().lower()
+                torrents = self._list_completed_torrents_for_cleanup(instance=service.instance, service_type=service_type)
+        except Exception as err:
+            snapshot["error"] = str(err)
+            logger.warning(f"{self.plugin_name}读取下载器完成任务失败 {downloader_name}：{err}")
+            return snapshot
+
+        entries: List[Tuple[int, str]] = []
+        by_hash: Dict[str, Tuple[int, Any]] = {}
+        invalid_hash = 0
+        for torrent in torrents:
+            torrent_hash = self._torrent_hash(torrent)
+            if not torrent_hash:
+                invalid_hash += 1
+                continue
+            if torrent_hash in by_hash:
+                continue
+            seed_seconds = self._torrent_seed_seconds(torrent)
+            by_hash[torrent_hash] = (seed_seconds, torrent)
+            entries.append((seed_seconds, torrent_hash))
+        # 稳定排序：做种时长相同保持下载器返回顺序
+        entries.sort(key=lambda item: item[0], reverse=True)
+        snapshot["completed"] = entries
+        snapshot["by_hash"] = by_hash
+        snapshot["invalid_hash"] = invalid_hash
+        return snapshot
+
+    def _ensure_overview_torrent_snapshot(self, store: Dict[str, dict], downloader_name: str, service: Any) -> dict:
+        snapshot = self._torrent_snapshot_entry(store, downloader_name)
+        if snapshot["overview"] is not None or snapshot["overview_error"]:
+            return snapshot
+        try:
+            total = self._snapshot_full_torrents(snapshot, downloader_name, service) or []
+        except Exception as err:
+            snapshot["overview_error"] = str(err)
+            return snapshot
+
+        if not total:
+            service_type = str(getattr(service, "type", "") or "").strip().lower()
+            completed_snapshot = self._ensure_completed_torrent_snapshot(store, downloader_name, service)
+            completed_fallback = [torrent for _, torrent in completed_snapshot["by_hash"].values()]
+            downloading_fallback = self._list_downloading_torrents_for_cleanup(
+                instance=service.instance, service_type=service_type
+            )
+            paused_fallback = self._list_paused_torrents_for_cleanup(instance=service.instance, service_type=service_type)
+            merged = completed_fallback + downloading_fallback + paused_fallback
+            dedup: Dict[str, Any] = {}
+            for torrent in merged:
+                torrent_hash = self._torrent_hash(torrent)
+                if torrent_hash:
+                    dedup[torrent_hash] = torrent
+            total = list(dedup.values()) if dedup else merged
+
+        # 一次分类：(hash, 做种秒数, 已完成, 下载中, 暂停)
+        overview: List[Tuple[Optional[str], int, bool, bool, bool]] = []
+        for torrent in total:
+            completed = self._is_torrent_completed(torrent)
+            overview.append((
+                self._torrent_hash(torrent),
+                self._torrent_seed_seconds(torrent) if completed else 0,
+                completed,
+                self._is_torrent_downloading(torrent),
+                self._is_torrent_paused(torrent),
+            ))
+        snapshot["overview"] = overview
+        return snapshot
+
+    def _prefetch_torrent_snapshots(self, store: Dict[str, dict], services: Dict[str, Any], overview: bool = False):
+        # 并发读取各下载器；工作线程只写私有快照与暂存副本，按时完成才合入，超时线程的结果直接丢弃
+        layer = "overview" if overview else "completed"
+        error_key = "overview_error" if overview else "error"
+        loader = self._ensure_overview_torrent_snapshot if overview else self._ensure_completed_torrent_snapshot
+        pending: Dict[str, Any] = {}
+        for downloader_name, service in services.items():
+            instance = getattr(service, "instance", None)
+            if not instance:
+                continue
+            if hasattr(instance, "is_inactive") and instance.is_inactive():
+                continue
+            entry = store.get(downloader_name) or {}
+            if entry.get(layer) is not None or entry.get(error_key):
+                continue
+            pending[downloader_name] = service
+        timeout = int(self._downloader_timeout or 0)
+        if not pending or (len(pending) == 1 and timeout <= 0):
+            return
+
+        replicas = self._load_torrent_replicas()
+        private: Dict[str, Dict[str, dict]] = {}
+        staged: Dict[str, Tuple[Optional[dict], Dict[str, Optional[dict]]]] = {}
+        for downloader_name in pending:
+            base = replicas.get(downloader_name)
+            target: Dict[str, Optional[dict]] = {downloader_name: base} if downloader_name in replicas else {}
+            staged[downloader_name] = (base, target)
+            if downloader_name in store:
+                entry = dict(store[downloader_name])
+            else:
+                entry = self._torrent_snapshot_entry({}, downloader_name)
+            entry["replica_target"] = target
+            private[downloader_name] = {downloader_name: entry}
+        pool = ThreadPoolExecutor(max_workers=min(8, len(pending)), thread_name_prefix="diskcleaner-downloader")
+        futures = {
+            pool.submit(loader, private[downloader_name], downloader_name, service): downloader_name
+            for downloader_name, service in pending.items()
+        }
+        done, not_done = wait(list(futures.keys()), timeout=timeout if timeout > 0 else None)
+        pool.shutdown(wait=False)
+        for future in done:
+            downloader_name = futures[future]
+            try:
+                entry = future.result()
+            except Exception as err:
+                self._torrent_snapshot_entry(store, downloader_name)[error_key] = str(err)
+                continue
+            entry["replica_target"] = None
+            store[downloader_name] = entry
+            self._commit_torrent_replica(downloader_name, *staged[downloader_name])
+        for future in not_done:
+            downloader_name = futures[future]
+            self._torrent_snapshot_entry(store, downloader_name)[error_key] = f"读取超时(>{timeout}秒)"
+            logger.warning(f"{self.plugin_name}读取下载器任务超时，本轮跳过 {downloader_name}（>{timeout}秒）")
+
+    def _forget_torrent_snapshot(self, downloader: str, torrent_hash: str):
+        if not self._torrent_snapshots:
+            return
+        snapshot = self._torrent_snapshots.get(downloader)
+        if not snapshot:
+            return
+        snapshot["removed"].add(torrent_hash)
+        snapshot["by_hash"].pop(torrent_hash, None)
+        replica = (self._torrent_replicas or {}).get(downloader)
+        if isinstance(replica, dict) and (replica.get("torrents") or {}).pop(torrent_hash, None) is not None:
+            self._torrent_replicas_dirty = True
+
+    def _snapshot_replica_torrents(self, snapshot: dict, downloader_name: str, service: Any) -> Optional[List[dict]]:
+        # 同一轮内完成/总览两层共用一次同步结果；False 表示不支持增量同步
+        if snapshot["replica"] is None:
+            replica = self._sync_torrent_replica(downloader_name, service, snapshot.get("replica_target"))
+            snapshot["replica"] = replica if replica is not None else False
+        return snapshot["replica"] if snapshot["replica"] is not False else None
+
+    def _snapshot_full_torrents(self, snapshot: dict, downloader_name: str, service: Any) -> Optional[List[Any]]:
+        # 每轮每个下载器只读取一次全量列表（优先增量副本），完成/总览两层都由它派生；
+        # 下载器不支持全量读取或返回空列表时返回 None，由调用方按状态分别读取
+        replica = self._snapshot_replica_torrents(snapshot, downloader_name, service)
+        if replica is not None:
+            return replica
+        if snapshot.get("full") is None:
+            listed = self._safe_list_torrents(instance=service.instance)
+            snapshot["full"] = listed if listed else False
+        return snapshot["full"] or None
+
+    def _load_torrent_replicas(self) -> Dict[str, dict]:
+        # {下载器名: {"type", "rid", "synced_at", "torrents": {hash -> 所需字段}}}
+        if self._torrent_replicas is None:
+            stored = self.get_data("torrent_replica")
+            self._torrent_replicas = stored if isinstance(stored, dict) else {}
+        return self._torrent_replicas
+
+    def _flush_torrent_replicas(self):
+        if self._torrent_replicas is None or not self._torrent_replicas_dirty:
+            return
+        try:
+            self.save_data("torrent_replica", self._sanitize_for_json(self._torrent_replicas))
+            self._torrent_replicas_dirty = False
+        except Exception as err:
+            logger.warning(f"{self.plugin_name}保存下载器任务副本失败：{err}")
+
+    def _commit_torrent_replica(
+        self,
+        downloader_name: str,
+        base: Optional[dict],
+        target: Dict[str, Optional[dict]],
+    ):
+        # 暂存副本与读取时的基线不同才合入；None 表示同步失败需丢弃旧副本
+        if downloader_name not in target or target[downloader_name] is base:
+            return
+        replica = target[downloader_name]
+        replicas = self._load_torrent_replicas()
+        if replica is None:
+            replicas.pop(downloader_name, None)
+        else:
+            replicas[downloader_name] = replica
+        self._torrent_replicas_dirty = True
+
+    def _sync_torrent_replica(
+        self,
+        downloader_name: str,
+        service: Any,
+        target: Optional[Dict[str, Optional[dict]]] = None,
+    ) -> Optional[List[dict]]:
+        # target 为空时直接写入共享副本；并发预取时写入调用方的暂存字典，由调用方决定是否合入
+        if not self._downloader_incremental_sync:
+            return None
+        staging: Dict[str, Optional[dict]] = {}
+        if target is None:
+            replicas = self._load_torrent_replicas()
+            if downloader_name in replicas:
+                staging[downloader_name] = replicas[downloader_name]
+        else:
+            staging = target
+        base = staging.get(downloader_name)
+        instance = getattr(service, "instance", None)
+        service_type = str(getattr(service, "type", "") or "").strip().lower()
+        torrents: Optional[List[dict]] = None
+        try:
+            if service_type == "qbittorrent" and getattr(instance, "qbc", None) is not None:
+                torrents = self._sync_qbittorrent_replica(downloader_name, instance.qbc, staging)
+            elif service_type == "transmission" and getattr(instance, "trc", None) is not None:
+                torrents = self._sync_transmission_replica(downloader_name, instance.trc, staging)
+        except Exception as err:
+            logger.warning(f"{self.plugin_name}下载器任务增量同步失败，改用全量读取 {downloader_name}：{err}")
+            if staging.get(downloader_name) is not None:
+                staging[downloader_name] = None
+            torrents = None
+        if target is None:
+            self._commit_torrent_replica(downloader_name, base, staging)
+        return torrents
+
+    def _sync_qbittorrent_replica(self, downloader_name: str, client: Any, replicas: Dict[str, Optional[dict]]) -> List[dict]:
+        replica = replicas.get(downloader_name)
+        if not isinstance(replica, dict) or replica.get("type") != "qbittorrent":
+            replica = {"type": "qbittorrent", "rid": 0, "torrents": {}}
+        data = client.sync_maindata(rid=int(replica.get("rid") or 0)) or {}
+        # rid 失效（如下载器重启、会话变更）时 qB 会返回 full_update，整体替换副本
+        torrents: Dict[str, dict] = {} if data.get("full_update") else dict(replica.get("torrents") or {})
+        for torrent_hash, fields in (data.get("torrents") or {}).items():
+            item = dict(torrents.get(torrent_hash) or {"hash": torrent_hash})
+            for key in self._QB_REPLICA_FIELDS:
+                if key in (fields or {}):
+                    item[key] = fields[key]
+            torrents[torrent_hash] = item
+        for torrent_hash in data.get("torrents_removed") or []:
+            torrents.pop(torrent_hash, None)
+        replicas[downloader_name] = {
+            "type": "qbittorrent",
+            "rid": int(data.get("rid") or 0),
+            "synced_at": int(time.time()),
+            "torrents": torrents,
+        }
+        return list(torrents.values())
+
+    @classmethod
+    def _transmission_replica_item(cls, torrent: Any) -> Optional[dict]:
+        fields = getattr(torrent, "fields", None)
+        if not isinstance(fields, dict):
+            fields = torrent if isinstance(torrent, dict) else {}
+        torrent_hash = fields.get("hashString")
+        if not torrent_hash:
+            return None
+        status = fields.get("status")
+        if isinstance(status, int) and 0 <= status < len(cls._TR_STATUS_NAMES):
+            status = cls._TR_STATUS_NAMES[status]
+        return {
+            "id": fields.get("id"),
+            "hashString": str(torrent_hash),
+            "name": fields.get("name") or "",
+            "status": str(status or ""),
+            "percentDone": fields.get("percentDone") or 0,
+            "doneDate": int(fields.get("doneDate") or 0),
+        }
+
+    def _sync_transmission_replica(self, downloader_name: str, client: Any, replicas: Dict[str, Optional[dict]]) -> List[dict]:
+        replica = replicas.get(downloader_name)
+        now = int(time.time())
+        torrents: Dict[str, dict] = {}
+        # recently-active 只覆盖最近约一分钟的变化，副本足够新时才能用它做增量
+        if (
+            isinstance(replica, dict)
+            and replica.get("type") == "transmission"
+            and now - int(replica.get("synced_at") or 0) < self._TR_RECENTLY_ACTIVE_SECONDS
+            and hasattr(client, "get_recently_active_torrents")
+        ):
+            active, removed_ids = client.get_recently_active_torrents(arguments=self._TR_REPLICA_FIELDS)
+            torrents = dict(replica.get("torrents") or {})
+            removed = set(removed_ids or [])
+            if removed:
+                torrents = {key: item for key, item in torrents.items() if item.get("id") not in removed}
+            for torrent in active or []:
+                item = self._transmission_replica_item(torrent)
+                if item:
+                    torrents[item["hashString"]] = item
+        else:
+            for torrent in client.get_torrents(arguments=self._TR_REPLICA_FIELDS) or []:
+                item = self._transmission_replica_item(torrent)
+                if item:
+                    torrents[item["hashString"]] = item
+        replicas[downloader_name] = {"type": "transmission", "synced_at": now, "torrents": torrents}
+        return list(torrents.values())
+
     def _collect_downloader_overview_stats(self, min_days: Optional[int], skipped_hashes: set) -> Tuple[dict, List[dict]]:
         services = self._resolve_downloader_services(name_filters=self._downloaders if self._downloaders else None)
         summary = {"total": 0, "completed": 0, "downloading": 0, "paused": 0, "eligible": 0}
@@ -3147,6 +5099,8 @@ class DiskCleaner(_PluginBase):
             return summary, details
 
         min_seconds = int(min_days * 86400) if min_days else 0
+        store = self._torrent_snapshot_store()
+        self._prefetch_torrent_snapshots(store, services, overview=True)
         for downloader_name, service in services.items():
             item = {
                 "name": downloader_name,
@@ -3165,41 +5119,25 @@ class DiskCleaner(_PluginBase):
             if hasattr(instance, "is_inactive") and instance.is_inactive():
                 item["inactive"] = True
                 continue
-            service_type = str(getattr(service, "type", "") or "").strip().lower()
-            try:
-                total = self._safe_list_torrents(instance=instance) or []
-            except Exception as err:
-                item["error"] = str(err)
+            snapshot = self._ensure_overview_torrent_snapshot(store, downloader_name, service)
+            if snapshot.get("overview_error"):
+                item["error"] = snapshot.get("overview_error")
                 continue
 
-            item["total"] = len(total)
-            if item["total"] <= 0:
-                completed_fallback = self._list_completed_torrents_for_cleanup(instance=instance, service_type=service_type)
-                downloading_fallback = self._list_downloading_torrents_for_cleanup(instance=instance, service_type=service_type)
-                paused_fallback = self._list_paused_torrents_for_cleanup(instance=instance, service_type=service_type)
-                merged = completed_fallback + downloading_fallback + paused_fallback
-                dedup: Dict[str, Any] = {}
-                for torrent in merged:
-                    torrent_hash = self._torrent_hash(torrent)
-                    if torrent_hash:
-                        dedup[torrent_hash] = torrent
-                total = list(dedup.values()) if dedup else merged
-                item["total"] = len(total)
-
-            completed_candidates: List[Any] = []
-            for torrent in total:
-                if self._is_torrent_completed(torrent):
-                    completed_candidates.append(torrent)
-            item["completed"] = len(completed_candidates)
-            item["downloading"] = len([torrent for torrent in total if self._is_torrent_downloading(torrent)])
-            item["paused"] = len([torrent for torrent in total if self._is_torrent_paused(torrent)])
-
+            removed = snapshot["removed"]
             eligible = 0
-            for torrent in completed_candidates:
-                torrent_hash = self._torrent_hash(torrent)
+            for torrent_hash, seed_seconds, completed, downloading, paused in snapshot["overview"]:
+                if torrent_hash and torrent_hash in removed:
+                    continue
+                item["total"] += 1
+                item["downloading"] += 1 if downloading else 0
+                item["paused"] += 1 if paused else 0
+                if not completed:
+                    continue
+                item["completed"] += 1
                 if not torrent_hash or torrent_hash in skipped_hashes:
                     continue
-                if self._torrent_seed_seconds(torrent) < min_seconds:
+                if seed_seconds < min_seconds:
                     continue
                 eligible += 1
             item["eligible"] = eligible
@@ -3237,6 +5175,12 @@ class DiskCleaner(_PluginBase):
         )
 
     def _collect_monitor_usage(self) -> dict:
+        # 删种会同步删除文件时，空间判断前先提交排队的删种
+        if self._torrent_delete_queue and self._delete_downloader_files:
+            self._flush_torrent_delete_queue(bound_only=True)
+        return self._measure_monitor_usage()
+
+    def _measure_monitor_usage(self) -> dict:
         return {
             "download": self._calc_usage(self._download_paths()),
             "library": self._calc_usage(self._library_paths()),
@@ -3419,18 +5363,133 @@ class DiskCleaner(_PluginBase):
             unique[norm.as_posix()] = norm
         return list(unique.values())
 
-    def _calc_usage(self, paths: List[Path]) -> dict:
+    def _path_device(self, path: Path) -> Optional[int]:
+        if self._path_device_cache is None:
+            self._path_device_cache = {}
+        key = Path(path).as_posix()
+        if key not in self._path_device_cache:
+            try:
+                self._path_device_cache[key] = int(os.stat(key).st_dev)
+            except Exception:
+                return None
+        return self._path_device_cache[key]
+
+    def _measure_device_usage(self, device: int, path: Path) -> Optional[dict]:
+        if self._device_usage_cache is None:
+            self._device_usage_cache = {}
+        cached = self._device_usage_cache.get(device)
+        if cached and time.time() - cached.get("measured_at", 0) < self._usage_cache_ttl:
+            return cached
         try:
-            total, free = SystemUtils.space_usage(paths)
+            disk = shutil.disk_usage(Path(path).as_posix())
         except Exception as err:
-            logger.warning(f"{self.plugin_name}统计磁盘空间失败：{err}")
-            total, free = 0, 0
+            logger.warning(f"{self.plugin_name}统计磁盘空间失败：{path} - {err}")
+            return None
+        measured = {"total": int(disk.total), "free": int(disk.free), "measured_at": time.time()}
+        self._device_usage_cache[device] = measured
+        if not self._dry_run and self._usage_projected_freed:
+            # 真实测量已包含此前的删除结果
+            self._usage_projected_freed.pop(device, None)
+        return measured
+
+    def _invalidate_usage_cache(self):
+        # 演练模式不会真正释放空间，保留预测值以便按预测结果结束循环
+        self._device_usage_cache = {}
+        if not self._dry_run:
+            self._usage_projected_freed = {}
+
+    def _project_usage_freed(self, path: Path, freed_bytes: int):
+        if freed_bytes <= 0:
+            return
+        node = Path(path)
+        device = None
+        while node and device is None:
+            device = self._path_device(node)
+            if node.parent == node:
+                break
+            node = node.parent
+        if device is None:
+            return
+        if self._usage_projected_freed is None:
+            self._usage_projected_freed = {}
+        self._usage_projected_freed[device] = self._usage_projected_freed.get(device, 0) + int(freed_bytes)
+
+    def _reclaimable_bytes(self, path: Path) -> int:
+        return self._reclaim_bytes([path])
+
+    def _reclaim_bytes(self, paths: List[Path]) -> int:
+        # 删除集合按 (dev, ino) 归并：某 inode 的全部硬链接都在集合内时才计入其大小，
+        # 集合外仍有硬链接的文件删除后不会释放空间。
+        inodes: Dict[Tuple[int, int], list] = {}
+        seen_paths = set()
+
+        def add(path_text: str, size: int, dev: int, ino: int, nlink: int):
+            if path_text in seen_paths:
+                return
+            seen_paths.add(path_text)
+            item = inodes.setdefault((dev, ino), [size, max(1, nlink), 0])
+            item[2] += 1
+
+        for path in paths or []:
+            if not path:
+                continue
+            path_text = Path(path).as_posix()
+            try:
+                stat = os.lstat(path_text)
+            except OSError:
+                continue
+            if not (os.path.isdir(path_text) and not os.path.islink(path_text)):
+                add(path_text, int(stat.st_size), int(stat.st_dev), int(stat.st_ino),
+                    int(getattr(stat, "st_nlink", 1) or 1))
+                continue
+            indexed = None
+            if self._library_index_covers(Path(path_text)):
+                try:
+                    indexed = self._library_index.subtree_inodes(Path(path_text))
+                except Exception:
+                    indexed = None
+            if indexed is not None:
+                for item in indexed:
+                    add(*item)
+                continue
+            for file_text, file_stat in self._scan_files(Path(path_text)):
+                add(Path(file_text).as_posix(), int(file_stat.st_size), int(file_stat.st_dev),
+                    int(file_stat.st_ino), int(getattr(file_stat, "st_nlink", 1) or 1))
+        return sum(size for size, nlink, links in inodes.values() if links >= nlink)
+
+    def _loop_usage(self, still_needed: Callable[[dict], bool]) -> Optional[dict]:
+        # 循环内按预测用量判断是否继续；预测已达标时做一次真实测量复核（演练模式不复核）。
+        usage = self._collect_monitor_usage()
+        if still_needed(usage):
+            return usage
+        if self._dry_run or not self._usage_projected_freed:
+            return None
+        self._invalidate_usage_cache()
+        usage = self._collect_monitor_usage()
+        return usage if still_needed(usage) else None
+
+    def _calc_usage(self, paths: List[Path]) -> dict:
+        # 同一文件系统上的多个目录只统计一次：按 st_dev 分组，每个设备一次 statvfs。
+        devices: Dict[int, Path] = {}
+        for path in paths or []:
+            device = self._path_device(path)
+            if device is not None and device not in devices:
+                devices[device] = path
+        projected = self._usage_projected_freed or {}
+        total, free = 0, 0
+        for device, path in devices.items():
+            measured = self._measure_device_usage(device, path)
+            if not measured:
+                continue
+            total += measured["total"]
+            free += min(measured["total"], measured["free"] + int(projected.get(device, 0)))
         used = max(0, total - free)
         free_percent = (free * 100 / total) if total else 0
         used_percent = (used * 100 / total) if total else 0
 
         return {
             "paths": [path.as_posix() for path in paths],
+            "devices": len(devices),
             "total": total,
             "free": free,
             "used": used,
@@ -3485,19 +5544,131 @@ class DiskCleaner(_PluginBase):
             return default_value
         return value
 
-    @staticmethod
-    def _format_threshold_value(value: Any, mode: str) -> str:
-        try:
-            val = float(value)
-        except Exception:
-            val = 10.0 if mode == "percent" else 100.0
-        if mode == "percent":
-            if abs(val - int(val)) < 1e-9:
-                return f"{int(val)}%"
-            return f"{val:.1f}%"
-        if abs(val - int(val)) < 1e-9:
-            return f"{int(val)}G"
-        return f"{val:.1f}G"
+    @staticmethod
+    def _format_threshold_value(value: Any, mode: str) -> str:
+        try:
+            val = float(value)
+        except Exception:
+            val = 10.0 if mode == "percent" else 100.0
+        if mode == "percent":
+            if abs(val - int(val)) < 1e-9:
+                return f"{int(val)}%"
+            return f"{val:.1f}%"
+        if abs(val - int(val)) < 1e-9:
+            return f"{int(val)}G"
+        return f"{val:.1f}G"
+
+    @classmethod
+    def _parse_target_value(cls, raw_value: Any, mode: str) -> float:
+        if raw_value is None or str(raw_value).strip() == "":
+            return 0.0
+        return max(0.0, cls._parse_threshold_value(raw_value, mode))
+
+    @classmethod
+    def _format_target_value(cls, value: Any, mode: str) -> str:
+        if not value or float(value) <= 0:
+            return ""
+        return cls._format_threshold_value(value, mode)
+
+    @staticmethod
+    def _usage_deficit_bytes(usage: dict, mode: str, threshold: float, target: float) -> int:
+        # 距离清理目标还差多少字节；目标未配置或低于阈值时，按刚好脱离阈值计算。
+        if not usage or not usage.get("total"):
+            return 0
+        total = int(usage.get("total") or 0)
+        free = int(usage.get("free") or 0)
+        goal = max(float(threshold or 0), float(target or 0))
+        if mode == "percent":
+            goal_free = int(total * min(100.0, goal) / 100)
+        else:
+            goal_free = int(goal * (1024 ** 3))
+        if free > goal_free:
+            return 0
+        return goal_free - free + 1
+
+    def _plan_deficit_batch(
+        self,
+        next_candidate: Callable[[], Any],
+        estimate: Callable[[Any], Tuple[Optional[str], int]],
+        deficit: int,
+        actions_count: int,
+    ) -> Tuple[List[Any], int]:
+        # 按候选顺序（旧→新）累加预计释放容量，覆盖缺口即停止，避免超额删除；
+        # 同一清理目标只计一次，并受单轮条目数、单轮容量与当日容量上限约束。
+        # 缺口为 0（非空间类触发）时每批只取一条，保持逐条判断；
+        # 某项预计释放为 0（无法估算）时计入该项后即停止，删除后重新测量再规划。
+        max_items = max(0, self._max_delete_items - actions_count) if self._max_delete_items > 0 else 0
+        if self._max_delete_items > 0 and max_items <= 0:
+            return [], 0
+        budget = None
+        if not self._dry_run:
+            limits = []
+            if self._max_gb_per_run > 0:
+                limits.append(int(self._max_gb_per_run * (1024 ** 3)) - int(self._current_run_freed_bytes))
+            if self._max_gb_per_day > 0:
+                limits.append(
+                    int(self._max_gb_per_day * (1024 ** 3))
+                    - self._get_daily_freed_bytes()
+                    - int(self._current_run_freed_bytes)
+                )
+            if limits:
+                budget = max(0, min(limits))
+
+        plan: List[Any] = []
+        planned_bytes = 0
+        planned_targets = set()
+        skipped_budget = 0
+        while not max_items or len(plan) < max_items:
+            if deficit > 0 and planned_bytes >= deficit:
+                break
+            if deficit <= 0 and plan:
+                break
+            candidate = next_candidate()
+            if candidate is None:
+                break
+            target_key, size = estimate(candidate)
+            if target_key and target_key in planned_targets:
+                continue
+            if budget is not None and planned_bytes + size > budget:
+                skipped_budget += 1
+                continue
+            plan.append(candidate)
+            planned_bytes += int(size or 0)
+            if target_key:
+                planned_targets.add(target_key)
+            if deficit > 0 and int(size or 0) <= 0:
+                break
+        logger.info(
+            f"{self.plugin_name}清理计划：缺口 {self._format_size(deficit)} | 计划 {len(plan)} 项 "
+            f"预计释放 {self._format_size(planned_bytes)} | 超出容量上限跳过 {skipped_budget} 项"
+        )
+        return plan, planned_bytes
+
+    def _estimate_media_cleanup(self, media_path: Optional[Path], history: Any, roots: List[Path]) -> Tuple[Optional[str], int]:
+        if not media_path:
+            return None, 0
+        target = self._resolve_media_cleanup_target(media_path=media_path, history=history, roots=roots)
+        if not target:
+            return None, 0
+        # 与实际清理使用同一删除集合：强制硬链接清理时计入同 inode 文件，
+        # 删种连同文件时计入下载目录中的硬链接（即种子数据）。
+        paths: List[Path] = [target] if self._clean_media_data else []
+        if self._clean_scrape_data:
+            paths.extend(self._collect_scrape_files(target))
+        expand_roots: List[Path] = []
+        if self._force_hardlink_cleanup and self._clean_media_data:
+            expand_roots.extend(roots or [])
+        download_hash = getattr(history, "download_hash", None) if history else None
+        if self._clean_downloader_seed and self._delete_downloader_files and download_hash:
+            expand_roots.extend(self._download_paths())
+        if expand_roots and target.exists():
+            paths.extend(self._expand_media_targets_with_hardlinks(
+                media_targets=[target],
+                roots=self._unique_existing_paths(expand_roots),
+                context=target.as_posix(),
+                enabled=True,
+            ))
+        return target.as_posix(), self._reclaim_bytes(paths)
 
     def _media_delete_roots(self, library_roots: Optional[List[Path]] = None) -> List[Path]:
         roots = list(library_roots or self._library_paths())
@@ -3536,25 +5707,20 @@ class DiskCleaner(_PluginBase):
             f"nlink={base_links} 根目录={len(active_roots)}"
         )
         siblings: Dict[str, Path] = {}
-        scanned_files = 0
-        for root in active_roots:
-            for current_root, _, files in os.walk(root.as_posix()):
-                for filename in files:
-                    path = Path(current_root) / filename
-                    if path == base:
-                        continue
-                    try:
-                        if path.is_symlink() or not path.is_file():
-                            continue
-                        stat = path.stat()
-                    except Exception:
-                        continue
-                    scanned_files += 1
-                    if stat.st_ino == base_stat.st_ino and stat.st_dev == base_stat.st_dev:
-                        siblings[path.as_posix()] = path
+        candidate_paths = self._hardlink_paths_by_inode({(int(base_stat.st_dev), int(base_stat.st_ino))}, active_roots)
+        scanned_files = len(candidate_paths)
+        for path in candidate_paths:
+            if path == base:
+                continue
+            try:
+                stat = path.stat()
+            except Exception:
+                continue
+            if stat.st_ino == base_stat.st_ino and stat.st_dev == base_stat.st_dev:
+                siblings[path.as_posix()] = path
         logger.info(
             f"{self.plugin_name}硬链接扫描完成：目标={base.as_posix()} "
-            f"扫描文件={scanned_files} 命中关联文件={len(siblings)}"
+            f"候选路径={scanned_files} 命中关联文件={len(siblings)}"
         )
         return list(siblings.values())
 
@@ -3570,19 +5736,11 @@ class DiskCleaner(_PluginBase):
 
         inode_keys = set()
         scanned_sources = 0
-        for current_root, _, files in os.walk(base_dir.as_posix()):
-            for filename in files:
-                path = Path(current_root) / filename
-                try:
-                    if path.is_symlink() or not path.is_file():
-                        continue
-                    stat = path.stat()
-                except Exception:
-                    continue
-                scanned_sources += 1
-                if int(getattr(stat, "st_nlink", 1) or 1) <= 1:
-                    continue
-                inode_keys.add((int(stat.st_dev), int(stat.st_ino)))
+        for _, stat in self._scan_files(base_dir):
+            scanned_sources += 1
+            if int(getattr(stat, "st_nlink", 1) or 1) <= 1:
+                continue
+            inode_keys.add((int(stat.st_dev), int(stat.st_ino)))
 
         if not inode_keys:
             logger.info(
@@ -3607,28 +5765,74 @@ class DiskCleaner(_PluginBase):
             f"候选inode={len(inode_keys)} 根目录={len(active_roots)}"
         )
         siblings: Dict[str, Path] = {}
-        scanned_files = 0
-        for root in active_roots:
-            for current_root, _, files in os.walk(root.as_posix()):
-                for filename in files:
-                    path = Path(current_root) / filename
-                    try:
-                        if path.is_symlink() or not path.is_file():
-                            continue
-                        if path.is_relative_to(base_dir):
-                            continue
-                        stat = path.stat()
-                    except Exception:
-                        continue
-                    scanned_files += 1
-                    if (int(stat.st_dev), int(stat.st_ino)) in inode_keys:
-                        siblings[path.as_posix()] = path
+        candidate_paths = self._hardlink_paths_by_inode(inode_keys, active_roots)
+        scanned_files = len(candidate_paths)
+        for path in candidate_paths:
+            try:
+                if path.is_relative_to(base_dir):
+                    continue
+                stat = path.stat()
+            except Exception:
+                continue
+            if (int(stat.st_dev), int(stat.st_ino)) in inode_keys:
+                siblings[path.as_posix()] = path
         logger.info(
             f"{self.plugin_name}目录硬链接扫描完成：目录={base_dir.as_posix()} "
-            f"扫描文件={scanned_files} 命中关联文件={len(siblings)}"
+            f"候选路径={scanned_files} 命中关联文件={len(siblings)}"
         )
         return list(siblings.values())
 
+    def _hardlink_paths_by_inode(self, inode_keys: set, roots: List[Path]) -> List[Path]:
+        # 硬链接不能跨设备，但根目录下可能挂载了其他设备：按条目 st_dev 过滤，不按根目录整体过滤。
+        devices = {dev for dev, _ in inode_keys}
+        active_roots = list(roots or [])
+        if not active_roots or not devices:
+            return []
+
+        indexed_roots = self._refresh_library_index(active_roots)
+        if self._library_index and all(root.as_posix() in indexed_roots for root in active_roots):
+            path_texts = [
+                path_text
+                for dev, ino in inode_keys
+                for path_text in self._library_index.paths_by_inode(dev, ino)
+            ]
+        else:
+            inode_map = self._build_hardlink_inode_map(active_roots, devices)
+            path_texts = [path_text for key in inode_keys for path_text in inode_map.get(key, [])]
+
+        result: Dict[str, Path] = {}
+        for path_text in path_texts:
+            path = Path(path_text)
+            if self._policy().in_roots(path, active_roots):
+                result[path.as_posix()] = path
+        return list(result.values())
+
+    def _build_hardlink_inode_map(self, roots: List[Path], devices: set) -> Dict[Tuple[int, int], List[str]]:
+        # 单轮内每个根目录按设备只遍历一次，记录目标设备上 nlink>1 的文件：(dev, ino) -> [路径]。
+        if self._hardlink_inode_map is None:
+            self._hardlink_inode_map = {}
+        if self._hardlink_inode_roots is None:
+            self._hardlink_inode_roots = {}
+        inode_map = self._hardlink_inode_map
+        for root in roots or []:
+            root_text = root.as_posix()
+            covered = self._hardlink_inode_roots.setdefault(root_text, set())
+            pending = set(devices) - covered
+            if not pending:
+                continue
+            covered.update(pending)
+            scanned_files = 0
+            for path_text, stat in self._scan_files(root):
+                scanned_files += 1
+                if int(getattr(stat, "st_nlink", 1) or 1) <= 1:
+                    continue
+                dev = int(stat.st_dev)
+                if dev not in pending:
+                    continue
+                inode_map.setdefault((dev, int(stat.st_ino)), []).append(Path(path_text).as_posix())
+            logger.info(f"{self.plugin_name}硬链接inode索引建立：{root_text} 扫描文件={scanned_files}")
+        return inode_map
+
     def _expand_media_targets_with_hardlinks(
         self,
         media_targets: List[Path],
@@ -3832,17 +6036,13 @@ class DiskCleaner(_PluginBase):
                     files[path.as_posix()] = True
                     continue
                 if path.is_dir() and not path.is_symlink():
-                    for current_root, _, filenames in os.walk(path.as_posix()):
-                        for filename in filenames:
-                            file_path = Path(current_root) / filename
-                            try:
-                                if not file_path.is_file() and not file_path.is_symlink():
-                                    continue
-                            except Exception:
-                                continue
-                            if allowed_exts and file_path.suffix.lower() not in allowed_exts:
-                                continue
-                            files[file_path.as_posix()] = True
+                    for path_text, _ in self._scan_files(
+                        path,
+                        exts=allowed_exts or None,
+                        with_stat=False,
+                        include_symlinks=True,
+                    ):
+                        files[Path(path_text).as_posix()] = True
             except Exception:
                 continue
         return list(files.keys())
@@ -3891,12 +6091,13 @@ class DiskCleaner(_PluginBase):
             logger.warning(f"{self.plugin_name}命中禁止删除关键词，跳过删除：{path.as_posix()}（关键词：{block_keyword}）")
             return False
 
+        policy = self._policy()
         allow_roots = self._effective_allow_roots(roots)
-        if not self._is_path_in_roots(path, allow_roots):
+        if not policy.in_roots(path, allow_roots):
             logger.warning(f"{self.plugin_name}跳过越界删除：{path.as_posix()}")
             return False
 
-        if self._is_path_in_roots(path, self._block_paths()):
+        if policy.in_block_paths(path):
             logger.warning(f"{self.plugin_name}命中黑名单，跳过删除：{path.as_posix()}")
             return False
 
@@ -3905,13 +6106,17 @@ class DiskCleaner(_PluginBase):
                 logger.warning(f"{self.plugin_name}跳过根目录删除：{path.as_posix()}")
                 return False
 
+        reclaimable = self._reclaimable_bytes(path)
         if self._dry_run:
             if self._clean_empty_media_dirs:
                 self._current_run_dir_cleanup_dryrun_skips += 1
+            self._project_usage_freed(path, reclaimable)
             return True
 
+        was_dir = False
         try:
             if path.is_dir() and not path.is_symlink():
+                was_dir = True
                 shutil.rmtree(path)
                 parent = path.parent
             else:
@@ -3921,6 +6126,10 @@ class DiskCleaner(_PluginBase):
             logger.error(f"{self.plugin_name}删除失败 {path.as_posix()}：{err}")
             return False
 
+        self._discount_dir_media(path, was_dir)
+        self._invalidate_dir_listing(path)
+        self._forget_library_index_path(path)
+        self._project_usage_freed(path, reclaimable)
         self._delete_empty_parent_dirs(parent, allow_roots)
         self._delete_no_media_parent_dirs(parent, allow_roots)
         return True
@@ -3936,10 +6145,12 @@ class DiskCleaner(_PluginBase):
                 logger.info(f"{self.plugin_name}命中禁止删除关键词，跳过目录回收：{current.as_posix()}（关键词：{block_keyword}）")
                 break
             try:
-                if any(current.iterdir()):
+                listing = self._list_dir(current)
+                if listing is None or listing:
                     break
                 deleted_dir = current
                 current.rmdir()
+                self._invalidate_dir_listing(deleted_dir)
                 self._record_dir_cleanup_item(self._current_run_empty_dirs_deleted, deleted_dir)
                 logger.info(f"{self.plugin_name}删除空目录：{deleted_dir.as_posix()}")
                 current = current.parent
@@ -3949,78 +6160,215 @@ class DiskCleaner(_PluginBase):
     def _delete_no_media_parent_dirs(self, parent: Path, roots: List[Path]):
         if not self._clean_empty_media_dirs:
             return
-        media_exts = self._media_ext_set_for_empty_dir_check()
+        if self._no_media_sweep_queue is not None:
+            # 运行中只登记，待本轮结束时统一自底向上回收
+            self._no_media_sweep_queue.setdefault(Path(parent).as_posix(), (Path(parent), list(roots)))
+            return
+        self._reclaim_no_media_dirs([(Path(parent), list(roots))])
+
+    def _sweep_no_media_dirs(self):
+        queue = self._no_media_sweep_queue
+        self._no_media_sweep_queue = None
+        if queue:
+            self._reclaim_no_media_dirs(list(queue.values()))
+
+    def _reclaim_no_media_dirs(self, items: List[Tuple[Path, List[Path]]]):
+        policy = self._policy()
+        media_exts = policy.media_exts
         if not media_exts:
             return
         library_roots = self._library_paths()
         if not library_roots:
             return
-        if not self._is_path_in_roots(parent, library_roots):
-            return
-        self._current_run_no_media_checks += 1
+        # 由深到浅处理，子目录先回收，父目录只需一次计数查询
+        for parent, roots in sorted(items, key=lambda item: len(item[0].parts), reverse=True):
+            if not policy.in_roots(parent, library_roots):
+                continue
+            self._current_run_no_media_checks += 1
 
-        block_roots = self._block_paths()
-        protected_roots = {}
-        for root in list(roots) + list(library_roots):
-            protected_roots[root.as_posix()] = root
-        root_set = set(protected_roots.keys())
+            protected_roots = {}
+            for root in list(roots) + list(library_roots):
+                protected_roots[root.as_posix()] = root
+            root_set = set(protected_roots.keys())
 
-        current = parent
-        while current and current.exists():
-            current_key = current.as_posix()
-            if current_key in root_set:
-                break
-            if not self._is_path_in_roots(current, roots):
-                break
-            if not self._is_path_in_roots(current, library_roots):
-                break
-            if self._is_path_in_roots(current, block_roots):
-                break
-            block_keyword = self._path_contains_block_keyword(current)
-            if block_keyword:
-                logger.info(f"{self.plugin_name}命中禁止删除关键词，跳过无媒体目录回收：{current.as_posix()}（关键词：{block_keyword}）")
-                break
-            try:
-                if not current.is_dir() or current.is_symlink():
+            current = parent
+            while current and current.exists():
+                current_key = current.as_posix()
+                if current_key in root_set:
                     break
-            except Exception:
+                if not policy.in_roots(current, roots):
+                    break
+                if not policy.in_roots(current, library_roots):
+                    break
+                if policy.in_block_paths(current):
+                    break
+                block_keyword = self._path_contains_block_keyword(current)
+                if block_keyword:
+                    logger.info(f"{self.plugin_name}命中禁止删除关键词，跳过无媒体目录回收：{current.as_posix()}（关键词：{block_keyword}）")
+                    break
+                try:
+                    if not current.is_dir() or current.is_symlink():
+                        break
+                except Exception:
+                    break
+                if self._dir_media_count(current, list(protected_roots.values()), media_exts) > 0:
+                    break
+                # 计数可能来自运行开始时的索引快照：删除前按实时文件系统复核，期间新整理入库的媒体不会被误删
+                if self._dir_contains_media_file(current, media_exts):
+                    break
+                try:
+                    deleted_dir = current
+                    shutil.rmtree(current)
+                    self._invalidate_dir_listing(deleted_dir)
+                    self._record_dir_cleanup_item(self._current_run_no_media_dirs_deleted, deleted_dir)
+                    logger.info(f"{self.plugin_name}删除无媒体文件目录：{deleted_dir.as_posix()}")
+                    current = deleted_dir.parent
+                except Exception:
+                    break
+
+    def _dir_media_count(self, directory: Path, roots: List[Path], media_exts: frozenset) -> int:
+        # 本轮目录媒体文件计数：每个顶层目录（根目录下一级）只遍历一次，之后 O(1) 查询
+        counts = self._dir_media_counts
+        if counts is None:
+            return 1 if self._dir_contains_media_file(directory, media_exts) else 0
+        key = directory.as_posix()
+        if key in counts:
+            return counts[key]
+        scanned = self._dir_media_scanned
+        node = directory
+        while True:
+            scan_ok = scanned.get(node.as_posix())
+            if scan_ok is not None:
+                # 所属顶层目录已统计：未出现在计数中即无媒体；统计失败时按有媒体保留
+                return 0 if scan_ok else 1
+            if node.parent == node:
                 break
-            if self._dir_contains_media_file(current, media_exts):
+            node = node.parent
+        top = directory
+        for root in sorted(roots, key=lambda item: len(item.parts), reverse=True):
+            if directory != root and directory.is_relative_to(root):
+                top = root / directory.relative_to(root).parts[0]
                 break
+        self._scan_dir_media_counts(top, media_exts)
+        return counts.get(key, 0)
+
+    def _scan_dir_media_counts(self, top: Path, media_exts: frozenset):
+        top_key = top.as_posix()
+        subtree: Dict[str, int] = {top_key: 0}
+        scan_ok = True
+        if self._library_index_covers(top):
             try:
-                deleted_dir = current
-                shutil.rmtree(current)
-                self._record_dir_cleanup_item(self._current_run_no_media_dirs_deleted, deleted_dir)
-                logger.info(f"{self.plugin_name}删除无媒体文件目录：{deleted_dir.as_posix()}")
-                current = deleted_dir.parent
+                files = [path_text for path_text, _ in self._library_index.iter_files(top, exts=set(media_exts))]
             except Exception:
+                files = None
+        else:
+            files = None
+        if files is None:
+            try:
+                files = [
+                    path_text for path_text, _ in
+                    self._scan_files(top, exts=set(media_exts), with_stat=False, include_symlinks=True)
+                ]
+            except Exception as err:
+                logger.warning(f"{self.plugin_name}统计目录媒体文件失败，按含媒体处理：{top_key} - {err}")
+                files = []
+                scan_ok = False
+                subtree[top_key] = 1
+        for path_text in files:
+            current = os.path.dirname(Path(path_text).as_posix())
+            while True:
+                subtree[current] = subtree.get(current, 0) + 1
+                if current == top_key:
+                    break
+                parent = os.path.dirname(current)
+                if parent == current or len(parent) < len(top_key):
+                    break
+                current = parent
+        self._dir_media_counts.update(subtree)
+        self._dir_media_scanned[top_key] = scan_ok
+
+    def _discount_dir_media(self, path: Path, was_dir: bool):
+        # 删除后扣减已统计祖先目录的媒体计数
+        counts = self._dir_media_counts
+        if not counts:
+            return
+        path_key = path.as_posix()
+        if was_dir:
+            removed = counts.pop(path_key, 0)
+        else:
+            removed = 1 if path.suffix.lower() in self._policy().media_exts else 0
+        if removed <= 0:
+            return
+        current = os.path.dirname(path_key)
+        while current in counts:
+            counts[current] = max(0, counts[current] - removed)
+            parent = os.path.dirname(current)
+            if parent == current:
                 break
+            current = parent
 
     @staticmethod
-    def _dir_contains_media_file(directory: Path, media_exts: set) -> bool:
+    def _scan_files(
+        root: Path,
+        exts: Optional[set] = None,
+        with_stat: bool = True,
+        include_symlinks: bool = False,
+        stats: Optional[Dict[str, int]] = None,
+        recursive: bool = True,
+    ) -> Iterator[Tuple[str, Optional[os.stat_result]]]:
+        # 基于 os.scandir 的遍历：复用 DirEntry 缓存的类型信息，先按扩展名过滤再 stat，
+        # 产出 (路径字符串, stat)；不跟随目录符号链接，与 os.walk 默认行为一致。
+        if stats is None:
+            stats = {}
+        for key in ("files", "filtered_ext", "stat_errors"):
+            stats.setdefault(key, 0)
+        stack = [os.fspath(root)]
+        while stack:
+            current = stack.pop()
+            try:
+                with os.scandir(current) as iterator:
+                    entries = list(iterator)
+            except OSError:
+                continue
+            subdirs: List[str] = []
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                        continue
+                    if not entry.is_file(follow_symlinks=False):
+                        if not (include_symlinks and entry.is_symlink() and entry.is_file()):
+                            continue
+                except OSError:
+                    continue
+                stats["files"] += 1
+                if exts is not None and os.path.splitext(entry.name)[1].lower() not in exts:
+                    stats["filtered_ext"] += 1
+                    continue
+                if not with_stat:
+                    yield entry.path, None
+                    continue
+                try:
+                    entry_stat = entry.stat()
+                except OSError:
+                    stats["stat_errors"] += 1
+                    continue
+                yield entry.path, entry_stat
+            if recursive:
+                stack.extend(reversed(subdirs))
+
+    @classmethod
+    def _dir_contains_media_file(cls, directory: Path, media_exts: set) -> bool:
         if not directory or not media_exts:
             return False
         try:
-            for current_root, _, files in os.walk(directory.as_posix()):
-                for filename in files:
-                    if Path(filename).suffix.lower() in media_exts:
-                        return True
+            for _ in cls._scan_files(directory, exts=media_exts, with_stat=False, include_symlinks=True):
+                return True
         except Exception:
             return True
         return False
 
-    @staticmethod
-    def _is_path_in_roots(path: Path, roots: List[Path]) -> bool:
-        for root in roots:
-            try:
-                if path == root or path.is_relative_to(root):
-                    return True
-            except Exception:
-                continue
-        return False
-
-    @staticmethod
-    def _collect_scrape_files(media_path: Path) -> List[Path]:
+    def _collect_scrape_files(self, media_path: Path) -> List[Path]:
         if not media_path:
             return []
         media_path = Path(media_path)
@@ -4028,36 +6376,209 @@ class DiskCleaner(_PluginBase):
             # 目录级清理时由目录删除统一处理，避免重复统计。
             return []
         parent = media_path.parent
-        if not parent.exists() or not parent.is_dir():
+        listing = self._list_dir(parent)
+        if not listing:
             return []
 
-        allowed_exts = {".nfo", ".jpg", ".jpeg", ".png", ".webp", ".bmp", ".tbn", ".txt"}
+        allowed_exts = self._policy().scrape_exts
         result = []
-        for child in parent.iterdir():
-            if not child.is_file():
+        for name, _, is_file, _ in listing:
+            if not is_file:
                 continue
-            if child.stem == media_path.stem and child.suffix.lower() in allowed_exts:
-                result.append(child)
+            stem, suffix = os.path.splitext(name)
+            if stem == media_path.stem and suffix.lower() in allowed_exts:
+                result.append(parent / name)
 
         return result
 
+    def _list_dir(self, directory: Path) -> Optional[List[Tuple[str, bool, bool, bool]]]:
+        # 目录列表（名称, 是否目录, 是否文件, 是否符号链接）；运行中按目录缓存，自身删除时失效
+        key = Path(directory).as_posix()
+        cache = self._dir_listing_cache
+        if cache is not None and key in cache:
+            return cache[key]
+        listing: Optional[List[Tuple[str, bool, bool, bool]]] = []
+        try:
+            with os.scandir(key) as iterator:
+                for entry in iterator:
+                    try:
+                        is_link = entry.is_symlink()
+                        listing.append((
+                            entry.name,
+                            entry.is_dir(follow_symlinks=False),
+                            entry.is_file(),
+                            is_link,
+                        ))
+                    except OSError:
+                        continue
+        except OSError:
+            listing = None
+        if cache is not None:
+            cache[key] = listing
+        return listing
+
+    def _invalidate_dir_listing(self, path: Path):
+        cache = self._dir_listing_cache
+        if not cache:
+            return
+        key = Path(path).as_posix()
+        cache.pop(os.path.dirname(key), None)
+        prefix = key.rstrip("/") + "/"
+        for cached in [item for item in cache if item == key or item.startswith(prefix)]:
+            cache.pop(cached, None)
+
     def _delete_torrent(self, downloader: str, torrent_hash: str) -> bool:
         if not downloader or not torrent_hash:
             return False
         service = DownloaderHelper().get_service(name=downloader)
         if not service or not service.instance:
             return False
+        if self._torrent_delete_queue is not None:
+            return self._queue_torrent_delete(downloader, torrent_hash)
         try:
-            return bool(
+            deleted = bool(
                 service.instance.delete_torrents(
                     delete_file=self._delete_downloader_files,
                     ids=torrent_hash,
                 )
             )
+            if deleted:
+                self._forget_torrent_snapshot(downloader, torrent_hash)
+            if deleted and self._delete_downloader_files:
+                # 下载器删除的数据量无法预测，下一次判断改为真实测量
+                self._invalidate_usage_cache()
+            return deleted
         except Exception as err:
             logger.error(f"{self.plugin_name}删除下载器任务失败 {downloader}:{torrent_hash} - {err}")
             return False
 
+    def _queue_torrent_delete(self, downloader: str, torrent_hash: str) -> bool:
+        # 排队即视为成功；提交后确认失败的种子会回写步骤结果并进入失败补偿
+        for ticket in self._torrent_delete_queue:
+            if ticket["downloader"] == downloader and ticket["hash"] == torrent_hash:
+                return True
+        self._torrent_delete_queue.append({
+            "downloader": downloader,
+            "hash": torrent_hash,
+            "delete_file": bool(self._delete_downloader_files),
+            "action": None,
+            "retry": None,
+        })
+        # 达到批量上限时不在此提交：需等 _bind_deferred_deletes 关联动作后才能回写失败
+        return True
+
+    def _bind_deferred_deletes(
+        self,
+        downloader: Optional[str],
+        torrent_hash: Optional[str],
+        action: dict,
+        retry_payload: dict,
+    ):
+        # 把本次清理排队的删种/记录删除关联到动作，提交失败时据此回写步骤结果和失败补偿
+        if self._history_delete_queue:
+            for ticket in self._history_delete_queue["unbound"]:
+                ticket["action"] = action
+                ticket["retry"] = retry_payload
+            self._history_delete_queue["unbound"] = []
+        if not self._torrent_delete_queue or not downloader or not torrent_hash:
+            return
+        for ticket in self._torrent_delete_queue:
+            if ticket["downloader"] == downloader and ticket["hash"] == torrent_hash:
+                ticket["action"] = action
+                ticket["retry"] = retry_payload
+                break
+        if len(self._torrent_delete_queue) >= self._torrent_delete_batch_size:
+            self._flush_torrent_delete_queue(bound_only=True)
+
+    def _flush_torrent_delete_queue(self, bound_only: bool = False) -> int:
+        # bound_only：只提交已关联动作的种子，未关联的留待关联后或本轮结束再提交
+        queue = self._torrent_delete_queue
+        if not queue:
+            return 0
+        if bound_only:
+            pending = [ticket for ticket in queue if ticket["action"] is None]
+            queue = [ticket for ticket in queue if ticket["action"] is not None]
+            self._torrent_delete_queue = pending
+            if not queue:
+                return 0
+        else:
+            self._torrent_delete_queue = []
+        groups: Dict[Tuple[str, bool], List[dict]] = {}
+        for ticket in queue:
+            groups.setdefault((ticket["downloader"], ticket["delete_file"]), []).append(ticket)
+
+        deleted = 0
+        failed_tickets: List[dict] = []
+        for (downloader, delete_file), tickets in groups.items():
+            failed = self._delete_torrent_batch(downloader, [ticket["hash"] for ticket in tickets], delete_file)
+            for ticket in tickets:
+                if ticket["hash"] in failed:
+                    failed_tickets.append(ticket)
+                    continue
+                deleted += 1
+                self._forget_torrent_snapshot(downloader, ticket["hash"])
+            if delete_file and len(failed) < len(tickets):
+                self._invalidate_usage_cache()
+        logger.info(
+            f"{self.plugin_name}批量删种完成：提交{len(queue)} 成功{deleted} 失败{len(failed_tickets)} "
+            f"批次{len(groups)}"
+        )
+        for ticket in failed_tickets:
+            self._apply_torrent_delete_failure(ticket)
+        return deleted
+
+    def _delete_torrent_batch(self, downloader: str, hashes: List[str], delete_file: bool) -> set:
+        service = DownloaderHelper().get_service(name=downloader)
+        if not service or not service.instance:
+            return set(hashes)
+        failed = set()
+        for start in range(0, len(hashes), 100):
+            chunk = hashes[start:start + 100]
+            try:
+                ok = bool(service.instance.delete_torrents(delete_file=delete_file, ids=chunk))
+            except Exception as err:
+                logger.error(f"{self.plugin_name}批量删除下载器任务失败 {downloader}：{err}")
+                ok = False
+            if not ok:
+                failed.update(chunk)
+                continue
+            # 批量接口只返回整体结果，逐个确认种子已不在下载器中；确认失败时沿用整体结果
+            remaining = self._safe_list_torrents_by_ids(service.instance, chunk)
+            if remaining:
+                failed.update(torrent_hash for torrent_hash in chunk if torrent_hash in remaining)
+        return failed
+
+    def _safe_list_torrents_by_ids(self, instance: Any, hashes: List[str]) -> set:
+        if not hasattr(instance, "get_torrents"):
+            return set()
+        try:
+            parsed = self._parse_torrent_list_result(instance.get_torrents(ids=hashes))
+        except Exception:
+            return set()
+        return {self._torrent_hash(torrent) for torrent in parsed or []} - {None}
+
+    def _apply_torrent_delete_failure(self, ticket: dict):
+        logger.warning(f"{self.plugin_name}批量删种未确认成功：{ticket.get('downloader')}:{ticket.get('hash')}")
+        self._apply_deferred_step_shortfall(ticket, step_name="downloader", shortfall=1, label="删种")
+
+    def _apply_deferred_step_shortfall(self, ticket: dict, step_name: str, shortfall: int, label: str):
+        if shortfall <= 0:
+            return
+        action = ticket.get("action")
+        if action:
+            steps = action.setdefault("steps", {})
+            step = steps.get(step_name) or {}
+            steps[step_name] = self._build_step_result(
+                step.get("planned", 0),
+                int(step.get("done", 0) or 0) - shortfall,
+            )
+            action["action"] = f"{action.get('action') or ''}（{label}失败{shortfall}）"
+        payload = ticket.get("retry")
+        if payload and self._enable_retry_queue:
+            retry_payload = dict(payload)
+            retry_payload["failed_steps"] = sorted(set(retry_payload.get("failed_steps") or []) | {step_name})
+            self._enqueue_retry(retry_payload)
+
     def _can_delete_torrent_in_media_flow(
         self,
         downloader: Optional[str],
@@ -4076,19 +6597,14 @@ class DiskCleaner(_PluginBase):
             logger.warning(f"{self.plugin_name}媒体流程删种校验失败，下载器不可用，跳过删种：{target}")
             return False
 
-        try:
-            torrents = service.instance.get_completed_torrents() or []
-        except Exception as err:
-            logger.warning(f"{self.plugin_name}媒体流程读取下载器做种信息失败，跳过删种：{target} - {err}")
+        snapshot = self._ensure_completed_torrent_snapshot(self._torrent_snapshot_store(), downloader, service)
+        if snapshot.get("error"):
+            logger.warning(
+                f"{self.plugin_name}媒体流程读取下载器做种信息失败，跳过删种：{target} - {snapshot.get('error')}"
+            )
             return False
 
-        seed_seconds = None
-        for torrent in torrents:
-            if self._torrent_hash(torrent) != torrent_hash:
-                continue
-            seed_seconds = self._torrent_seed_seconds(torrent)
-            break
-
+        seed_seconds, _ = snapshot["by_hash"].get(torrent_hash) or (None, None)
         if seed_seconds is None:
             logger.warning(f"{self.plugin_name}媒体流程未找到种子做种信息，跳过删种：{target}")
             return False
@@ -4116,19 +6632,24 @@ class DiskCleaner(_PluginBase):
             logger.warning(f"{self.plugin_name}未找到可删除的整理记录，跳过")
             return 0
 
-        removed = 0
-        visited = set()
+        record_ids: List[Any] = []
         for record in records:
             rid = getattr(record, "id", None)
-            if not rid or rid in visited:
-                continue
-            visited.add(rid)
+            if rid and rid not in record_ids:
+                record_ids.append(rid)
+        if self._history_delete_queue is not None:
+            return self._queue_history_delete(transfer_ids=record_ids)
+        return self._delete_transfer_records(record_ids)
+
+    def _delete_transfer_records(self, record_ids: List[Any]) -> int:
+        removed = 0
+        for rid in record_ids:
             try:
                 self._transfer_oper.delete(rid)
+                self._forget_transfer_dest_map_record(rid)
                 removed += 1
             except Exception as err:
                 logger.warning(f"{self.plugin_name}删除整理记录失败，已跳过 id={rid}: {err}")
-
         return removed
 
     def _delete_download_history(self, download_hash: str) -> int:
@@ -4137,7 +6658,11 @@ class DiskCleaner(_PluginBase):
         if not download_hash:
             logger.warning(f"{self.plugin_name}未找到可删除的下载记录，跳过")
             return 0
+        if self._history_delete_queue is not None:
+            return self._queue_history_delete(download_hash=download_hash)
+        return self._delete_download_records(download_hash)
 
+    def _delete_download_records(self, download_hash: str) -> int:
         removed = 0
         found_main = False
 
@@ -4155,6 +6680,7 @@ class DiskCleaner(_PluginBase):
                 removed += 1
             except Exception as err:
                 logger.warning(f"{self.plugin_name}删除下载记录失败，已跳过 id={history.id}: {err}")
+                break
 
         try:
             files = self._download_oper.get_files_by_hash(download_hash)
@@ -4174,6 +6700,134 @@ class DiskCleaner(_PluginBase):
 
         return removed
 
+    def _queue_history_delete(self, transfer_ids: Optional[List[Any]] = None, download_hash: Optional[str] = None) -> int:
+        # 排队时按已查到的记录数计入步骤结果，本轮结束统一提交
+        queue = self._history_delete_queue
+        if transfer_ids:
+            fresh_ids = [rid for rid in transfer_ids if rid not in queue["transfer_ids"]]
+            if not fresh_ids:
+                return 0
+            queue["transfer_ids"].update(fresh_ids)
+            for rid in fresh_ids:
+                self._forget_transfer_dest_map_record(rid)
+            ticket = {"step": "transfer_history", "ids": fresh_ids, "count": len(fresh_ids), "action": None, "retry": None}
+        elif download_hash:
+            if download_hash in queue["hashes"]:
+                return 0
+            count = self._count_download_records(download_hash)
+            if count <= 0:
+                logger.warning(f"{self.plugin_name}未找到可删除的下载记录，跳过 hash={download_hash}")
+                return 0
+            queue["hashes"].add(download_hash)
+            ticket = {"step": "download_history", "hash": download_hash, "count": count, "action": None, "retry": None}
+        else:
+            return 0
+        queue["tickets"].append(ticket)
+        queue["unbound"].append(ticket)
+        return ticket["count"]
+
+    def _flush_history_delete_queue(self):
+        queue = self._history_delete_queue
+        if not queue or not queue["tickets"]:
+            return
+        self._history_delete_queue = {"transfer_ids": set(), "hashes": set(), "tickets": [], "unbound": []}
+        tickets = queue["tickets"]
+        removed = self._bulk_delete_history(queue["transfer_ids"], queue["hashes"])
+        if removed is not None:
+            planned = sum(ticket["count"] for ticket in tickets)
+            logger.info(
+                f"{self.plugin_name}批量删除历史记录完成：整理记录{removed[0]} 下载记录{removed[1]} "
+                f"(计划{planned}，单事务提交)"
+            )
+            return
+
+        # 批量事务不可用或失败，逐条删除并按实际结果回写
+        for ticket in tickets:
+            if ticket["step"] == "transfer_history":
+                done = self._delete_transfer_records(ticket["ids"])
+                label = "整理记录"
+            else:
+                done = self._delete_download_records(ticket["hash"])
+                label = "下载记录"
+            self._apply_deferred_step_shortfall(ticket, step_name=ticket["step"], shortfall=ticket["count"] - done, label=label)
+
+    @contextmanager
+    def _db_session(self) -> Iterator[Any]:
+        # 优先复用 Oper 持有的会话；缺失时通过 app.db.SessionFactory 新开会话并在结束时关闭。
+        db = getattr(self._transfer_oper, "_db", None) or getattr(self._download_oper, "_db", None)
+        if db is not None:
+            yield db
+            return
+        try:
+            from app.db import SessionFactory
+            db = SessionFactory()
+        except Exception as err:
+            self._log_db_fallback(err)
+            yield None
+            return
+        try:
+            yield db
+        finally:
+            try:
+                db.close()
+            except Exception:
+                pass
+
+    def _log_db_fallback(self, err: Any):
+        if self._db_fallback_logged:
+            return
+        self._db_fallback_logged = True
+        logger.warning(f"{self.plugin_name}数据库会话不可用，整理记录改为全量读取、历史记录改为逐条删除：{err}")
+
+    def _bulk_delete_history(self, transfer_ids: set, download_hashes: set) -> Optional[Tuple[int, int]]:
+        try:
+            from app.db.models.downloadhistory import DownloadFiles, DownloadHistory
+        except Exception as err:
+            self._log_db_fallback(err)
+            return None
+        with self._db_session() as db:
+            if db is None:
+                return None
+            return self._bulk_delete_history_in(db, transfer_ids, download_hashes, DownloadFiles, DownloadHistory)
+
+    def _bulk_delete_history_in(
+        self,
+        db: Any,
+        transfer_ids: set,
+        download_hashes: set,
+        files_model: Any,
+        history_model: Any,
+    ) -> Optional[Tuple[int, int]]:
+
+        def _chunks(values: set) -> Iterator[List[Any]]:
+            items = list(values)
+            for start in range(0, len(items), 500):
+                yield items[start:start + 500]
+
+        transfer_removed = 0
+        download_removed = 0
+        try:
+            for chunk in _chunks(transfer_ids):
+                transfer_removed += int(
+                    db.query(TransferHistory).filter(TransferHistory.id.in_(chunk)).delete(synchronize_session=False) or 0
+                )
+            for chunk in _chunks(download_hashes):
+                download_removed += int(
+                    db.query(history_model).filter(history_model.download_hash.in_(chunk)).delete(synchronize_session=False) or 0
+                )
+                download_removed += int(
+                    db.query(files_model).filter(files_model.download_hash.in_(chunk)).delete(synchronize_session=False) or 0
+                )
+            db.commit()
+        except Exception as err:
+            try:
+                db.rollback()
+            except Exception:
+                pass
+            logger.warning(f"{self.plugin_name}批量删除历史记录失败，改为逐条删除：{err}")
+            return None
+        return transfer_removed, download_removed
+
     @staticmethod
     def _build_step_result(planned: int, done: int) -> dict:
         planned_num = max(0, int(planned or 0))
@@ -4192,62 +6846,124 @@ class DiskCleaner(_PluginBase):
         ]
 
     def _retry_queue_size(self) -> int:
-        return len(self.get_data("retry_queue") or [])
+        return len(self._load_retry_store())
+
+    def _load_retry_store(self) -> Dict[str, dict]:
+        if self._retry_store is not None:
+            return self._retry_store
+        stored = self.get_data("retry_store")
+        jobs: Dict[str, dict] = {}
+        if isinstance(stored, dict) and isinstance(stored.get("jobs"), dict):
+            jobs = stored.get("jobs")
+        else:
+            # 旧版 retry_queue 列表迁移：同 retry_key 以后出现的为准
+            legacy = self.get_data("retry_queue") or []
+            for job in legacy if isinstance(legacy, list) else []:
+                if not isinstance(job, dict):
+                    continue
+                retry_key = job.get("retry_key") or job.get("id") or f"retry:{len(jobs) + 1}"
+                job["retry_key"] = retry_key
+                jobs.pop(retry_key, None)
+                jobs[retry_key] = job
+            if legacy:
+                self._retry_store_dirty = True
+                logger.info(f"{self.plugin_name}失败补偿队列已迁移为索引存储：{len(jobs)} 条")
+        heap: List[Tuple[float, str]] = []
+        for retry_key, job in jobs.items():
+            if "next_run_ts" not in job:
+                parsed = self._parse_datetime_text(job.get("next_run_at"))
+                job["next_run_ts"] = parsed.timestamp() if parsed else 0.0
+            heap.append((float(job.get("next_run_ts") or 0), retry_key))
+        heapq.heapify(heap)
+        self._retry_store = jobs
+        self._retry_due_heap = heap
+        return jobs
+
+    def _schedule_retry_job(self, job: dict, run_ts: float):
+        job["next_run_ts"] = float(run_ts)
+        job["next_run_at"] = datetime.fromtimestamp(run_ts).strftime("%Y-%m-%d %H:%M:%S")
+        heapq.heappush(self._retry_due_heap, (float(run_ts), job["retry_key"]))
+        self._retry_store_dirty = True
+
+    def _flush_retry_store(self):
+        if self._retry_store is None or not self._retry_store_dirty:
+            return
+        try:
+            self.save_data("retry_store", {"version": 2, "jobs": self._sanitize_for_json(self._retry_store)})
+            self._retry_store_dirty = False
+        except Exception as err:
+            logger.warning(f"{self.plugin_name}保存失败补偿队列失败：{err}")
+            return
+        if self.get_data("retry_queue") is not None:
+            try:
+                self.del_data(key="retry_queue")
+            except Exception:
+                pass
+
+    def _retry_backoff_seconds(self, job: dict, failed_steps: List[str]) -> float:
+        # 按失败步骤各自的失败次数取最大值做指数退避，叠加 ±20% 抖动，避免同批任务同时重试
+        step_attempts = job.get("step_attempts") or {}
+        attempts = max([int(step_attempts.get(step, 0) or 0) for step in failed_steps] or [1])
+        base_minutes = max(1, self._retry_interval_minutes) * (2 ** max(0, attempts - 1))
+        minutes = min(base_minutes, max(self._retry_backoff_cap_minutes, self._retry_interval_minutes))
+        return minutes * 60 * random.uniform(0.8, 1.2)
 
     def _enqueue_retry(self, payload: dict):
         if not payload or not payload.get("failed_steps"):
             return
-        queue = self.get_data("retry_queue") or []
+        jobs = self._load_retry_store()
         now_text = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         retry_key = payload.get("retry_key") or f"retry:{int(time.time() * 1000)}"
-        merged = False
-        for item in queue:
-            if item.get("retry_key") != retry_key:
-                continue
-            item_payload = item.get("payload") or {}
+        job = jobs.get(retry_key)
+        if job:
+            item_payload = job.get("payload") or {}
             old_steps = set(item_payload.get("failed_steps") or [])
             new_steps = set(payload.get("failed_steps") or [])
             item_payload.update(payload)
             item_payload["failed_steps"] = sorted(old_steps | new_steps)
-            item["payload"] = item_payload
-            item["next_run_at"] = now_text
-            merged = True
-            break
-        if not merged:
-            queue.append({
-                "id": f"{int(time.time() * 1000)}-{len(queue) + 1}",
+            job["payload"] = item_payload
+        else:
+            job = {
+                "id": f"{int(time.time() * 1000)}-{len(jobs) + 1}",
                 "retry_key": retry_key,
                 "attempt": 0,
+                "step_attempts": {},
                 "created_at": now_text,
-                "next_run_at": now_text,
                 "payload": payload,
-            })
-        self.save_data("retry_queue", queue[-500:])
+            }
+            jobs[retry_key] = job
+            while len(jobs) > self._retry_store_limit:
+                jobs.pop(next(iter(jobs)))
+        self._schedule_retry_job(job, time.time())
+        # 失败步骤入队即落盘：进程在本轮结束前退出也不会丢失补偿任务
+        self._flush_retry_store()
 
     def _process_retry_queue(self, limit: int) -> List[dict]:
-        queue = self.get_data("retry_queue") or []
-        if not queue:
+        jobs = self._load_retry_store()
+        if not jobs:
             return []
-        now = datetime.now()
+        now_ts = time.time()
         limit = max(1, int(limit or 1))
-        processed = 0
-        remain_queue = []
+        heap = self._retry_due_heap
         actions: List[dict] = []
-        for job in queue:
-            next_run_at = self._parse_datetime_text(job.get("next_run_at"))
-            if next_run_at and next_run_at > now:
-                remain_queue.append(job)
-                continue
-            if processed >= limit:
-                remain_queue.append(job)
+        processed = 0
+        while heap and processed < limit and heap[0][0] <= now_ts:
+            run_ts, retry_key = heapq.heappop(heap)
+            job = jobs.get(retry_key)
+            # 堆中保留着被改期/删除任务的旧条目，按当前到期时间校验后丢弃
+            if not job or float(job.get("next_run_ts") or 0) != run_ts:
                 continue
             processed += 1
             action, next_job = self._run_retry_job(job)
             if action:
                 actions.append(action)
             if next_job:
-                remain_queue.append(next_job)
-        self.save_data("retry_queue", remain_queue[-500:])
+                jobs[retry_key] = next_job
+                self._schedule_retry_job(next_job, float(next_job.get("next_run_ts") or now_ts))
+            else:
+                jobs.pop(retry_key, None)
+                self._retry_store_dirty = True
+        self._flush_retry_store()
         return actions
 
     def _run_retry_job(self, job: dict) -> Tuple[Optional[dict], Optional[dict]]:
@@ -4300,8 +7016,13 @@ class DiskCleaner(_PluginBase):
         retry_payload["failed_steps"] = failed_steps
         retry_job["payload"] = retry_payload
         retry_job["attempt"] = attempt
-        next_run = datetime.now() + timedelta(minutes=max(1, self._retry_interval_minutes) * attempt)
-        retry_job["next_run_at"] = next_run.strftime("%Y-%m-%d %H:%M:%S")
+        step_attempts = dict(job.get("step_attempts") or {})
+        for step in failed_steps:
+            step_attempts[step] = int(step_attempts.get(step, 0) or 0) + 1
+        retry_job["step_attempts"] = step_attempts
+        next_run_ts = time.time() + self._retry_backoff_seconds(retry_job, failed_steps)
+        retry_job["next_run_ts"] = next_run_ts
+        retry_job["next_run_at"] = datetime.fromtimestamp(next_run_ts).strftime("%Y-%m-%d %H:%M:%S")
         return action, retry_job
 
     def _retry_media_payload(self, payload: dict) -> dict:
@@ -4334,24 +7055,25 @@ class DiskCleaner(_PluginBase):
         library_roots = self._library_paths()
         delete_roots = self._media_delete_roots(library_roots)
 
-        freed_bytes = 0
         removed_media = 0
         removed_scrape = 0
         removed_downloader = 0
         removed_transfer = 0
         removed_download = 0
 
+        freed_bytes = self._reclaim_bytes(
+            (list(media_targets) if "media" in failed else []) +
+            (list(sidecars) if "scrape" in failed else [])
+        )
         planned_media = len(media_targets) if "media" in failed else 0
         if planned_media:
             for target in media_targets:
-                freed_bytes += self._path_size(target)
                 if (not target.exists() and not target.is_symlink()) or self._delete_local_item(target, delete_roots):
                     removed_media += 1
 
         planned_scrape = len(sidecars) if "scrape" in failed else 0
         if planned_scrape:
             for sidecar in sidecars:
-                freed_bytes += self._path_size(sidecar)
                 if (not sidecar.exists() and not sidecar.is_symlink()) or self._delete_local_item(sidecar, delete_roots):
                     removed_scrape += 1
 
@@ -4419,24 +7141,25 @@ class DiskCleaner(_PluginBase):
         library_roots = self._library_paths()
         delete_roots = self._media_delete_roots(library_roots)
 
-        freed_bytes = 0
         removed_media = 0
         removed_scrape = 0
         removed_downloader = 0
         removed_transfer = 0
         removed_download = 0
 
+        freed_bytes = self._reclaim_bytes(
+            (list(media_targets) if "media" in failed else []) +
+            (list(sidecar_targets) if "scrape" in failed else [])
+        )
         planned_media = len(media_targets) if "media" in failed else 0
         if planned_media:
             for path in media_targets:
-                freed_bytes += self._path_size(path)
                 if (not path.exists() and not path.is_symlink()) or self._delete_local_item(path, delete_roots):
                     removed_media += 1
 
         planned_scrape = len(sidecar_targets) if "scrape" in failed else 0
         if planned_scrape:
             for path in sidecar_targets:
-                freed_bytes += self._path_size(path)
                 if (not path.exists() and not path.is_symlink()) or self._delete_local_item(path, delete_roots):
                     removed_scrape += 1
 
@@ -4855,15 +7578,20 @@ class DiskCleaner(_PluginBase):
     def _count_transfer_records(self, download_hash: Optional[str], history: Any) -> int:
         if not self._transfer_oper:
             return 0
+        # 已排队待删除的记录不再计入
+        queued = self._history_delete_queue["transfer_ids"] if self._history_delete_queue else set()
         if download_hash:
-            return len(self._transfer_oper.list_by_hash(download_hash) or [])
+            records = self._transfer_oper.list_by_hash(download_hash) or []
+            return len([record for record in records if getattr(record, "id", None) not in queued])
         if history:
-            return 1
+            return 0 if getattr(history, "id", None) in queued else 1
         return 0
 
     def _count_download_records(self, download_hash: Optional[str]) -> int:
         if not self._download_oper or not download_hash:
             return 0
+        if self._history_delete_queue and download_hash in self._history_delete_queue["hashes"]:
+            return 0
         try:
             count = 0
             if self._download_oper.get_by_hash(download_hash):
@@ -4874,30 +7602,6 @@ class DiskCleaner(_PluginBase):
             logger.warning(f"{self.plugin_name}统计下载记录数量失败，已忽略 hash={download_hash}: {err}")
             return 0
 
-    @staticmethod
-    def _path_size(path: Path) -> int:
-        try:
-            if path and path.exists() and path.is_file():
-                return int(path.stat().st_size)
-            if path and path.exists() and path.is_dir():
-                try:
-                    return int(SystemUtils.get_directory_size(path))
-                except Exception:
-                    total = 0
-                    for current_root, _, files in os.walk(path.as_posix()):
-                        for filename in files:
-                            item = Path(current_root) / filename
-                            try:
-                                if item.is_symlink() or not item.is_file():
-                                    continue
-                                total += int(item.stat().st_size)
-                            except Exception:
-                                continue
-                    return int(total)
-        except Exception:
-            return 0
-        return 0
-
     def _is_history_recent(self, history: Any) -> bool:
         if not history or self._protect_recent_days <= 0:
             return False
@@ -4974,19 +7678,21 @@ class DiskCleaner(_PluginBase):
     def _block_keywords(self) -> List[str]:
         return self._normalize_keyword_list(self._path_block_keywords)
 
+    def _compile_path_policy(self) -> PathPolicy:
+        return PathPolicy(
+            block_keywords=self._block_keywords(),
+            block_paths=self._block_paths(),
+            media_exts=self._media_ext_set_for_empty_dir_check(),
+            scrape_exts=self._SCRAPE_EXTS,
+        )
+
+    def _policy(self) -> PathPolicy:
+        if self._path_policy is None:
+            self._path_policy = self._compile_path_policy()
+        return self._path_policy
+
     def _path_contains_block_keyword(self, path: Any) -> Optional[str]:
-        if not path:
-            return None
-        try:
-            path_text = Path(str(path)).as_posix()
-        except Exception:
-            path_text = str(path)
-        path_text_lc = path_text.lower()
-        for keyword in self._block_keywords():
-            key = str(keyword or "").strip().lower()
-            if key and key in path_text_lc:
-                return keyword
-        return None
+        return self._policy().keyword_hit(path)
 
     def _should_skip_by_block_keywords(self, paths: List[Any], context: str) -> bool:
         for raw_path in paths or []:
@@ -5136,9 +7842,73 @@ class DiskCleaner(_PluginBase):
                 candidates.append(mapped)
         return candidates
 
+    def _load_transfer_dest_map(self) -> Optional[Dict[str, Any]]:
+        # 单轮一次性分页加载成功整理记录，按规范化 dest 及其本地映射路径建立索引，
+        # 同一路径多条记录时保留 id 最小的一条（与 get_by_dest 取首条一致）。
+        if self._transfer_dest_map is not None or self._transfer_dest_map_failed:
+            return self._transfer_dest_map
+        if not self._transfer_oper:
+            return None
+        page_size = 1000
+        dest_map: Dict[str, Any] = {}
+        loaded = 0
+        try:
+            page = 1
+            while True:
+                records = TransferHistory.list_by_page(
+                    db=self._transfer_oper._db,
+                    page=page,
+                    count=page_size,
+                    status=True,
+                ) or []
+                for record in records:
+                    dest = getattr(record, "dest", None)
+                    if not dest:
+                        continue
+                    loaded += 1
+                    dest_text = Path(str(dest)).expanduser().as_posix()
+                    keys = {dest_text}
+                    for server_root, local_root in self._media_path_rules:
+                        keys.add(self._replace_path_root(dest_text, server_root, local_root))
+                    record_id = int(getattr(record, "id", 0) or 0)
+                    for key in keys:
+                        current = dest_map.get(key)
+                        if current is None or record_id < int(getattr(current, "id", 0) or 0):
+                            dest_map[key] = record
+                if len(records) < page_size:
+                    break
+                page += 1
+        except Exception as err:
+            logger.warning(f"{self.plugin_name}整理记录批量加载失败，回退为逐条查询：{err}")
+            self._transfer_dest_map_failed = True
+            return None
+        dest_keys: Dict[Any, List[str]] = {}
+        for key, record in dest_map.items():
+            dest_keys.setdefault(getattr(record, "id", None), []).append(key)
+        self._transfer_dest_map = dest_map
+        self._transfer_dest_map_keys = dest_keys
+        logger.info(f"{self.plugin_name}整理记录路径索引建立：记录{loaded} 路径键{len(dest_map)}")
+        return dest_map
+
+    def _forget_transfer_dest_map_record(self, record_id: Any):
+        # 按反向索引只移除该记录占用的路径键，避免每删一条记录扫描整张映射
+        if not self._transfer_dest_map or not record_id:
+            return
+        for key in (self._transfer_dest_map_keys or {}).pop(record_id, []):
+            item = self._transfer_dest_map.get(key)
+            if item is not None and getattr(item, "id", None) == record_id:
+                self._transfer_dest_map.pop(key, None)
+
     def _find_transfer_history_by_media_path(self, media_path: Optional[Path]) -> Optional[TransferHistory]:
         if not media_path or not self._transfer_oper:
             return None
+        dest_map = self._load_transfer_dest_map()
+        if dest_map is not None:
+            for candidate_dest in self._history_dest_candidates(media_path):
+                history = dest_map.get(candidate_dest)
+                if history:
+                    return history
+            return None
         for candidate_dest in self._history_dest_candidates(media_path):
             history = self._transfer_oper.get_by_dest(candidate_dest)
             if history:
@@ -5171,7 +7941,7 @@ class DiskCleaner(_PluginBase):
         elif media_type == "movie" and cleanup_target.as_posix() != Path(media_path).as_posix():
             logger.info(f"{self.plugin_name}电影清理目标目录：{cleanup_target.as_posix()}")
 
-        if not self._is_path_in_roots(cleanup_target, roots):
+        if not self._policy().in_roots(cleanup_target, roots):
             return cleanup_target
         for root in roots:
             if cleanup_target == root:
@@ -5208,13 +7978,14 @@ class DiskCleaner(_PluginBase):
         if season_num is None:
             return None
 
-        if node.exists() and node.is_dir():
+        listing = self._list_dir(node)
+        if listing:
             matches: List[Path] = []
-            for child in node.iterdir():
-                if not child.is_dir() or child.is_symlink():
+            for name, is_dir, _, is_link in listing:
+                if not is_dir or is_link:
                     continue
-                if self._looks_like_tv_season_dir(child.name, season=season_num):
-                    matches.append(child)
+                if self._looks_like_tv_season_dir(name, season=season_num):
+                    matches.append(node / name)
             if len(matches) == 1:
                 return matches[0]
             if len(matches) > 1:
@@ -5306,6 +8077,10 @@ class DiskCleaner(_PluginBase):
         self._retry_max_attempts = max(1, min(20, int(self._retry_max_attempts)))
         self._retry_interval_minutes = max(1, min(1440, int(self._retry_interval_minutes)))
         self._retry_batch_size = max(1, min(50, int(self._retry_batch_size)))
+        self._dashboard_refresh_minutes = max(0, min(1440, int(self._dashboard_refresh_minutes)))
+        self._library_scan_workers = max(1, min(16, int(self._library_scan_workers)))
+        self._library_scan_device_limit = max(1, min(self._library_scan_workers, int(self._library_scan_device_limit)))
+        self._downloader_timeout = max(0, min(600, int(self._downloader_timeout)))
         self._downloaders = [str(item).strip() for item in (self._downloaders or []) if str(item).strip()]
         self._media_servers = [str(item).strip() for item in (self._media_servers or []) if str(item).strip()]
         normalized_libraries: List[str] = []
@@ -5350,6 +8125,14 @@ class DiskCleaner(_PluginBase):
                     self._library_threshold_value,
                     self._library_threshold_mode,
                 ),
+                "download_target_value": self._format_target_value(
+                    self._download_target_value,
+                    self._download_threshold_mode,
+                ),
+                "library_target_value": self._format_target_value(
+                    self._library_target_value,
+                    self._library_threshold_mode,
+                ),
                 "downloaders": self._downloaders,
                 "seeding_days": self._seeding_days,
                 "media_flow_seed_check": self._media_flow_seed_check,
@@ -5360,6 +8143,11 @@ class DiskCleaner(_PluginBase):
                 "media_cleanup_priority": self._media_cleanup_priority,
                 "tv_complete_only": self._tv_complete_only,
                 "prefer_playback_history": self._prefer_playback_history,
+                "library_index_enabled": self._library_index_enabled,
+                "downloader_incremental_sync": self._downloader_incremental_sync,
+                "downloader_timeout": self._downloader_timeout,
+                "library_scan_workers": self._library_scan_workers,
+                "library_scan_device_limit": self._library_scan_device_limit,
                 "clean_media_data": self._clean_media_data,
                 "clean_scrape_data": self._clean_scrape_data,
                 "clean_downloader_seed": self._clean_downloader_seed,
@@ -5382,5 +8170,6 @@ class DiskCleaner(_PluginBase):
                 "retry_max_attempts": self._retry_max_attempts,
                 "retry_interval_minutes": self._retry_interval_minutes,
                 "retry_batch_size": self._retry_batch_size,
+                "dashboard_refresh_minutes": self._dashboard_refresh_minutes,
             }
         )
@@ -2,8 +2,11 @@ import enum
 import importlib.util
 import os
 import json
+import shutil
 import sys
 import tempfile
+import threading
+import time
 import types
 import unittest
 from pathlib import Path
@@ -270,6 +273,240 @@ class DiskCleanerMockTest(unittest.TestCase):
         self.assertTrue(cleaner._is_tv_cleanup_allowed(history))
         self.assertEqual(calls["count"], 1)
 
+    def test_tmdb_status_cache_persists_with_state_ttl(self):
+        cleaner = self._new_cleaner()
+        calls = {"count": 0}
+
+        def _tmdb_info(*args, **kwargs):
+            calls["count"] += 1
+            if kwargs.get("tmdbid") == 106:
+                raise RuntimeError("timeout")
+            return {"status": "Ended"}
+
+        cleaner.chain = SimpleNamespace(tmdb_info=_tmdb_info)
+        self.assertTrue(cleaner._is_tv_series_ended_by_tmdb(105))
+        self.assertFalse(cleaner._is_tv_series_ended_by_tmdb(106))
+        cleaner._flush_tv_end_state_cache()
+        stored = cleaner.get_data("tv_end_state_cache")
+        self.assertEqual(stored["105"]["state"], "ended")
+        self.assertEqual(stored["106"]["state"], "error")
+
+        restarted = self._new_cleaner()
+        restarted._tv_end_state_cache = None
+        restarted._plugin_data_store = cleaner._plugin_data_store
+        restarted.chain = cleaner.chain
+        stored["106"]["fetched_at"] -= restarted._tv_end_state_ttl["error"] + 1
+        self.assertTrue(restarted._is_tv_series_ended_by_tmdb(105))
+        self.assertFalse(restarted._is_tv_series_ended_by_tmdb(106))
+        self.assertEqual(calls["count"], 3)
+
+    def test_prefetch_tv_end_states_queries_distinct_ids_concurrently(self):
+        cleaner = self._new_cleaner()
+        cleaner._tmdb_prefetch_rate = 1000.0
+        state = {"active": 0, "peak": 0, "ids": []}
+        guard = self.plugin_mod.threading.Lock()
+
+        def _tmdb_info(*args, **kwargs):
+            with guard:
+                state["active"] += 1
+                state["peak"] = max(state["peak"], state["active"])
+                state["ids"].append(kwargs.get("tmdbid"))
+            self.plugin_mod.time.sleep(0.05)
+            with guard:
+                state["active"] -= 1
+            return {"status": "Ended"}
+
+        cleaner.chain = SimpleNamespace(tmdb_info=_tmdb_info)
+        histories = [self._history(tmdbid=tmdbid) for tmdbid in (201, 202, 203, 201)]
+        histories.append(self._history(mtype="电影", tmdbid=204))
+        fetched = cleaner._prefetch_tv_end_states(histories)
+
+        self.assertEqual(fetched, 3)
+        self.assertEqual(sorted(state["ids"]), [201, 202, 203])
+        self.assertGreater(state["peak"], 1)
+        self.assertTrue(cleaner._is_tv_cleanup_allowed(histories[0]))
+        self.assertEqual(len(state["ids"]), 3)
+
+    def test_playback_index_bulk_import_serves_lookups(self):
+        cleaner = self._new_cleaner()
+        cleaner._prefer_playback_history = True
+        cleaner._playback_ts_cache = {}
+        cleaner._playback_index = None
+        played = SimpleNamespace(last_played_date="2024-05-01T08:00:00.0000000Z")
+        cleaner._mediaserver_chain = SimpleNamespace(
+            librarys=lambda server, hidden: [SimpleNamespace(id="lib1")],
+            items=lambda server, library_id: [
+                SimpleNamespace(tmdbid=301, item_type="电视剧", user_state=played),
+                SimpleNamespace(tmdbid=302, item_type="电影", user_state=SimpleNamespace(last_played_date=None)),
+            ],
+        )
+
+        per_item = []
+
+        def _exists(**kwargs):
+            per_item.append(kwargs)
+            return None
+
+        cleaner._mediaserver_oper = SimpleNamespace(exists=_exists)
+        helper = self.plugin_mod.MediaServerHelper
+        original_services = helper.__dict__["get_services"]
+        helper.get_services = staticmethod(lambda name_filters=None: {"emby": object()})
+        try:
+            updated = cleaner._refresh_playback_index(force=True)
+        finally:
+            helper.get_services = original_services
+
+        played_ts = cleaner._get_history_playback_ts(SimpleNamespace(type="电视剧", tmdbid=301, seasons=None))
+        unplayed_ts = cleaner._get_history_playback_ts(SimpleNamespace(type="电影", tmdbid=302, seasons=None))
+        never_played_season = cleaner._get_history_playback_ts(SimpleNamespace(type="电视剧", tmdbid=303, seasons="S01"))
+        self.assertEqual(per_item, [])
+        # 剧集级播放时间不代表某一季：分季查询改为逐条确认
+        season_ts = cleaner._get_history_playback_ts(SimpleNamespace(type="电视剧", tmdbid=301, seasons="S02"))
+        stored = cleaner.get_data("playback_index")
+
+        self.assertEqual(updated, 1)
+        self.assertEqual(played_ts, cleaner._parse_played_ts("2024-05-01T08:00:00Z"))
+        self.assertIsNone(unplayed_ts)
+        self.assertIsNone(never_played_season)
+        self.assertIsNone(season_ts)
+        self.assertEqual([item.get("season") for item in per_item], [2])
+        self.assertTrue(stored.get("complete"))
+        self.assertIn("tv:301:", stored.get("items"))
+        self.assertEqual(stored.get("watermarks", {}).get("emby"), played_ts)
+
+    def test_playback_index_bulk_import_stores_season_keys(self):
+        cleaner = self._new_cleaner()
+        cleaner._prefer_playback_history = True
+        cleaner._playback_ts_cache = {}
+        cleaner._playback_index = None
+        cleaner._playback_incremental_page = 1
+        cleaner._playback_incremental_max_pages = 1
+        ts = cleaner._parse_played_ts
+        cleaner._mediaserver_chain = SimpleNamespace(
+            librarys=lambda server, hidden: [SimpleNamespace(id="lib1")],
+            items=lambda server, library_id: [
+                SimpleNamespace(
+                    tmdbid=501,
+                    item_type="电视剧",
+                    user_state=SimpleNamespace(last_played_date="2024-05-01T00:00:00.0000000Z"),
+                ),
+            ],
+        )
+        episodes = [
+            {"Type": "Episode", "SeriesId": "s5", "ParentIndexNumber": 1,
+             "UserData": {"LastPlayedDate": "2024-05-01T00:00:00.0000000Z"}},
+            {"Type": "Episode", "SeriesId": "s5", "ParentIndexNumber": 3,
+             "UserData": {"LastPlayedDate": "2020-01-01T00:00:00.0000000Z"}},
+        ]
+        urls = []
+
+        class _Response:
+            status_code = 200
+
+            def __init__(self, payload):
+                self._payload = payload
+
+            def json(self):
+                return self._payload
+
+        def _get_data(url):
+            urls.append(url)
+            if "Ids=" in url:
+                return _Response({"Items": [{"Id": "s5", "ProviderIds": {"Tmdb": "501"}}]})
+            start = int(url.split("StartIndex=")[1].split("&")[0])
+            return _Response({"Items": episodes[start:start + 1]})
+
+        per_item = []
+        cleaner._mediaserver_oper = SimpleNamespace(exists=lambda **kwargs: per_item.append(kwargs))
+        service = SimpleNamespace(instance=SimpleNamespace(get_data=_get_data))
+        helper = self.plugin_mod.MediaServerHelper
+        original_services = helper.__dict__["get_services"]
+        helper.get_services = staticmethod(lambda name_filters=None: {"emby": service})
+        try:
+            cleaner._refresh_playback_index(force=True)
+        finally:
+            helper.get_services = original_services
+
+        lookup = lambda season: cleaner._get_history_playback_ts(
+            SimpleNamespace(type="电视剧", tmdbid="501", seasons=season)
+        )
+        self.assertEqual(lookup("S01"), ts("2024-05-01T00:00:00Z"))
+        self.assertEqual(lookup("S03"), ts("2020-01-01T00:00:00Z"))
+        self.assertIsNone(lookup("S02"))
+        self.assertEqual(per_item, [])
+        # 全量导入不受增量页数上限约束
+        self.assertEqual(len([item for item in urls if "StartIndex" in item]), 3)
+        self.assertTrue(cleaner._playback_index.get("seasons_complete"))
+
+    def test_playback_index_incremental_refresh_stops_at_watermark_with_seasons(self):
+        cleaner = self._new_cleaner()
+        cleaner._prefer_playback_history = True
+        cleaner._playback_ts_cache = {}
+        ts = cleaner._parse_played_ts
+        cleaner._playback_index = {
+            "updated_at": 0,
+            "complete": True,
+            "items": {"tv:401:": ts("2024-01-01T00:00:00Z")},
+            "watermarks": {"emby": ts("2024-03-01T00:00:00Z")},
+            "series_tmdb": {},
+        }
+        cleaner._playback_incremental_page = 2
+        cleaner._mediaserver_chain = SimpleNamespace(
+            librarys=lambda **kwargs: self.fail("full listing should not be used"),
+        )
+        pages = [
+            [
+                {"Type": "Episode", "SeriesId": "s1", "ParentIndexNumber": 2,
+                 "UserData": {"LastPlayedDate": "2024-05-02T00:00:00.0000000Z"}},
+                {"Type": "Movie", "ProviderIds": {"Tmdb": "402"},
+                 "UserData": {"LastPlayedDate": "2024-04-01T00:00:00.0000000Z"}},
+            ],
+            [
+                {"Type": "Episode", "SeriesId": "s1", "ParentIndexNumber": 1,
+                 "UserData": {"LastPlayedDate": "2024-01-15T00:00:00.0000000Z"}},
+                {"Type": "Movie", "ProviderIds": {"Tmdb": "403"},
+                 "UserData": {"LastPlayedDate": "2024-01-10T00:00:00.0000000Z"}},
+            ],
+        ]
+        urls = []
+
+        class _Response:
+            status_code = 200
+
+            def __init__(self, payload):
+                self._payload = payload
+
+            def json(self):
+                return self._payload
+
+        def _get_data(url):
+            urls.append(url)
+            if "Ids=" in url:
+                return _Response({"Items": [{"Id": "s1", "ProviderIds": {"Tmdb": "401"}}]})
+            return _Response({"Items": pages[len([item for item in urls if "StartIndex" in item]) - 1]})
+
+        service = SimpleNamespace(instance=SimpleNamespace(get_data=_get_data))
+        helper = self.plugin_mod.MediaServerHelper
+        original_services = helper.__dict__["get_services"]
+        helper.get_services = staticmethod(lambda name_filters=None: {"emby": service})
+        try:
+            updated = cleaner._refresh_playback_index()
+        finally:
+            helper.get_services = original_services
+
+        items = cleaner._playback_index["items"]
+        self.assertEqual(updated, 3)
+        self.assertEqual(len([item for item in urls if "StartIndex" in item]), 2)
+        self.assertEqual(items.get("tv:401:2"), ts("2024-05-02T00:00:00Z"))
+        self.assertNotIn("tv:401:1", items)
+        self.assertEqual(items.get("movie:402:"), ts("2024-04-01T00:00:00Z"))
+        self.assertNotIn("movie:403:", items)
+        self.assertEqual(cleaner._playback_index["watermarks"]["emby"], ts("2024-05-02T00:00:00Z"))
+        self.assertEqual(
+            cleaner._get_history_playback_ts(SimpleNamespace(type="电视剧", tmdbid="401", seasons="S02")),
+            ts("2024-05-02T00:00:00Z"),
+        )
+
     def test_risk_notice_dialog_only_show_once(self):
         cleaner = self._new_cleaner()
         cleaner.save_data("risk_notice_acked", False)
@@ -313,9 +550,165 @@ class DiskCleanerMockTest(unittest.TestCase):
             {"/media/link/电影", "/media/link/电视剧"},
         )
 
+    def test_run_history_appends_jsonl_and_maintains_rollups(self):
+        cleaner = self._new_cleaner()
+        cleaner._run_history_keep = 3
+        cleaner.save_data("run_history", [
+            {"time": "2026-01-01 00:00:00", "status": "completed", "action_count": 2, "freed_bytes": 100},
+            {"time": "2026-01-02 00:00:00", "status": "skipped", "action_count": 0, "freed_bytes": 0},
+        ])
+        with tempfile.TemporaryDirectory() as tmp:
+            cleaner.get_data_path = lambda: tmp
+            for index in range(5):
+                cleaner._append_run_history(
+                    run_time=f"2026-02-0{index + 1} 00:00:00",
+                    usage=None,
+                    actions=[{"trigger": "t", "freed_bytes": 10}],
+                    freed_bytes=10,
+                    status="failed" if index == 4 else "completed",
+                )
+            log_lines = (Path(tmp) / "run_history.jsonl").read_text(encoding="utf-8").splitlines()
+            recent = cleaner._collect_run_history(limit=2)
+            stats = cleaner._load_run_stats()
+            # 汇总丢失后从日志重建，结果与增量维护一致
+            cleaner.save_data("run_rollups", None)
+            cleaner.save_data("run_rollups", cleaner._load_run_rollups(Path(tmp) / "run_history.jsonl"))
+            rebuilt = cleaner._load_run_stats()
+
+        self.assertLessEqual(len(log_lines), 6)
+        self.assertEqual([item.get("time") for item in recent], ["2026-02-05 00:00:00", "2026-02-04 00:00:00"])
+        # 指标只统计最近 _run_history_keep 轮
+        self.assertEqual(stats.get("total_runs"), 3)
+        self.assertEqual(stats.get("completed_runs"), 2)
+        self.assertEqual(stats.get("skipped_runs"), 0)
+        self.assertEqual(stats.get("failed_runs"), 1)
+        self.assertEqual(stats.get("total_actions"), 3)
+        self.assertEqual(stats.get("total_freed_bytes"), 30)
+        self.assertEqual(stats.get("last_run_at"), "2026-02-05 00:00:00")
+        self.assertEqual(rebuilt, stats)
+        run_ids = [json.loads(line).get("run_id") for line in log_lines]
+        self.assertEqual(len(set(run_ids)), len(run_ids))
+        self.assertTrue(all("-" in run_id for run_id in run_ids))
+
+    def test_get_page_renders_dashboard_snapshot_without_measuring(self):
+        cleaner = self._new_cleaner()
+        calls = {"usage": 0}
+        empty_usage = {"paths": [], "total": 0, "free": 0, "used": 0, "used_percent": 0, "free_percent": 0, "total_text": "0 B", "free_text": "0 B", "used_text": "0 B"}
+
+        def _usage():
+            calls["usage"] += 1
+            return {"download": dict(empty_usage), "library": dict(empty_usage)}
+
+        cleaner._measure_monitor_usage = _usage
+        cleaner._collect_run_history = lambda: []
+        first = cleaner.refresh_dashboard()
+        cleaner.get_page()
+        cleaner.get_page()
+
+        self.assertTrue(first.get("success"))
+        self.assertEqual(calls["usage"], 1)
+        self.assertIn("generated_at", cleaner.get_data("dashboard_snapshot") or {})
+
+        cleaner.refresh_dashboard()
+        self.assertEqual(calls["usage"], 2)
+
+    def test_background_dashboard_refresh_holds_lock_and_never_flushes_deletes(self):
+        cleaner = self._new_cleaner()
+        cleaner._lock = threading.Lock()
+        cleaner._torrent_delete_queue = [{"downloader": "qb", "hash": "h1", "action": {}}]
+        cleaner._delete_downloader_files = True
+        cleaner._collect_run_history = lambda: []
+        flushed = []
+        held = []
+        cleaner._flush_torrent_delete_queue = lambda *args, **kwargs: flushed.append(True)
+
+        def _usage():
+            held.append(cleaner._lock.locked())
+            return {"download": {}, "library": {}}
+
+        cleaner._measure_monitor_usage = _usage
+        cleaner._background_refresh_dashboard()
+
+        self.assertEqual(held, [True])
+        self.assertEqual(flushed, [])
+        self.assertFalse(cleaner._lock.locked())
+
+        cleaner._lock.acquire()
+        try:
+            cleaner._background_refresh_dashboard()
+            self.assertFalse(cleaner.refresh_dashboard().get("success"))
+        finally:
+            cleaner._lock.release()
+        self.assertEqual(held, [True])
+
+    def test_tail_plugin_logs_reads_backward_then_only_appended_bytes(self):
+        cleaner = self._new_cleaner()
+        settings = self.plugin_mod.settings
+        had_log_path = hasattr(settings, "LOG_PATH")
+        original_log_path = getattr(settings, "LOG_PATH", None)
+        with tempfile.TemporaryDirectory() as tmp:
+            log_file = Path(tmp) / "moviepilot.log"
+            lines = []
+            for index in range(3000):
+                name = "diskcleaner" if index % 3 == 0 else "other"
+                lines.append(f"【INFO】2026-03-01 10:{index // 60 % 60:02d}:{index % 60:02d},000 - {name} - line {index}")
+            log_file.write_text("\n".join(lines) + "\n", encoding="utf-8")
+            settings.LOG_PATH = tmp
+            cleaner.get_data_path = lambda: tmp
+            try:
+                first = cleaner._tail_plugin_logs(limit=2)
+                with log_file.open("a", encoding="utf-8") as handle:
+                    handle.write("【INFO】2026-03-02 09:00:00,000 - diskcleaner - appended\n")
+                    handle.write("【INFO】2026-03-02 09:00:01,000 - diskcleaner - partial")
+                cleaner._log_tail_index = None
+                second = cleaner._tail_plugin_logs(limit=5, since="2026-03-02")
+                index = json.loads((Path(tmp) / "log_tail_index.json").read_text(encoding="utf-8"))
+                size_without_partial = log_file.stat().st_size - len("【INFO】2026-03-02 09:00:01,000 - diskcleaner - partial".encode("utf-8"))
+            finally:
+                if had_log_path:
+                    settings.LOG_PATH = original_log_path
+                else:
+                    del settings.LOG_PATH
+
+        self.assertEqual(first.body.splitlines(), [lines[2994], lines[2997]])
+        self.assertEqual(second.body.splitlines(), ["【INFO】2026-03-02 09:00:00,000 - diskcleaner - appended"])
+        self.assertEqual(index.get("offset"), size_without_partial)
+        self.assertEqual(len(index.get("lines") or []), 500)
+
+    def test_tail_plugin_logs_since_older_than_cache_reads_file(self):
+        cleaner = self._new_cleaner()
+        settings = self.plugin_mod.settings
+        had_log_path = hasattr(settings, "LOG_PATH")
+        original_log_path = getattr(settings, "LOG_PATH", None)
+        with tempfile.TemporaryDirectory() as tmp:
+            log_file = Path(tmp) / "moviepilot.log"
+            lines = []
+            for index in range(3000):
+                name = "diskcleaner" if index % 3 == 0 else "other"
+                lines.append(f"【INFO】2026-03-01 10:{index // 60 % 60:02d}:{index % 60:02d},000 - {name} - line {index}")
+            log_file.write_text("\n".join(lines) + "\n", encoding="utf-8")
+            settings.LOG_PATH = tmp
+            cleaner.get_data_path = lambda: tmp
+            try:
+                wide = cleaner._tail_plugin_logs(limit=1000, since="2026-03-01 10:10:00")
+                capped = cleaner._tail_plugin_logs(limit=100, since="2026-03-01 10:10:00")
+                plain = cleaner._tail_plugin_logs(limit=1000)
+            finally:
+                if had_log_path:
+                    settings.LOG_PATH = original_log_path
+                else:
+                    del settings.LOG_PATH
+
+        wide_lines = wide.body.splitlines()
+        self.assertEqual(len(wide_lines), 800)
+        self.assertEqual(wide_lines[0], lines[600])
+        self.assertEqual(wide_lines[-1], lines[2997])
+        self.assertEqual(capped.body.splitlines(), wide_lines[-100:])
+        self.assertEqual(len(plain.body.splitlines()), 500)
+
     def test_get_page_uses_compact_history_layout(self):
         cleaner = self._new_cleaner()
-        cleaner._collect_monitor_usage = lambda: {
+        cleaner._measure_monitor_usage = lambda: {
             "download": {"paths": [], "total": 0, "free": 0, "used": 0, "used_percent": 0, "free_percent": 0, "total_text": "0 B", "free_text": "0 B", "used_text": "0 B"},
             "library": {"paths": [], "total": 0, "free": 0, "used": 0, "used_percent": 0, "free_percent": 0, "total_text": "0 B", "free_text": "0 B", "used_text": "0 B"},
         }
@@ -339,7 +732,7 @@ class DiskCleanerMockTest(unittest.TestCase):
 
     def test_usage_card_contains_directory_paths(self):
         cleaner = self._new_cleaner()
-        cleaner._collect_monitor_usage = lambda: {
+        cleaner._measure_monitor_usage = lambda: {
             "download": {
                 "paths": [
                     "/media/down/a",
@@ -378,7 +771,7 @@ class DiskCleanerMockTest(unittest.TestCase):
 
     def test_usage_card_show_ellipsis_when_many_paths(self):
         cleaner = self._new_cleaner()
-        cleaner._collect_monitor_usage = lambda: {
+        cleaner._measure_monitor_usage = lambda: {
             "download": {
                 "paths": [f"/media/down/{idx}" for idx in range(1, 12)],
                 "total": 1,
@@ -498,7 +891,6 @@ class DiskCleanerMockTest(unittest.TestCase):
 
             cleaner._library_paths = lambda: [library_root]
             cleaner._download_paths = lambda: [download_root]
-            cleaner._path_size = lambda _path: 1
 
             delete_roots_args = []
 
@@ -525,6 +917,26 @@ class DiskCleanerMockTest(unittest.TestCase):
             self.assertEqual(((result.get("steps") or {}).get("media") or {}).get("done"), 1)
             self.assertEqual(((result.get("steps") or {}).get("scrape") or {}).get("done"), 1)
 
+    def test_read_jsonl_tail_logs_with_plugin_prefix(self):
+        cleaner = self._new_cleaner()
+        original_logger = self.plugin_mod.logger
+        warning_logs = []
+        self.plugin_mod.logger = SimpleNamespace(
+            info=lambda *args, **kwargs: None,
+            warning=lambda msg, *args, **kwargs: warning_logs.append(str(msg)),
+            error=lambda *args, **kwargs: None,
+            debug=lambda *args, **kwargs: None,
+        )
+        try:
+            with tempfile.TemporaryDirectory() as temp_dir:
+                records = cleaner._read_jsonl_tail(Path(temp_dir) / "missing.jsonl", 10)
+        finally:
+            self.plugin_mod.logger = original_logger
+
+        self.assertEqual(records, [])
+        self.assertEqual(len(warning_logs), 1)
+        self.assertTrue(warning_logs[0].startswith(f"{cleaner.plugin_name}读取运行记录失败"))
+
     def test_resolve_media_cleanup_target_movie_uses_parent_dir_and_logs(self):
         cleaner = self._new_cleaner()
         original_logger = self.plugin_mod.logger
@@ -615,6 +1027,81 @@ class DiskCleanerMockTest(unittest.TestCase):
             self.assertIn(download_file.as_posix(), sibling_paths)
             self.assertNotIn(season_file.as_posix(), sibling_paths)
 
+    def test_scan_files_filters_extension_and_symlinks(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir)
+            (root / "Show" / "Season 01").mkdir(parents=True)
+            media_file = root / "Show" / "Season 01" / "e01.mkv"
+            media_file.write_bytes(b"media")
+            (root / "Show" / "tvshow.nfo").write_text("nfo")
+            os.symlink(media_file, root / "link.mkv")
+
+            stats = {}
+            regular = list(self.DiskCleaner._scan_files(root, exts={".mkv"}, stats=stats))
+            with_links = [
+                path_text
+                for path_text, _ in self.DiskCleaner._scan_files(
+                    root, exts={".mkv"}, with_stat=False, include_symlinks=True
+                )
+            ]
+
+        self.assertEqual([(path_text, stat.st_size) for path_text, stat in regular], [(media_file.as_posix(), 5)])
+        self.assertEqual(stats, {"files": 2, "filtered_ext": 1, "stat_errors": 0})
+        self.assertEqual(sorted(with_links), sorted([media_file.as_posix(), (root / "link.mkv").as_posix()]))
+
+    def test_hardlink_inode_map_built_once_per_run(self):
+        cleaner = self._new_cleaner()
+        cleaner._library_index_enabled = False
+        with tempfile.TemporaryDirectory() as temp_dir:
+            library_dir = Path(temp_dir) / "library"
+            download_dir = Path(temp_dir) / "download"
+            library_dir.mkdir()
+            download_dir.mkdir()
+            first = library_dir / "a.mkv"
+            second = library_dir / "b.mkv"
+            first.write_bytes(b"a")
+            second.write_bytes(b"b")
+            os.link(first, download_dir / "a.mkv")
+            os.link(second, download_dir / "b.mkv")
+
+            walked = []
+            original_scan = cleaner._scan_files
+
+            def _scan_files(root, *args, **kwargs):
+                walked.append(Path(root).as_posix())
+                return original_scan(root, *args, **kwargs)
+
+            cleaner._scan_files = _scan_files
+            roots = [library_dir, download_dir]
+            first_siblings = cleaner._collect_hardlink_siblings(first, roots)
+            second_siblings = cleaner._collect_hardlink_siblings(second, roots)
+
+        self.assertEqual([item.name for item in first_siblings], ["a.mkv"])
+        self.assertEqual(second_siblings[0].as_posix(), (download_dir / "b.mkv").as_posix())
+        self.assertEqual(sorted(walked), sorted([library_dir.as_posix(), download_dir.as_posix()]))
+
+    def test_hardlink_walk_filters_by_entry_device_not_root_device(self):
+        cleaner = self._new_cleaner()
+        cleaner._library_index_enabled = False
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir) / "download"
+            root.mkdir()
+            root_dev = int(root.stat().st_dev)
+            mount_dev = root_dev + 1000
+            mounted = root / "mnt" / "a.mkv"
+            local = root / "b.mkv"
+
+            def _scan_files(scan_root, *args, **kwargs):
+                yield mounted.as_posix(), SimpleNamespace(st_dev=mount_dev, st_ino=7, st_nlink=2)
+                yield local.as_posix(), SimpleNamespace(st_dev=root_dev, st_ino=7, st_nlink=2)
+
+            cleaner._scan_files = _scan_files
+            paths = cleaner._hardlink_paths_by_inode({(mount_dev, 7)}, [root])
+            inode_map = cleaner._hardlink_inode_map
+
+        self.assertEqual([item.as_posix() for item in paths], [mounted.as_posix()])
+        self.assertEqual(list(inode_map.keys()), [(mount_dev, 7)])
+
     def test_expand_media_targets_with_hardlinks_orders_files_before_dirs(self):
         cleaner = self._new_cleaner()
         with tempfile.TemporaryDirectory() as temp_dir:
@@ -640,6 +1127,198 @@ class DiskCleanerMockTest(unittest.TestCase):
             self.assertTrue(any(item.as_posix() == season_dir.as_posix() for item in targets))
             self.assertTrue(any(item.as_posix() == download_file.as_posix() for item in targets))
 
+    def test_find_transfer_history_uses_dest_map_snapshot(self):
+        cleaner = self._new_cleaner()
+        cleaner._media_path_rules = [("/server/media", "/local/media")]
+        calls = {"pages": [], "get_by_dest": 0}
+        older = SimpleNamespace(id=1, dest="/server/media/movie/a.mkv", type="电影")
+        newer = SimpleNamespace(id=5, dest="/server/media/movie/a.mkv", type="电影")
+
+        def _list_by_page(db, page, count, status):
+            calls["pages"].append(page)
+            return [newer, older] if page == 1 else []
+
+        def _get_by_dest(_dest):
+            calls["get_by_dest"] += 1
+            return None
+
+        cleaner._transfer_oper = SimpleNamespace(_db=None, get_by_dest=_get_by_dest)
+        transfer_model = self.plugin_mod.TransferHistory
+        transfer_model.list_by_page = staticmethod(_list_by_page)
+        try:
+            first = cleaner._find_transfer_history_by_media_path(Path("/local/media/movie/a.mkv"))
+            missing = cleaner._find_transfer_history_by_media_path(Path("/local/media/movie/b.mkv"))
+            cleaner._forget_transfer_dest_map_record(1)
+            after_delete = cleaner._find_transfer_history_by_media_path(Path("/local/media/movie/a.mkv"))
+        finally:
+            del transfer_model.list_by_page
+
+        self.assertIs(first, older)
+        self.assertIsNone(missing)
+        self.assertIsNone(after_delete)
+        self.assertEqual(calls["pages"], [1])
+        self.assertEqual(calls["get_by_dest"], 0)
+        self.assertEqual(cleaner._transfer_dest_map, {})
+        self.assertEqual(cleaner._transfer_dest_map_keys, {})
+
+    def test_library_candidate_heap_scans_once_and_pops_oldest_first(self):
+        cleaner = self._new_cleaner()
+        cleaner._transfer_oper = None
+        cleaner._media_cleanup_priority = "movie"
+        with tempfile.TemporaryDirectory() as temp_dir:
+            library_root = Path(temp_dir) / "library"
+            library_root.mkdir()
+            old_file = library_root / "old.mkv"
+            new_file = library_root / "new.mkv"
+            old_file.write_bytes(b"o")
+            new_file.write_bytes(b"n")
+            os.utime(old_file, (1000, 1000))
+            os.utime(new_file, (2000, 2000))
+
+            calls = {"library_paths": 0}
+
+            def _library_paths():
+                calls["library_paths"] += 1
+                return [library_root]
+
+            cleaner._library_paths = _library_paths
+            heap = cleaner._build_library_candidate_heap(skipped_paths=set())
+            first = cleaner._pop_library_candidate(heap, skipped_paths=set())
+            second = cleaner._pop_library_candidate(heap, skipped_paths=set())
+            third = cleaner._pop_library_candidate(heap, skipped_paths=set())
+
+        self.assertEqual(calls["library_paths"], 1)
+        self.assertEqual(first.get("path").as_posix(), old_file.as_posix())
+        self.assertEqual(second.get("path").as_posix(), new_file.as_posix())
+        self.assertIsNone(third)
+        self.assertEqual(cleaner._last_library_scan_stats.get("eligible"), 2)
+
+    def test_scan_library_roots_parallel_matches_serial(self):
+        cleaner = self._new_cleaner()
+        with tempfile.TemporaryDirectory() as temp_dir:
+            roots = []
+            for root_name in ("movies", "tv"):
+                root = Path(temp_dir) / root_name
+                for sub_name in ("A", "B"):
+                    (root / sub_name).mkdir(parents=True)
+                    (root / sub_name / f"{sub_name}.mkv").write_bytes(b"m")
+                    (root / sub_name / f"{sub_name}.nfo").write_text("n")
+                (root / "loose.mp4").write_bytes(b"l")
+                roots.append(root)
+
+            cleaner._library_scan_workers = 1
+            serial = cleaner._scan_library_roots(roots, exts={".mkv", ".mp4"})
+            cleaner._library_scan_workers = 4
+            cleaner._library_scan_device_limit = 2
+            parallel = cleaner._scan_library_roots(roots, exts={".mkv", ".mp4"})
+
+        for root in roots:
+            serial_entries, serial_stats = serial[root.as_posix()]
+            parallel_entries, parallel_stats = parallel[root.as_posix()]
+            self.assertEqual(
+                sorted(path_text for path_text, _ in serial_entries),
+                sorted(path_text for path_text, _ in parallel_entries),
+            )
+            self.assertEqual(len(parallel_entries), 3)
+            self.assertEqual(serial_stats, parallel_stats)
+            self.assertEqual(parallel_stats.get("filtered_ext"), 2)
+
+    def test_library_index_refreshes_incrementally_and_finds_hardlinks(self):
+        cleaner = self._new_cleaner()
+        cleaner._transfer_oper = None
+        with tempfile.TemporaryDirectory() as temp_dir:
+            data_dir = Path(temp_dir) / "data"
+            library_root = Path(temp_dir) / "library"
+            download_root = Path(temp_dir) / "downloads"
+            (library_root / "Movie A").mkdir(parents=True)
+            download_root.mkdir()
+            media_file = library_root / "Movie A" / "a.mkv"
+            media_file.write_bytes(b"abc")
+            (library_root / "Movie A" / "a.nfo").write_text("nfo")
+            seed_file = download_root / "a.mkv"
+            os.link(media_file, seed_file)
+            cleaner.get_data_path = lambda: data_dir
+            cleaner._library_paths = lambda: [library_root]
+
+            cleaner._library_index_roots = set()
+            heap = cleaner._build_library_candidate_heap(skipped_paths=set())
+            first_stats = dict(cleaner._last_library_scan_stats)
+            cleaner._library_index_roots = set()
+            refresh_stats = cleaner._library_index.refresh([library_root])
+            siblings = cleaner._collect_hardlink_siblings(media_file, [library_root, download_root])
+            dir_size = sum(item[1] for item in cleaner._library_index.subtree_inodes(library_root / "Movie A"))
+            cleaner._library_index.close()
+
+        self.assertEqual(len(heap), 1)
+        self.assertEqual(first_stats.get("files_total"), 2)
+        self.assertEqual(first_stats.get("filtered_non_media"), 1)
+        self.assertEqual(refresh_stats.get("dirs_rescanned"), 0)
+        self.assertEqual([item.as_posix() for item in siblings], [seed_file.as_posix()])
+        self.assertEqual(dir_size, 6)
+
+    def test_library_index_parallel_refresh_matches_serial(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            roots = []
+            for index in range(3):
+                root = Path(temp_dir) / f"library{index}"
+                (root / "Show" / "S01").mkdir(parents=True)
+                for episode in range(4):
+                    (root / "Show" / "S01" / f"e{episode}.mkv").write_bytes(b"x" * (episode + 1))
+                (root / "Movie").mkdir()
+                (root / "Movie" / "m.mkv").write_bytes(b"m")
+                roots.append(root)
+            serial_index = self.plugin_mod.LibraryFileIndex(Path(temp_dir) / "serial.db")
+            parallel_index = self.plugin_mod.LibraryFileIndex(Path(temp_dir) / "parallel.db")
+            serial_stats = serial_index.refresh(roots)
+            parallel_stats = parallel_index.refresh(roots, workers=3, device_limit=2)
+            shutil.rmtree(roots[1] / "Movie")
+            second_stats = parallel_index.refresh(roots, workers=3, device_limit=2)
+            counts = [parallel_index.count_files(root) for root in roots]
+            serial_sizes = [sum(item[1] for item in serial_index.subtree_inodes(root)) for root in roots]
+            parallel_sizes = [sum(item[1] for item in parallel_index.subtree_inodes(root)) for root in roots]
+            serial_index.close()
+            parallel_index.close()
+
+        self.assertEqual(serial_stats, parallel_stats)
+        self.assertEqual(parallel_stats.get("files_updated"), 15)
+        self.assertEqual(second_stats.get("dirs_rescanned"), 1)
+        self.assertEqual(second_stats.get("dirs_removed"), 1)
+        self.assertEqual(counts, [5, 4, 5])
+        self.assertEqual(parallel_sizes[0], serial_sizes[0])
+
+    def test_library_index_parallel_refresh_fans_out_single_root_by_subdirectory(self):
+        index_cls = self.plugin_mod.LibraryFileIndex
+        original_scan_dir = index_cls.__dict__["_scan_dir"]
+        threads = {}
+
+        def _scan_dir(dir_text, *args, **kwargs):
+            threads[dir_text] = threading.current_thread().name
+            return original_scan_dir.__func__(dir_text, *args, **kwargs)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir) / "library"
+            for name in ("A", "B", "C"):
+                (root / name).mkdir(parents=True)
+                (root / name / f"{name}.mkv").write_bytes(b"x")
+            (root / "top.mkv").write_bytes(b"t")
+            serial_index = index_cls(Path(temp_dir) / "serial.db")
+            parallel_index = index_cls(Path(temp_dir) / "parallel.db")
+            serial_stats = serial_index.refresh([root])
+            index_cls._scan_dir = staticmethod(_scan_dir)
+            try:
+                parallel_stats = parallel_index.refresh([root], workers=3, device_limit=3)
+            finally:
+                index_cls._scan_dir = original_scan_dir
+            counts = (serial_index.count_files(root), parallel_index.count_files(root))
+            serial_index.close()
+            parallel_index.close()
+
+        self.assertEqual(serial_stats, parallel_stats)
+        self.assertEqual(counts, (4, 4))
+        self.assertFalse(threads[root.as_posix()].startswith("diskcleaner-index"))
+        for name in ("A", "B", "C"):
+            self.assertTrue(threads[(root / name).as_posix()].startswith("diskcleaner-index"))
+
     def test_clean_by_download_threshold_skip_when_no_trigger(self):
         cleaner = self._new_cleaner()
         cleaner._monitor_download = True
@@ -728,6 +1407,137 @@ class DiskCleanerMockTest(unittest.TestCase):
         self.assertIn("资源目录阈值", reasons)
         self.assertIn("下载器做种时长阈值", reasons)
 
+    def test_pick_oldest_transfer_history_streams_preferred_first(self):
+        cleaner = self._new_cleaner()
+        cleaner._media_cleanup_priority = "tv"
+        cleaner._protect_recent_days = 0
+        cleaner._transfer_oper = SimpleNamespace(_db=None)
+        records = [
+            SimpleNamespace(id=3, date="2024-03-01 00:00:00", type="电视剧", dest="/media/tv/b.mkv"),
+            SimpleNamespace(id=1, date="2024-01-01 00:00:00", type="电影", dest="/media/movie/a.mkv"),
+            SimpleNamespace(id=2, date="2024-02-01 00:00:00", type="电视剧", dest="/media/tv/a.mkv"),
+            SimpleNamespace(id=4, date="2024-04-01 00:00:00", type="电视剧", dest="/media/tv/c.mkv"),
+        ]
+        tv_checks = []
+
+        def _tv_allowed(history):
+            tv_checks.append(history.id)
+            return history.id != 2
+
+        cleaner._is_tv_cleanup_allowed = _tv_allowed
+        transfer_model = self.plugin_mod.TransferHistory
+        transfer_model.list_by_page = staticmethod(lambda db, page, count, status: list(records))
+        try:
+            first = cleaner._pick_oldest_transfer_history(skipped_ids=set())
+            second = cleaner._pick_oldest_transfer_history(skipped_ids={first.id})
+        finally:
+            del transfer_model.list_by_page
+
+        self.assertEqual(first.id, 3)
+        self.assertEqual(second.id, 4)
+        self.assertEqual(tv_checks, [2, 3, 4])
+        self.assertEqual(cleaner._transfer_history_stream_stats.get("tv_unended"), 1)
+
+    def test_pick_oldest_transfer_history_skips_rows_queued_for_delete(self):
+        cleaner = self._new_cleaner()
+        cleaner._media_cleanup_priority = "movie"
+        cleaner._protect_recent_days = 0
+        cleaner._is_tv_cleanup_allowed = lambda history: True
+        records = [
+            SimpleNamespace(id=1, date="2024-01-01 00:00:00", type="电影", dest="/media/movie/a.mkv"),
+            SimpleNamespace(id=2, date="2024-02-01 00:00:00", type="电影", dest="/media/movie/b.mkv"),
+            SimpleNamespace(id=3, date="2024-03-01 00:00:00", type="电影", dest="/media/movie/c.mkv"),
+        ]
+        cleaner._iter_transfer_history_ordered = lambda: iter(records)
+        cleaner._history_delete_queue = {"transfer_ids": set(), "hashes": set(), "tickets": [], "unbound": []}
+
+        first = cleaner._pick_oldest_transfer_history(skipped_ids=set())
+        # 清理第一条时同 hash 的第二条也已排队待删
+        cleaner._history_delete_queue["transfer_ids"].update({1, 2})
+        second = cleaner._pick_oldest_transfer_history(skipped_ids={first.id})
+
+        self.assertEqual(first.id, 1)
+        self.assertEqual(second.id, 3)
+        self.assertEqual(cleaner._transfer_history_stream_stats.get("queued"), 1)
+        self.assertEqual(cleaner._transfer_history_stream_stats.get("checked"), 2)
+
+    def test_plan_deficit_batch_stops_once_deficit_covered(self):
+        cleaner = self._new_cleaner()
+        cleaner._dry_run = False
+        cleaner._max_delete_items = 5
+        cleaner._max_gb_per_run = 10
+        cleaner._max_gb_per_day = 0
+        cleaner._current_run_freed_bytes = 0
+        gib = 1024 ** 3
+        queue = [
+            ("/lib/tv/S01/e1.mkv", "/lib/tv/S01", 3 * gib),
+            ("/lib/tv/S01/e2.mkv", "/lib/tv/S01", 3 * gib),
+            ("/lib/movie/huge", "/lib/movie/huge", 20 * gib),
+            ("/lib/movie/a", "/lib/movie/a", 2 * gib),
+            ("/lib/movie/b", "/lib/movie/b", 2 * gib),
+            ("/lib/movie/c", "/lib/movie/c", 2 * gib),
+        ]
+        pending = list(queue)
+
+        plan, planned_bytes = cleaner._plan_deficit_batch(
+            next_candidate=lambda: pending.pop(0) if pending else None,
+            estimate=lambda item: (item[1], item[2]),
+            deficit=6 * gib,
+            actions_count=0,
+        )
+
+        self.assertEqual([item[0] for item in plan], ["/lib/tv/S01/e1.mkv", "/lib/movie/a", "/lib/movie/b"])
+        self.assertEqual(planned_bytes, 7 * gib)
+        self.assertEqual(
+            cleaner._usage_deficit_bytes({"total": 100 * gib, "free": 5 * gib}, "percent", 10, 15),
+            10 * gib + 1,
+        )
+
+    def test_estimate_media_cleanup_counts_hardlink_siblings_and_stops_on_zero(self):
+        cleaner = self._new_cleaner()
+        cleaner._library_index_enabled = False
+        cleaner._clean_media_data = True
+        cleaner._clean_scrape_data = False
+        cleaner._force_hardlink_cleanup = True
+        with tempfile.TemporaryDirectory() as temp_dir:
+            library_dir = Path(temp_dir) / "library"
+            download_dir = Path(temp_dir) / "download"
+            movie_dir = library_dir / "Movie (2020)"
+            movie_dir.mkdir(parents=True)
+            download_dir.mkdir()
+            media_file = movie_dir / "movie.mkv"
+            media_file.write_bytes(b"x" * 500)
+            os.link(media_file, download_dir / "movie.mkv")
+            history = SimpleNamespace(type="电影", seasons=None, download_hash="h1")
+            roots = [library_dir, download_dir]
+
+            key, size = cleaner._estimate_media_cleanup(media_file, history, roots)
+            cleaner._force_hardlink_cleanup = False
+            _, size_without_links = cleaner._estimate_media_cleanup(media_file, history, [library_dir])
+            cleaner._clean_downloader_seed = True
+            cleaner._delete_downloader_files = True
+            cleaner._download_paths = lambda: [download_dir]
+            _, size_with_torrent = cleaner._estimate_media_cleanup(media_file, history, [library_dir])
+
+        self.assertEqual(key, movie_dir.as_posix())
+        self.assertEqual(size, 500)
+        self.assertEqual(size_without_links, 0)
+        self.assertEqual(size_with_torrent, 500)
+
+        cleaner._dry_run = False
+        cleaner._max_delete_items = 5
+        cleaner._max_gb_per_run = 0
+        cleaner._max_gb_per_day = 0
+        pending = [("/lib/a", 0), ("/lib/b", 0), ("/lib/c", 0)]
+        plan, planned_bytes = cleaner._plan_deficit_batch(
+            next_candidate=lambda: pending.pop(0) if pending else None,
+            estimate=lambda item: item,
+            deficit=500,
+            actions_count=0,
+        )
+        self.assertEqual(plan, [("/lib/a", 0)])
+        self.assertEqual(planned_bytes, 0)
+
     def test_clean_by_transfer_history_oldest_run_once(self):
         cleaner = self._new_cleaner()
         cleaner._current_run_freed_bytes = 0
@@ -741,6 +1551,30 @@ class DiskCleanerMockTest(unittest.TestCase):
         self.assertEqual(len(actions), 1)
         self.assertEqual(cleaner._current_run_freed_bytes, 123)
 
+    def test_clean_by_transfer_history_oldest_closes_cursor_session(self):
+        cleaner = self._new_cleaner()
+        cleaner._current_run_freed_bytes = 0
+        cleaner._flow3_trigger_reasons = lambda usage: ["资源目录阈值"] if cleaner._current_run_freed_bytes == 0 else []
+        cleaner._collect_monitor_usage = lambda: {"download": {}, "library": {}}
+        cleaner._is_run_limit_reached = lambda actions: False
+        cleaner._cleanup_by_transfer_history = lambda history, trigger: {"freed_bytes": 123}
+        events = []
+
+        def _candidates(stats):
+            events.append("open")
+            try:
+                for hid in (1, 2, 3):
+                    yield SimpleNamespace(id=hid)
+            finally:
+                events.append("close")
+
+        cleaner._iter_transfer_history_candidates = _candidates
+        actions = cleaner._clean_by_transfer_history_oldest()
+
+        self.assertEqual(len(actions), 1)
+        self.assertEqual(events, ["open", "close"])
+        self.assertIsNone(cleaner._transfer_history_stream)
+
     def test_cleanup_by_torrent_scope_requires_mp_history_when_no_hardlink_fallback(self):
         cleaner = self._new_cleaner()
         cleaner._media_servers = ["emby"]
@@ -942,6 +1776,424 @@ class DiskCleanerMockTest(unittest.TestCase):
         self.assertTrue(any("下载器候选扫描无结果" in msg for msg in info_logs))
         self.assertTrue(any("tr:完成1 可选0" in msg for msg in info_logs))
 
+    def test_pick_longest_seeding_torrent_reuses_run_snapshot_and_forgets_deleted(self):
+        cleaner = self._new_cleaner()
+        cleaner._downloaders = ["qb"]
+        cleaner._clean_downloader_seed = True
+        cleaner._media_flow_seed_check = True
+        cleaner._seeding_days = 1
+        cleaner._torrent_snapshots = {}
+        original_downloader_helper = self.plugin_mod.DownloaderHelper
+        original_time = self.plugin_mod.time.time
+        calls = {"list": 0}
+
+        class _QBInstance:
+            @staticmethod
+            def get_torrents(status=None, ids=None, tags=None):
+                calls["list"] += 1
+                return ([
+                    {"hash": "q1", "name": "new", "completion_on": 900000},
+                    {"hash": "q2", "name": "old", "completion_on": 100},
+                ], False)
+
+            @staticmethod
+            def delete_torrents(delete_file=False, ids=None):
+                return True
+
+        service = SimpleNamespace(instance=_QBInstance(), type="qbittorrent")
+
+        class _FakeDownloaderHelper:
+            def get_services(self, name_filters=None):
+                return {"qb": service}
+
+            def get_service(self, name=None):
+                return service
+
+        self.plugin_mod.DownloaderHelper = _FakeDownloaderHelper
+        self.plugin_mod.time.time = lambda: 1000000
+        try:
+            first = cleaner._pick_longest_seeding_torrent(min_days=None, skipped_hashes=set())
+            second = cleaner._pick_longest_seeding_torrent(min_days=None, skipped_hashes={"q2"})
+            self.assertTrue(cleaner._can_delete_torrent_in_media_flow("qb", "q2"))
+            self.assertTrue(cleaner._delete_torrent("qb", "q2"))
+            third = cleaner._pick_longest_seeding_torrent(min_days=None, skipped_hashes=set())
+            self.assertFalse(cleaner._can_delete_torrent_in_media_flow("qb", "q2"))
+        finally:
+            self.plugin_mod.DownloaderHelper = original_downloader_helper
+            self.plugin_mod.time.time = original_time
+
+        self.assertEqual((first or {}).get("hash"), "q2")
+        self.assertEqual((second or {}).get("hash"), "q1")
+        self.assertEqual((third or {}).get("hash"), "q1")
+        self.assertEqual(calls["list"], 1)
+
+    def test_qbittorrent_replica_applies_maindata_deltas_by_rid(self):
+        cleaner = self._new_cleaner()
+        cleaner._downloaders = ["qb"]
+        original_downloader_helper = self.plugin_mod.DownloaderHelper
+        rids = []
+        responses = [
+            {
+                "rid": 1,
+                "full_update": True,
+                "torrents": {
+                    "q1": {"name": "a", "state": "uploading", "progress": 1, "completion_on": 100, "ratio": 2},
+                    "q2": {"name": "b", "state": "downloading", "progress": 0.5, "completion_on": -1},
+                },
+            },
+            {
+                "rid": 2,
+                "torrents": {"q2": {"state": "uploading", "progress": 1, "completion_on": 50}},
+                "torrents_removed": ["q1"],
+            },
+        ]
+
+        class _Client:
+            @staticmethod
+            def sync_maindata(rid=0):
+                rids.append(rid)
+                return responses[len(rids) - 1]
+
+        class _QBInstance:
+            qbc = _Client()
+
+            @staticmethod
+            def get_torrents(status=None, ids=None, tags=None):
+                raise AssertionError("full listing should not be used")
+
+        class _FakeDownloaderHelper:
+            def get_services(self, name_filters=None):
+                return {"qb": SimpleNamespace(instance=_QBInstance(), type="qbittorrent")}
+
+        self.plugin_mod.DownloaderHelper = _FakeDownloaderHelper
+        try:
+            first = cleaner._pick_longest_seeding_torrent(min_days=None, skipped_hashes=set())
+            cleaner._flush_torrent_replicas()
+            cleaner._torrent_replicas = None
+            second = cleaner._pick_longest_seeding_torrent(min_days=None, skipped_hashes=set())
+            cleaner._flush_torrent_replicas()
+        finally:
+            self.plugin_mod.DownloaderHelper = original_downloader_helper
+
+        self.assertEqual(rids, [0, 1])
+        self.assertEqual((first or {}).get("hash"), "q1")
+        self.assertEqual((second or {}).get("hash"), "q2")
+        stored = (cleaner.get_data("torrent_replica") or {}).get("qb") or {}
+        self.assertEqual(stored.get("rid"), 2)
+        self.assertEqual(set((stored.get("torrents") or {}).keys()), {"q2"})
+        self.assertNotIn("ratio", (stored.get("torrents") or {}).get("q2") or {})
+
+    def test_prefetch_torrent_snapshots_marks_slow_downloader_timeout(self):
+        cleaner = self._new_cleaner()
+        cleaner._downloader_timeout = 1
+        release = threading.Event()
+
+        class _FastInstance:
+            @staticmethod
+            def get_completed_torrents():
+                return [{"hash": "f1", "name": "fast", "completion_on": 1}]
+
+        class _SlowInstance:
+            @staticmethod
+            def get_completed_torrents():
+                release.wait(10)
+                return [{"hash": "s1", "name": "slow", "completion_on": 1}]
+
+        services = {
+            "fast": SimpleNamespace(instance=_FastInstance()),
+            "slow": SimpleNamespace(instance=_SlowInstance()),
+        }
+        store = {}
+        started = time.time()
+        try:
+            cleaner._prefetch_torrent_snapshots(store, services)
+            elapsed = time.time() - started
+        finally:
+            release.set()
+
+        self.assertLess(elapsed, 5)
+        self.assertIn("超时", store["slow"].get("error"))
+        self.assertIn("f1", store["fast"]["by_hash"])
+
+    def test_prefetch_torrent_snapshots_drops_replica_from_timed_out_worker(self):
+        cleaner = self._new_cleaner()
+        cleaner._downloader_timeout = 1
+        cleaner._downloader_incremental_sync = True
+        cleaner._torrent_replicas = {"slow": {"type": "qbittorrent", "rid": 5, "torrents": {}}}
+        release = threading.Event()
+        finished = threading.Event()
+
+        def _client(name, blocker=None):
+            class _Client:
+                @staticmethod
+                def sync_maindata(rid=0):
+                    if blocker:
+                        blocker.wait(10)
+                        finished.set()
+                    return {
+                        "rid": rid + 1,
+                        "full_update": True,
+                        "torrents": {name: {"name": name, "state": "uploading", "progress": 1, "completion_on": 1}},
+                    }
+
+            return SimpleNamespace(qbc=_Client())
+
+        services = {
+            "fast": SimpleNamespace(instance=_client("f1"), type="qbittorrent"),
+            "slow": SimpleNamespace(instance=_client("s1", release), type="qbittorrent"),
+        }
+        store = {}
+        try:
+            cleaner._prefetch_torrent_snapshots(store, services)
+        finally:
+            release.set()
+        self.assertTrue(finished.wait(5))
+        time.sleep(0.05)
+
+        self.assertIn("超时", store["slow"].get("error"))
+        self.assertIn("f1", store["fast"]["by_hash"])
+        self.assertIsNone(store["fast"]["replica_target"])
+        self.assertEqual(cleaner._torrent_replicas["slow"], {"type": "qbittorrent", "rid": 5, "torrents": {}})
+        self.assertEqual(cleaner._torrent_replicas["fast"]["rid"], 1)
+        self.assertTrue(cleaner._torrent_replicas_dirty)
+
+    def test_queued_torrent_deletes_flush_as_one_batch_with_per_hash_verification(self):
+        cleaner = self._new_cleaner()
+        cleaner._enable_retry_queue = True
+        cleaner._delete_downloader_files = False
+        cleaner._torrent_delete_queue = []
+        original_downloader_helper = self.plugin_mod.DownloaderHelper
+        delete_calls = []
+
+        class _QBInstance:
+            @staticmethod
+            def delete_torrents(delete_file=False, ids=None):
+                delete_calls.append((delete_file, list(ids)))
+                return True
+
+            @staticmethod
+            def get_torrents(status=None, ids=None, tags=None):
+                return ([{"hash": "h2"}], False)
+
+        service = SimpleNamespace(instance=_QBInstance(), type="qbittorrent")
+
+        class _FakeDownloaderHelper:
+            def get_service(self, name=None):
+                return service
+
+        self.plugin_mod.DownloaderHelper = _FakeDownloaderHelper
+        try:
+            self.assertTrue(cleaner._delete_torrent("qb", "h1"))
+            self.assertTrue(cleaner._delete_torrent("qb", "h2"))
+            self.assertEqual(delete_calls, [])
+            action = {
+                "action": "删种1",
+                "steps": {"downloader": cleaner._build_step_result(1, 1)},
+            }
+            cleaner._bind_deferred_deletes("qb", "h2", action, {
+                "mode": "torrent",
+                "retry_key": "torrent:h2",
+                "download_hash": "h2",
+                "downloader": "qb",
+            })
+            deleted = cleaner._flush_torrent_delete_queue()
+        finally:
+            self.plugin_mod.DownloaderHelper = original_downloader_helper
+
+        self.assertEqual(deleted, 1)
+        self.assertEqual(delete_calls, [(False, ["h1", "h2"])])
+        self.assertEqual(action["steps"]["downloader"]["failed"], 1)
+        jobs = cleaner._load_retry_store()
+        self.assertEqual(list(jobs.keys()), ["torrent:h2"])
+        self.assertEqual((jobs["torrent:h2"].get("payload") or {}).get("failed_steps"), ["downloader"])
+
+    def test_size_triggered_torrent_flush_waits_for_binding_and_retries_failure(self):
+        cleaner = self._new_cleaner()
+        cleaner._enable_retry_queue = True
+        cleaner._delete_downloader_files = True
+        cleaner._torrent_delete_batch_size = 1
+        cleaner._torrent_delete_queue = []
+        cleaner._calc_usage = lambda paths: {}
+        cleaner._download_paths = lambda: []
+        cleaner._library_paths = lambda: []
+        original_downloader_helper = self.plugin_mod.DownloaderHelper
+        delete_calls = []
+
+        class _QBInstance:
+            @staticmethod
+            def delete_torrents(delete_file=False, ids=None):
+                delete_calls.append(list(ids))
+                return False
+
+        service = SimpleNamespace(instance=_QBInstance(), type="qbittorrent")
+
+        class _FakeDownloaderHelper:
+            def get_service(self, name=None):
+                return service
+
+        self.plugin_mod.DownloaderHelper = _FakeDownloaderHelper
+        try:
+            self.assertTrue(cleaner._delete_torrent("qb", "h1"))
+            cleaner._collect_monitor_usage()
+            self.assertEqual(delete_calls, [])
+            action = {
+                "action": "删种1",
+                "steps": {"downloader": cleaner._build_step_result(1, 1)},
+            }
+            cleaner._bind_deferred_deletes("qb", "h1", action, {
+                "mode": "torrent",
+                "retry_key": "torrent:h1",
+                "download_hash": "h1",
+                "downloader": "qb",
+            })
+        finally:
+            self.plugin_mod.DownloaderHelper = original_downloader_helper
+
+        self.assertEqual(delete_calls, [["h1"]])
+        self.assertEqual(cleaner._torrent_delete_queue, [])
+        self.assertEqual(action["steps"]["downloader"]["failed"], 1)
+        self.assertIn("torrent:h1", cleaner._load_retry_store())
+
+    def test_queued_history_deletes_commit_in_one_bulk_transaction(self):
+        cleaner = self._new_cleaner()
+        deletes = []
+        commits = []
+
+        class _Column:
+            def __init__(self, name):
+                self.name = name
+
+            def in_(self, values):
+                return self.name, sorted(values)
+
+        class _Query:
+            def __init__(self, model):
+                self.model = model
+                self.cond = None
+
+            def filter(self, cond):
+                self.cond = cond
+                return self
+
+            def delete(self, synchronize_session=False):
+                deletes.append((self.model.__name__, self.cond))
+                return len(self.cond[1])
+
+        db = SimpleNamespace(query=_Query, commit=lambda: commits.append(1), rollback=lambda: None)
+        models_mod = types.ModuleType("app.db.models.downloadhistory")
+        models_mod.DownloadHistory = type("DownloadHistory", (), {"download_hash": _Column("download_hash")})
+        models_mod.DownloadFiles = type("DownloadFiles", (), {"download_hash": _Column("download_hash")})
+        records = [SimpleNamespace(id=1), SimpleNamespace(id=2)]
+        cleaner._transfer_oper = SimpleNamespace(
+            _db=db,
+            list_by_hash=lambda _hash: records,
+            delete=lambda rid: self.fail("row-by-row delete should not be used"),
+        )
+        cleaner._download_oper = SimpleNamespace(
+            get_by_hash=lambda _hash: SimpleNamespace(id=9),
+            get_files_by_hash=lambda _hash: [SimpleNamespace(id=10), SimpleNamespace(id=11)],
+        )
+        cleaner._history_delete_queue = {"transfer_ids": set(), "hashes": set(), "tickets": [], "unbound": []}
+        self.plugin_mod.TransferHistory.id = _Column("id")
+        sys.modules["app.db.models.downloadhistory"] = models_mod
+        try:
+            self.assertEqual(cleaner._delete_transfer_history(download_hash="h1", history=None), 2)
+            self.assertEqual(cleaner._delete_transfer_history(download_hash=None, history=records[0]), 0)
+            self.assertEqual(cleaner._count_download_records("h1"), 3)
+            self.assertEqual(cleaner._delete_download_history("h1"), 3)
+            self.assertEqual(cleaner._count_download_records("h1"), 0)
+            self.assertEqual(cleaner._delete_download_history("h1"), 0)
+            cleaner._flush_history_delete_queue()
+        finally:
+            del self.plugin_mod.TransferHistory.id
+            sys.modules.pop("app.db.models.downloadhistory", None)
+
+        self.assertEqual(len(commits), 1)
+        self.assertEqual(deletes, [
+            ("TransferHistory", ("id", [1, 2])),
+            ("DownloadHistory", ("download_hash", ["h1"])),
+            ("DownloadFiles", ("download_hash", ["h1"])),
+        ])
+
+    def test_history_bulk_delete_opens_public_session_or_warns_once(self):
+        cleaner = self._new_cleaner()
+        cleaner._transfer_oper = SimpleNamespace(_db=None)
+        cleaner._download_oper = SimpleNamespace()
+        cleaner._db_fallback_logged = False
+        events = []
+
+        class _Column:
+            def in_(self, values):
+                return sorted(values)
+
+        class _Query:
+            def __init__(self, model):
+                self.model = model
+
+            def filter(self, cond):
+                return self
+
+            def delete(self, synchronize_session=False):
+                events.append(("delete", self.model.__name__))
+                return 1
+
+        class _Session:
+            query = _Query
+
+            @staticmethod
+            def commit():
+                events.append(("commit",))
+
+            @staticmethod
+            def rollback():
+                events.append(("rollback",))
+
+            @staticmethod
+            def close():
+                events.append(("close",))
+
+        models_mod = types.ModuleType("app.db.models.downloadhistory")
+        models_mod.DownloadHistory = type("DownloadHistory", (), {"download_hash": _Column()})
+        models_mod.DownloadFiles = type("DownloadFiles", (), {"download_hash": _Column()})
+        original_logger = self.plugin_mod.logger
+        warning_logs = []
+        self.plugin_mod.logger = SimpleNamespace(
+            info=lambda *args, **kwargs: None,
+            warning=lambda msg, *args, **kwargs: warning_logs.append(str(msg)),
+            error=lambda *args, **kwargs: None,
+            debug=lambda *args, **kwargs: None,
+        )
+        original_db_mod = sys.modules.get("app.db")
+        sys.modules["app.db.models.downloadhistory"] = models_mod
+        self.plugin_mod.TransferHistory.id = _Column()
+        try:
+            sys.modules["app.db"] = types.ModuleType("app.db")
+            self.assertIsNone(cleaner._bulk_delete_history({1}, {"h1"}))
+            self.assertIsNone(cleaner._bulk_delete_history({2}, set()))
+            db_mod = types.ModuleType("app.db")
+            db_mod.SessionFactory = _Session
+            sys.modules["app.db"] = db_mod
+            removed = cleaner._bulk_delete_history({1}, {"h1"})
+        finally:
+            self.plugin_mod.logger = original_logger
+            del self.plugin_mod.TransferHistory.id
+            sys.modules.pop("app.db.models.downloadhistory", None)
+            if original_db_mod is None:
+                sys.modules.pop("app.db", None)
+            else:
+                sys.modules["app.db"] = original_db_mod
+
+        self.assertEqual(len(warning_logs), 1)
+        self.assertIn("数据库会话不可用", warning_logs[0])
+        self.assertEqual(removed, (1, 2))
+        self.assertEqual(events, [
+            ("delete", "TransferHistory"),
+            ("delete", "DownloadHistory"),
+            ("delete", "DownloadFiles"),
+            ("commit",),
+            ("close",),
+        ])
+
     def test_torrent_hash_supports_mapping_like_hash_string(self):
         class _TorrentLike:
             @staticmethod
@@ -970,13 +2222,16 @@ class DiskCleanerMockTest(unittest.TestCase):
         cleaner._downloaders = ["qb"]
         original_downloader_helper = self.plugin_mod.DownloaderHelper
 
-        calls = {"status": None}
+        calls = []
 
         class _QBInstance:
             @staticmethod
             def get_torrents(status=None, ids=None, tags=None):
-                calls["status"] = status
-                return ([{"hash": "q1", "name": "qb-demo", "completion_on": 1}], False)
+                calls.append(status)
+                return ([
+                    {"hash": "q1", "name": "qb-demo", "state": "pausedUP", "progress": 1, "completion_on": 1},
+                    {"hash": "q0", "name": "qb-partial", "state": "downloading", "progress": 0.3},
+                ], False)
 
             @staticmethod
             def get_completed_torrents():
@@ -992,7 +2247,8 @@ class DiskCleanerMockTest(unittest.TestCase):
         finally:
             self.plugin_mod.DownloaderHelper = original_downloader_helper
 
-        self.assertEqual(calls["status"], "completed")
+        # 单次全量读取，再从中筛出（含暂停的）已完成任务
+        self.assertEqual(calls, [None])
         self.assertEqual((result or {}).get("hash"), "q1")
         self.assertEqual((result or {}).get("downloader"), "qb")
 
@@ -1001,12 +2257,14 @@ class DiskCleanerMockTest(unittest.TestCase):
         cleaner._downloaders = ["TR"]
         original_downloader_helper = self.plugin_mod.DownloaderHelper
 
-        calls = {"status": None}
+        calls = []
 
         class _TRInstance:
             @staticmethod
             def get_torrents(status=None, ids=None, tags=None):
-                calls["status"] = status
+                calls.append(status)
+                if status is None:
+                    return ([], False)
                 return ([{"hashString": "t1", "name": "tr-demo", "doneDate": 1}], False)
 
             @staticmethod
@@ -1023,10 +2281,44 @@ class DiskCleanerMockTest(unittest.TestCase):
         finally:
             self.plugin_mod.DownloaderHelper = original_downloader_helper
 
-        self.assertEqual(calls["status"], ["seeding", "seed_pending", "stopped"])
+        # 全量读取为空时回退到按状态读取（含 stopped 的已完成任务）
+        self.assertEqual(calls, [None, ["seeding", "seed_pending", "stopped"]])
         self.assertEqual((result or {}).get("hash"), "t1")
         self.assertEqual((result or {}).get("downloader"), "TR")
 
+    def test_pick_longest_seeding_torrent_counts_all_eligible(self):
+        cleaner = self._new_cleaner()
+        cleaner._downloaders = ["qb"]
+        cleaner._torrent_snapshots = {}
+        original_downloader_helper = self.plugin_mod.DownloaderHelper
+        calls = []
+
+        class _QBInstance:
+            @staticmethod
+            def get_torrents(status=None, ids=None, tags=None):
+                calls.append(status)
+                return ([
+                    {"hash": f"h{index}", "state": "uploading", "progress": 1, "completion_on": index}
+                    for index in range(1, 5)
+                ] + [{"hash": "d1", "state": "downloading", "progress": 0.5}], False)
+
+        class _FakeDownloaderHelper:
+            def get_services(self, name_filters=None):
+                return {"qb": SimpleNamespace(instance=_QBInstance(), type="qbittorrent")}
+
+        self.plugin_mod.DownloaderHelper = _FakeDownloaderHelper
+        try:
+            picked = cleaner._pick_longest_seeding_torrent(min_days=None, skipped_hashes=set())
+            summary, _ = cleaner._collect_downloader_overview_stats(min_days=None, skipped_hashes=set())
+        finally:
+            self.plugin_mod.DownloaderHelper = original_downloader_helper
+            cleaner._torrent_snapshots = None
+
+        self.assertEqual((picked or {}).get("hash"), "h1")
+        self.assertEqual(summary.get("total"), 5)
+        self.assertEqual(summary.get("eligible"), 4)
+        self.assertEqual(calls, [None])
+
     def test_collect_downloader_overview_stats_contains_total_completed_downloading_paused_and_eligible(self):
         cleaner = self._new_cleaner()
         cleaner._downloaders = ["qb"]
@@ -1107,6 +2399,250 @@ class DiskCleanerMockTest(unittest.TestCase):
         self.assertEqual((usage or {}).get("total"), 0)
         self.assertEqual((usage or {}).get("free"), 0)
 
+    def test_calc_usage_groups_paths_by_device_and_projects_frees(self):
+        cleaner = self._new_cleaner()
+        cleaner._dry_run = True
+        cleaner._device_usage_cache = {}
+        cleaner._path_device_cache = {}
+        cleaner._usage_projected_freed = {}
+        with tempfile.TemporaryDirectory() as temp_dir:
+            first = Path(temp_dir) / "a"
+            second = Path(temp_dir) / "b"
+            first.mkdir()
+            second.mkdir()
+            media_file = first / "movie.mkv"
+            media_file.write_bytes(b"x" * 4096)
+
+            usage = cleaner._calc_usage([first, second])
+            disk = self.plugin_mod.shutil.disk_usage(temp_dir)
+            cleaner._project_usage_freed(media_file, 1024 ** 3)
+            projected = cleaner._calc_usage([first, second])
+
+        self.assertEqual(usage.get("devices"), 1)
+        self.assertEqual(usage.get("total"), disk.total)
+        self.assertEqual(
+            projected.get("free"),
+            min(usage.get("total"), usage.get("free") + 1024 ** 3),
+        )
+
+    def test_reclaim_bytes_counts_inode_only_when_all_links_in_delete_set(self):
+        cleaner = self._new_cleaner()
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir)
+            library_dir = root / "library" / "Movie"
+            download_dir = root / "download"
+            library_dir.mkdir(parents=True)
+            download_dir.mkdir()
+            shared = library_dir / "movie.mkv"
+            shared.write_bytes(b"m" * 4000)
+            os.link(shared, download_dir / "movie.mkv")
+            nfo = library_dir / "movie.nfo"
+            nfo.write_bytes(b"n" * 100)
+
+            only_library = cleaner._reclaim_bytes([library_dir])
+            both_links = cleaner._reclaim_bytes([library_dir, download_dir / "movie.mkv", nfo])
+            single_file = cleaner._reclaimable_bytes(shared)
+
+        self.assertEqual(only_library, 100)
+        self.assertEqual(both_links, 4100)
+        self.assertEqual(single_file, 0)
+
+    def test_path_policy_compiles_keywords_block_paths_and_roots(self):
+        cleaner = self._new_cleaner()
+        cleaner._path_block_keywords = ["Keep", "收藏"]
+        cleaner._path_blocklist = ["/media/protected"]
+        cleaner._path_policy = None
+        policy = cleaner._policy()
+
+        self.assertIs(cleaner._policy(), policy)
+        self.assertEqual(cleaner._path_contains_block_keyword("/media/movies/KEEP/a.mkv"), "Keep")
+        self.assertEqual(cleaner._path_contains_block_keyword(Path("/media/tv/我的收藏/S01")), "收藏")
+        self.assertIsNone(cleaner._path_contains_block_keyword("/media/movies/a.mkv"))
+        self.assertTrue(policy.in_block_paths(Path("/media/protected/x/y.mkv")))
+        self.assertTrue(policy.in_block_paths(Path("/media/protected")))
+        self.assertFalse(policy.in_block_paths(Path("/media/protected2/y.mkv")))
+        roots = [Path("/media/movies"), Path("/data/tv")]
+        self.assertTrue(policy.in_roots(Path("/data/tv/Show/S01/e1.mkv"), roots))
+        self.assertFalse(policy.in_roots(Path("/data/tvx/e1.mkv"), roots))
+        self.assertFalse(policy.in_roots(Path("/media"), roots))
+        self.assertIn(".mkv", policy.media_exts)
+        self.assertIsInstance(policy.scrape_exts, frozenset)
+
+    def test_no_media_dirs_reclaimed_in_single_sweep_with_one_scan(self):
+        cleaner = self._new_cleaner()
+        cleaner._dry_run = False
+        cleaner._clean_empty_media_dirs = True
+        cleaner._current_run_no_media_dirs_deleted = {}
+        cleaner._current_run_empty_dirs_deleted = {}
+        cleaner._current_run_no_media_checks = 0
+        cleaner._dir_media_counts = {}
+        cleaner._dir_media_scanned = {}
+        cleaner._no_media_sweep_queue = {}
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir) / "tv"
+            season = root / "Show" / "Season 1"
+            season.mkdir(parents=True)
+            (root / "Show" / "poster.jpg").write_bytes(b"p")
+            other = root / "Other"
+            other.mkdir()
+            (other / "keep.mkv").write_bytes(b"k")
+            episodes = []
+            for index in range(1, 6):
+                episode = season / f"e{index}.mkv"
+                episode.write_bytes(b"e")
+                (season / f"e{index}.nfo").write_bytes(b"n")
+                episodes.append(episode)
+            cleaner._library_paths = lambda: [root]
+
+            scan_roots = []
+            original_scan = cleaner._scan_files
+
+            def _scan_files(scan_root, *args, **kwargs):
+                scan_roots.append(Path(scan_root).as_posix())
+                return original_scan(scan_root, *args, **kwargs)
+
+            cleaner._scan_files = _scan_files
+            for episode in episodes[:-1]:
+                self.assertTrue(cleaner._delete_local_item(episode, [root]))
+            self.assertTrue(season.exists())
+            cleaner._sweep_no_media_dirs()
+            self.assertTrue(season.exists())
+            self.assertEqual(cleaner._dir_media_counts.get((root / "Show").as_posix()), 1)
+
+            cleaner._no_media_sweep_queue = {}
+            self.assertTrue(cleaner._delete_local_item(episodes[-1], [root]))
+            cleaner._sweep_no_media_dirs()
+
+            self.assertFalse((root / "Show").exists())
+            self.assertTrue(other.exists())
+            self.assertEqual(scan_roots, [(root / "Show").as_posix()])
+            self.assertIn((root / "Show").as_posix(), cleaner._current_run_no_media_dirs_deleted)
+
+    def test_no_media_sweep_rechecks_live_filesystem_and_keeps_on_scan_error(self):
+        cleaner = self._new_cleaner()
+        cleaner._dry_run = False
+        cleaner._clean_empty_media_dirs = True
+        cleaner._current_run_no_media_dirs_deleted = {}
+        cleaner._current_run_no_media_checks = 0
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir) / "tv"
+            stale = root / "Stale"
+            broken = root / "Broken"
+            stale.mkdir(parents=True)
+            broken.mkdir()
+            (stale / "new.mkv").write_bytes(b"n")
+            (broken / "poster.jpg").write_bytes(b"p")
+            cleaner._library_paths = lambda: [root]
+            # 运行开始时的计数快照不含运行期间新入库的媒体
+            cleaner._dir_media_counts = {stale.as_posix(): 0}
+            cleaner._dir_media_scanned = {stale.as_posix(): True}
+
+            def _failing_scan(*args, **kwargs):
+                raise OSError("io error")
+
+            cleaner._scan_files = _failing_scan
+            cleaner._no_media_sweep_queue = {
+                stale.as_posix(): (stale, [root]),
+                broken.as_posix(): (broken, [root]),
+            }
+            cleaner._sweep_no_media_dirs()
+
+            self.assertTrue((stale / "new.mkv").exists())
+            self.assertTrue(broken.exists())
+            self.assertFalse(cleaner._dir_media_scanned[broken.as_posix()])
+            self.assertEqual(cleaner._current_run_no_media_dirs_deleted, {})
+
+    def test_dir_listing_cache_serves_sidecars_and_season_with_one_read(self):
+        cleaner = self._new_cleaner()
+        cleaner._dry_run = False
+        cleaner._clean_empty_media_dirs = False
+        cleaner._current_run_empty_dirs_deleted = {}
+        cleaner._dir_listing_cache = {}
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir) / "tv"
+            show = root / "Show"
+            season = show / "Season 1"
+            season.mkdir(parents=True)
+            episodes = []
+            for index in range(1, 25):
+                episode = season / f"e{index:02d}.mkv"
+                episode.write_bytes(b"e")
+                (season / f"e{index:02d}.nfo").write_bytes(b"n")
+                (season / f"e{index:02d}-thumb.jpg").write_bytes(b"t")
+                episodes.append(episode)
+            history = SimpleNamespace(seasons="S01")
+
+            reads = []
+            real_scandir = os.scandir
+
+            def _scandir(path):
+                reads.append(Path(path).as_posix())
+                return real_scandir(path)
+
+            self.plugin_mod.os.scandir = _scandir
+            try:
+                sidecars = [cleaner._collect_scrape_files(item) for item in episodes]
+                season_roots = {cleaner._tv_season_root_from_media_path(show / "x.mkv", history) for _ in range(24)}
+                self.assertTrue(cleaner._delete_local_item(season / "e01.nfo", [root]))
+                refreshed = cleaner._collect_scrape_files(episodes[0])
+            finally:
+                self.plugin_mod.os.scandir = real_scandir
+
+        self.assertEqual(sidecars[0], [season / "e01.nfo"])
+        self.assertTrue(all(len(item) == 1 for item in sidecars))
+        self.assertEqual(season_roots, {season})
+        self.assertEqual(refreshed, [])
+        self.assertEqual(reads.count(season.as_posix()), 2)
+        self.assertEqual(reads.count(show.as_posix()), 1)
+
+    def test_retry_store_migrates_legacy_queue_and_backs_off_failed_jobs(self):
+        cleaner = self._new_cleaner()
+        cleaner._retry_interval_minutes = 10
+        cleaner._retry_max_attempts = 3
+        cleaner.save_data("retry_queue", [
+            {"id": "1", "retry_key": "media:a", "attempt": 0, "next_run_at": "2000-01-01 00:00:00",
+             "payload": {"mode": "media", "failed_steps": ["media"]}},
+            {"id": "2", "retry_key": "media:b", "attempt": 0, "next_run_at": "2999-01-01 00:00:00",
+             "payload": {"mode": "media", "failed_steps": ["media"]}},
+        ])
+        cleaner._retry_media_payload = lambda payload: {
+            "steps": {}, "failed_steps": ["media"], "freed_bytes": 0, "refresh_items": [],
+        }
+
+        self.assertEqual(cleaner._retry_queue_size(), 2)
+        started = time.time()
+        actions = cleaner._process_retry_queue(limit=5)
+
+        self.assertEqual(len(actions), 1)
+        job = cleaner._load_retry_store()["media:a"]
+        self.assertEqual(job.get("attempt"), 1)
+        self.assertEqual(job.get("step_attempts"), {"media": 1})
+        self.assertGreaterEqual(job.get("next_run_ts"), started + 10 * 60 * 0.8)
+        self.assertLessEqual(job.get("next_run_ts"), time.time() + 10 * 60 * 1.2)
+        stored = cleaner.get_data("retry_store") or {}
+        self.assertEqual(set((stored.get("jobs") or {}).keys()), {"media:a", "media:b"})
+
+        job["next_run_ts"] = 0
+        cleaner._retry_due_heap = None
+        cleaner._retry_store = None
+        cleaner.save_data("retry_store", {"version": 2, "jobs": {"media:a": job}})
+        cleaner._process_retry_queue(limit=5)
+        job = cleaner._load_retry_store()["media:a"]
+        # 第二次失败退避翻倍
+        self.assertGreaterEqual(job.get("next_run_ts"), time.time() + 20 * 60 * 0.8 - 5)
+
+    def test_enqueue_retry_persists_store_immediately(self):
+        cleaner = self._new_cleaner()
+        cleaner._enqueue_retry({"mode": "media", "retry_key": "media:x", "failed_steps": ["media"]})
+
+        self.assertFalse(cleaner._retry_store_dirty)
+        stored = cleaner.get_data("retry_store") or {}
+        self.assertEqual(list((stored.get("jobs") or {}).keys()), ["media:x"])
+
+        cleaner._enqueue_retry({"mode": "media", "retry_key": "media:x", "failed_steps": ["mediaserver"]})
+        stored = cleaner.get_data("retry_store") or {}
+        self.assertEqual(stored["jobs"]["media:x"]["payload"]["failed_steps"], ["media", "mediaserver"])
+
     def test_run_retry_job_wraps_retry_payload_exception(self):
         cleaner = self._new_cleaner()
         cleaner._retry_max_attempts = 3